@@ -0,0 +1,250 @@
+"""
+Automod: chaque message d'un serveur est vérifié avant d'être lu par un modérateur
+  - termes interdits: un automate d'Aho-Corasick par serveur, construit une fois par
+    liste; un seul passage sur le texte quel que soit le nombre de termes (mots
+    entiers, sans tenir compte de la casse ni des accents)
+  - invitations Discord et liens
+  - mentions en masse (utilisateurs, rôles, @everyone)
+Le message fautif est supprimé puis la sanction du serveur appliquée (avertissement ou
+mute, voir main.py); les réglages sont dans guild_settings (clés automod_*).
+
+Mesure du tableau AutoMod de README_SETUP.md: python automod.py --bench
+"""
+import argparse
+import random
+import re
+import string
+import time
+import unicodedata
+from collections import deque
+
+from guild_settings import settings_store
+
+INVITE_RE = re.compile(
+    r'(?:discord(?:app)?\.com/invite|discord\.gg)/[\w-]+', re.IGNORECASE
+)
+LINK_RE = re.compile(r'https?://[^\s<>]+', re.IGNORECASE)
+
+RULE_LABELS = {
+    'term': "terme interdit",
+    'invite': "invitation Discord",
+    'link': "lien",
+    'mentions': "mentions en masse"
+}
+
+
+def normalize(text):
+    """Minuscules, sans accents, espaces réduits:
+    forme commune aux termes et aux messages
+    """
+    text = text.casefold()
+    if not text.isascii():
+        text = ''.join(
+            char
+            for char in unicodedata.normalize('NFKD', text)
+            if not unicodedata.combining(char)
+        )
+    return ' '.join(text.split())
+
+
+class TermMatcher:
+    """Automate d'Aho-Corasick: tous les termes cherchés en un seul passage sur le texte
+    """
+
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.size = 0
+        for term in {normalize(term) for term in terms} - {''}:
+            node = 0
+            for char in term:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = child
+            self._out[node] = (term,)
+            self.size += 1
+        self._link()
+
+    def _link(self):
+        """Liens d'échec (plus long suffixe qui est aussi un préfixe),
+        parcours en largeur
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(char, 0)
+                fail[child] = target if target != child else 0
+                # Termes qui se terminent aussi ici (suffixes)
+                out[child] += out[fail[child]]
+
+    def find(self, text):
+        """Premier terme présent comme mot entier dans un texte normalisé, ou None"""
+        goto, fail, out = self._goto, self._fail, self._out
+        last = len(text) - 1
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for term in out[node]:
+                start = index - len(term) + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (
+                    index == last or not text[index + 1].isalnum()
+                ):
+                    return term
+        return None
+
+    def __len__(self):
+        return self.size
+
+
+class Violation:
+    __slots__ = ('rule', 'detail')
+
+    def __init__(self, rule, detail):
+        self.rule = rule
+        self.detail = detail
+
+    @property
+    def reason(self):
+        return f"AutoMod: {RULE_LABELS[self.rule]} ({self.detail})"
+
+
+class AutoMod:
+    """Règles compilées par serveur, reconstruites seulement quand la liste de termes
+    change
+    """
+
+    def __init__(self, settings=settings_store):
+        self.settings = settings
+        self._matchers = {}
+        self.checked = 0
+        self.violations = 0
+
+    def enabled(self, guild_id):
+        return self.settings.get(guild_id, 'automod_enabled')
+
+    def matcher(self, guild_id):
+        terms = self.settings.get(guild_id, 'automod_terms')
+        cached = self._matchers.get(guild_id)
+        # Le cache des paramètres garde le même tuple tant que la liste n'est pas
+        # modifiée
+        if cached is None or cached[0] is not terms:
+            cached = self._matchers[guild_id] = (terms, TermMatcher(terms))
+        return cached[1]
+
+    def check(self, guild_id, content, mentions=0):
+        """Première règle enfreinte par un message, ou None"""
+        self.checked += 1
+        violation = self._check(guild_id, content, mentions)
+        if violation is not None:
+            self.violations += 1
+        return violation
+
+    def _check(self, guild_id, content, mentions):
+        settings = self.settings
+        max_mentions = settings.get(guild_id, 'automod_max_mentions')
+        if max_mentions and mentions > max_mentions:
+            return Violation('mentions', f"{mentions} mentions")
+        if not content:
+            return None
+        if settings.get(guild_id, 'automod_block_invites'):
+            match = INVITE_RE.search(content)
+            if match:
+                return Violation('invite', match.group(0))
+        if settings.get(guild_id, 'automod_block_links'):
+            match = LINK_RE.search(content)
+            if match:
+                return Violation('link', match.group(0)[:64])
+        matcher = self.matcher(guild_id)
+        if matcher.size:
+            term = matcher.find(normalize(content))
+            if term is not None:
+                return Violation('term', term)
+        return None
+
+    def check_message(self, message):
+        """Message Discord: mentions distinctes d'utilisateurs et de rôles,
+        @everyone compté
+        """
+        mentions = (
+            len(set(message.raw_mentions))
+            + len(set(message.raw_role_mentions))
+            + (1 if message.mention_everyone else 0)
+        )
+        return self.check(message.guild.id, message.content, mentions)
+
+    def forget(self, guild_id):
+        self._matchers.pop(guild_id, None)
+
+    def stats(self):
+        return {
+            'checked': self.checked,
+            'violations': self.violations,
+            'guilds': len(self._matchers),
+            'terms': sum(len(matcher) for _, matcher in self._matchers.values())
+        }
+
+
+def _random_word(rng):
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+
+
+def bench(term_counts=(10, 1000, 10000), messages=2000, regex_messages=100, seed=0):
+    """Coût par message: automate contre une regex par terme (textes aléatoires)"""
+    rng = random.Random(seed)
+    vocabulary = [_random_word(rng) for _ in range(5000)]
+    texts = [
+        normalize(' '.join(rng.choices(vocabulary, k=rng.randint(5, 40))))
+        for _ in range(messages)
+    ]
+    print(f"⏱️ {messages} messages de 5 à 40 mots, termes aléatoires")
+    print("Termes | Aho-Corasick | Une regex par terme | Compilation")
+    for count in term_counts:
+        terms = [_random_word(rng) for _ in range(count)]
+        start = time.perf_counter()
+        matcher = TermMatcher(terms)
+        compiled = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for text in texts:
+            matcher.find(text)
+        automaton = (time.perf_counter() - start) / len(texts)
+
+        # Ancienne approche, sur un échantillon (trop lente sur tous les messages)
+        patterns = [re.compile(rf'\b{re.escape(term)}\b') for term in terms]
+        sample = texts[:regex_messages]
+        start = time.perf_counter()
+        for text in sample:
+            any(pattern.search(text) for pattern in patterns)
+        regexes = (time.perf_counter() - start) / len(sample)
+
+        print(
+            f"{count} | {automaton * 1e6:.0f} µs/message | "
+            f"{regexes * 1e6:.0f} µs/message | {compiled * 1000:.1f} ms"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Automod des messages")
+    parser.add_argument(
+        '--bench', action='store_true', help="mesure le coût par message"
+    )
+    parser.add_argument('--messages', type=int, default=2000)
+    options = parser.parse_args()
+    if options.bench:
+        bench(messages=options.messages)
+    else:
+        parser.print_help()
@@ -0,0 +1,362 @@
+"""
+Profils de cache gateway (variable GATEWAY_CACHE_PROFILE)
+  full   -> intents membres + présences, tous les membres chargés dès la connexion
+            (fonctionnement historique)
+  status -> idem, mais les mises à jour de présence qui ne changent pas le statut
+            (activités, jeux, musique: l'essentiel du trafic) sont ignorées avant toute
+            copie de membre ou dispatch
+  lean   -> pas d'intent présences, pas de chargement des membres au démarrage: seuls
+            les membres récemment actifs et les cibles de modération restent en mémoire
+            (LRU borné par serveur); l'annuaire du dashboard charge la liste complète
+            d'un serveur à la demande, libérée après DIRECTORY_TTL secondes sans
+            consultation
+Les profils status et lean s'appuient sur des attributs privés de discord.py
+(PRIVATE_INTERNALS, vérifiés avec 2.6 et 2.7): s'il en manque un, le bot retombe sur
+le profil full avec un avertissement.
+"""
+import asyncio
+import itertools
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import discord
+from discord.state import ConnectionState
+
+PROFILES = ('full', 'status', 'lean')
+CACHE_PROFILE = os.getenv('GATEWAY_CACHE_PROFILE', 'full')
+# Membres actifs gardés par serveur en profil lean
+ACTIVE_MEMBERS_LIMIT = int(os.getenv('ACTIVE_MEMBERS_LIMIT', '2000'))
+# Liste complète d'un serveur libérée après ce délai sans consultation de l'annuaire
+# (secondes)
+DIRECTORY_TTL = int(os.getenv('DIRECTORY_TTL', '900'))
+TRIM_INTERVAL = 60
+# Attente maximale du chargement de l'annuaire dans une requête du dashboard (secondes)
+CHUNK_WAIT = 3.0
+# IDs par requête gateway de membres
+QUERY_BATCH = 100
+# Membres mesurés par serveur pour estimer la mémoire
+SIZE_SAMPLE = 32
+# Références partagées entre objets (serveur,
+# état de connexion): jamais comptées dans un membre
+_SHARED_ATTRS = frozenset(('_state', 'guild', '_guild'))
+# Attributs privés de discord.py utilisés par chaque profil
+PRIVATE_INTERNALS = {
+    'status': ((ConnectionState, ('parse_presence_update', '_get_guild')),),
+    'lean': (
+        (discord.Guild, ('_add_member', '_remove_member', '_members')),
+        (ConnectionState, ('self_id',))
+    )
+}
+
+
+def missing_internals(name, state=None):
+    """Attributs privés requis par le profil name absents de discord.py
+
+    state: état de connexion du bot, pour vérifier aussi sa table des parseurs.
+    """
+    missing = [
+        f"{cls.__name__}.{attr}"
+        for cls, attrs in PRIVATE_INTERNALS.get(name, ())
+        for attr in attrs
+        if not hasattr(cls, attr)
+    ]
+    if name == 'status' and state is not None:
+        parsers = getattr(state, 'parsers', None)
+        if not isinstance(parsers, dict) or 'PRESENCE_UPDATE' not in parsers:
+            missing.append("ConnectionState.parsers['PRESENCE_UPDATE']")
+    return missing
+
+
+def deep_size(obj, seen=None, depth=4):
+    """Taille approximative d'un objet et de ce qu'il possède (slots, conteneurs)"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or depth < 0:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(
+            deep_size(key, seen, depth - 1) + deep_size(value, seen, depth - 1)
+            for key, value in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_size(item, seen, depth - 1) for item in obj)
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if name not in _SHARED_ATTRS and name != '__weakref__':
+                size += deep_size(getattr(obj, name, None), seen, depth - 1)
+    attributes = getattr(obj, '__dict__', None)
+    if attributes:
+        size += deep_size(
+            {
+                key: value
+                for key, value in attributes.items()
+                if key not in _SHARED_ATTRS
+            },
+            seen,
+            depth - 1
+        )
+    return size
+
+
+def process_memory():
+    """Mémoire résidente du processus (octets)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class CacheProfile:
+    """Réglages du cache de membres et suivi des membres actifs"""
+
+    def __init__(
+        self,
+        name=CACHE_PROFILE,
+        active_limit=ACTIVE_MEMBERS_LIMIT,
+        directory_ttl=DIRECTORY_TTL
+    ):
+        if name not in PROFILES:
+            print(
+                f"⚠️  Profil de cache inconnu '{name}', profil 'full' utilisé "
+                f"({', '.join(PROFILES)})"
+            )
+            name = 'full'
+        self._select(name)
+        self.active_limit = active_limit
+        self.directory_ttl = directory_ttl
+        self._active = {}
+        self._directories = {}
+        self._chunking = {}
+        self.presence_applied = 0
+        self.presence_skipped = 0
+        self.evicted = 0
+
+    def _select(self, name):
+        self.name = name
+        self.presences = name != 'lean'
+        # Profil lean: membres en mémoire bornés, annuaire chargé à la demande
+        self.bounded = name == 'lean'
+
+    def _check_internals(self, state=None):
+        """Profil full si discord.py n'a plus un attribut privé utilisé;
+        False dans ce cas
+        """
+        missing = missing_internals(self.name, state)
+        if missing:
+            print(
+                f"⚠️  discord.py {discord.__version__} sans {', '.join(missing)}: "
+                f"profil 'full' utilisé au lieu de '{self.name}'"
+            )
+            self._select('full')
+        return not missing
+
+    def apply(self, intents):
+        """Ajuste les intents; retourne les options à passer à commands.Bot"""
+        self._check_internals()
+        intents.presences = self.presences
+        return {
+            'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+            'chunk_guilds_at_startup': not self.bounded
+        }
+
+    def install(self, bot):
+        """Profil status: filtre des mises à jour de présence
+        (à appeler une fois le bot créé)
+        """
+        if self.name != 'status':
+            return
+        state = getattr(bot, '_connection', None)
+        if state is None:
+            print("⚠️  Client._connection introuvable: profil 'full' utilisé")
+            self._select('full')
+            return
+        if not self._check_internals(state):
+            return
+        parse = state.parsers['PRESENCE_UPDATE']
+
+        def parse_presence_update(data):
+            user = data.get('user') or {}
+            # Utilisateur complet = nom ou avatar modifié: traité normalement (annuaire)
+            if len(user) <= 1 and data.get('guild_id'):
+                guild = state._get_guild(int(data['guild_id']))
+                member = (
+                    guild.get_member(int(user['id']))
+                    if guild is not None and 'id' in user
+                    else None
+                )
+                if member is not None and member.raw_status == data.get('status'):
+                    self.presence_skipped += 1
+                    return
+            self.presence_applied += 1
+            parse(data)
+
+        state.parsers['PRESENCE_UPDATE'] = parse_presence_update
+
+    # Membres actifs (profil lean)
+    def touch(self, member):
+        """Membre actif (message, arrivée, cible de modération): gardé en mémoire"""
+        if not self.bounded or not isinstance(member, discord.Member):
+            return
+        guild = member.guild
+        active = self._active.setdefault(guild.id, OrderedDict())
+        active[member.id] = None
+        active.move_to_end(member.id)
+        if guild.get_member(member.id) is None:
+            guild._add_member(member)
+        while len(active) > self.active_limit:
+            member_id, _ = active.popitem(last=False)
+            if guild.id not in self._directories:
+                self._evict(guild, member_id)
+
+    def _evict(self, guild, member_id):
+        member = guild.get_member(member_id)
+        if (
+            member is None
+            or member.id == guild._state.self_id
+            or member.voice is not None
+        ):
+            return
+        guild._remove_member(member)
+        self.evicted += 1
+
+    async def resolve_member(self, guild, user_id):
+        """Membre en cache, sinon demandé à la gateway (profil lean);
+        None si absent du serveur
+        """
+        member = guild.get_member(user_id)
+        if member is None and self.bounded:
+            members = await guild.query_members(user_ids=[user_id], limit=1, cache=True)
+            member = members[0] if members else None
+        self.touch(member)
+        return member
+
+    async def resolve_members(self, guild, user_ids):
+        """Charge les membres absents du cache par lots de 100
+        (une requête gateway par lot)
+        """
+        if not self.bounded:
+            return
+        missing = [user_id for user_id in user_ids if guild.get_member(user_id) is None]
+        for start in range(0, len(missing), QUERY_BATCH):
+            batch = missing[start:start + QUERY_BATCH]
+            for member in await guild.query_members(
+                user_ids=batch, limit=len(batch), cache=True
+            ):
+                self.touch(member)
+
+    async def ensure_directory(self, guild, wait=CHUNK_WAIT):
+        """Annuaire du dashboard: tous les membres en mémoire;
+        False si le chargement est encore en cours
+        """
+        if not self.bounded:
+            return True
+        self._directories[guild.id] = time.monotonic()
+        if guild.chunked:
+            return True
+        task = self._chunking.get(guild.id)
+        if task is None:
+            task = self._chunking[guild.id] = asyncio.ensure_future(
+                guild.chunk(cache=True)
+            )
+            task.add_done_callback(lambda _: self._chunking.pop(guild.id, None))
+        # Le chargement continue si la requête abandonne
+        done, _ = await asyncio.wait({task}, timeout=wait)
+        if task in done:
+            task.result()
+            return True
+        return False
+
+    def trim(self, bot):
+        """Libère les annuaires inutilisés; retourne les IDs des serveurs concernés"""
+        now = time.monotonic()
+        released = []
+        for guild_id, last_used in list(self._directories.items()):
+            if now - last_used < self.directory_ttl or guild_id in self._chunking:
+                continue
+            del self._directories[guild_id]
+            guild = bot.get_guild(guild_id)
+            if guild is None:
+                continue
+            active = self._active.get(guild_id, ())
+            for member_id in [
+                member_id for member_id in guild._members if member_id not in active
+            ]:
+                self._evict(guild, member_id)
+            released.append(guild_id)
+        return released
+
+    async def run_trimmer(self, bot, on_release):
+        """Boucle du bot (profil lean): on_release(guild_id)
+        après libération d'un annuaire
+        """
+        if not self.bounded:
+            return
+        while True:
+            await asyncio.sleep(TRIM_INTERVAL)
+            try:
+                for guild_id in self.trim(bot):
+                    on_release(guild_id)
+            except Exception as e:
+                print(f"Erreur libération du cache de membres: {e}")
+
+    def forget(self, guild_id):
+        self._active.pop(guild_id, None)
+        self._directories.pop(guild_id, None)
+
+    # Rapport mémoire
+    def guild_report(self, guild, index_stats=None):
+        members = guild._members
+        sample = list(itertools.islice(members.values(), SIZE_SAMPLE))
+        seen = set()
+        per_member = (
+            sum(deep_size(member, seen) for member in sample) / len(sample)
+            if sample
+            else 0
+        )
+        member_bytes = int(per_member * len(members))
+        index_entries, index_bytes = index_stats or (0, 0)
+        return {
+            'id': str(guild.id),
+            'name': guild.name,
+            'member_count': guild.member_count,
+            'cached_members': len(members),
+            'presences': sum(
+                1 for member in members.values() if member.raw_status != 'offline'
+            )
+            if self.presences
+            else None,
+            'active_members': len(self._active.get(guild.id, ())),
+            'directory_loaded': guild.chunked,
+            'member_bytes': member_bytes,
+            'index_entries': index_entries,
+            'index_bytes': index_bytes,
+            'total_bytes': member_bytes + index_bytes
+        }
+
+    def report(self, guilds, index_stats=lambda _guild_id: None):
+        """Mémoire estimée du cache par serveur (les plus gros d'abord)"""
+        rows = sorted(
+            (self.guild_report(guild, index_stats(guild.id)) for guild in guilds),
+            key=lambda row: row['total_bytes'], reverse=True
+        )
+        return {
+            'profile': self.name,
+            'presences': self.presences,
+            'active_limit': self.active_limit if self.bounded else None,
+            'presence_updates': {
+                'applied': self.presence_applied,
+                'skipped': self.presence_skipped
+            },
+            'evicted': self.evicted,
+            'process_bytes': process_memory(),
+            'cache_bytes': sum(row['total_bytes'] for row in rows),
+            'guilds': rows
+        }
@@ -0,0 +1,256 @@
+"""
+Déploiement en shards et en clusters (plusieurs processus de bot)
+  SHARD_COUNT    absent -> une seule connexion gateway (commands.Bot)
+                 auto   -> AutoShardedBot, nombre de shards recommandé par Discord
+                 N      -> AutoShardedBot avec N shards
+  CLUSTER_COUNT  nombre de processus se partageant les shards (launch_new.py --clusters)
+  CLUSTER_ID     rang de ce processus (0 à CLUSTER_COUNT - 1);
+                 SHARD_IDS="0-3" force sa plage
+
+Chaque cluster a son socket IPC (bot_ipc.<id>.sock) et écrit dans la même base
+SQLite (mode WAL, busy_timeout). Le serveur web route chaque requête vers le cluster
+qui héberge le serveur Discord concerné et fusionne les états des clusters pour le
+dashboard.
+"""
+import json
+import os
+import urllib.request
+
+from ipc import IPC_ADDRESS, IPCClient, IPCError, parse_address
+
+GATEWAY_BOT_URL = 'https://discord.com/api/v10/gateway/bot'
+
+
+def shard_for(guild_id, shard_count):
+    """Shard qui reçoit les événements d'un serveur (formule Discord)"""
+    return (int(guild_id) >> 22) % shard_count
+
+
+def split_shards(shard_count, cluster_count):
+    """Plages contiguës de shards, aussi égales que possible, une par cluster"""
+    size, extra = divmod(shard_count, cluster_count)
+    ranges = []
+    start = 0
+    for cluster_id in range(cluster_count):
+        end = start + size + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def parse_shard_ids(text):
+    """'0-3,8' -> [0, 1, 2, 3, 8]"""
+    ids = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        ids.update(range(int(first), int(last or first) + 1))
+    return sorted(ids)
+
+
+def cluster_address(address, cluster_id):
+    """Adresse IPC d'un cluster: bot_ipc.sock -> bot_ipc.2.sock,
+    127.0.0.1:5099 -> 127.0.0.1:5101
+    """
+    kind, target = parse_address(address)
+    if kind == 'tcp':
+        host, port = target
+        return f'{host}:{port + cluster_id}'
+    root, ext = os.path.splitext(target)
+    return f'{root}.{cluster_id}{ext}'
+
+
+def recommended_shards(token):
+    """Nombre de shards recommandé par Discord pour ce bot"""
+    request = urllib.request.Request(
+        GATEWAY_BOT_URL, headers={'Authorization': f'Bot {token}'}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return int(json.load(response)['shards'])
+
+
+class ShardConfig:
+    """Shards hébergés par ce processus, lus dans l'environnement"""
+
+    def __init__(self, shard_count=None, cluster_count=1, cluster_id=0, shard_ids=None):
+        self.auto = shard_count == 'auto'
+        self.shard_count = (
+            None if shard_count in (None, '', 'auto') else int(shard_count)
+        )
+        self.cluster_count = max(1, int(cluster_count))
+        self.cluster_id = int(cluster_id)
+        if shard_ids:
+            self.shard_ids = parse_shard_ids(shard_ids)
+        elif self.shard_count and self.cluster_count > 1:
+            self.shard_ids = split_shards(self.shard_count, self.cluster_count)[
+                self.cluster_id
+            ]
+        else:
+            self.shard_ids = None  # Tous les shards
+        if self.cluster_count > 1 and not self.shard_count:
+            raise ValueError("CLUSTER_COUNT > 1 demande un SHARD_COUNT explicite")
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv('SHARD_COUNT'),
+            os.getenv('CLUSTER_COUNT', '1'),
+            os.getenv('CLUSTER_ID', '0'),
+            os.getenv('SHARD_IDS')
+        )
+
+    @property
+    def sharded(self):
+        return self.auto or self.shard_count is not None
+
+    @property
+    def primary(self):
+        """Le cluster 0 porte les tâches globales (rétention des logs)"""
+        return self.cluster_id == 0
+
+    def bot_options(self):
+        if not self.sharded:
+            return {}
+        return {'shard_count': self.shard_count, 'shard_ids': self.shard_ids}
+
+    def ipc_address(self, address=IPC_ADDRESS):
+        return (
+            cluster_address(address, self.cluster_id)
+            if self.cluster_count > 1
+            else address
+        )
+
+    def owns(self, guild_id):
+        """Ce processus reçoit-il les événements de ce serveur ?"""
+        if self.shard_ids is None or not self.shard_count:
+            return True
+        return shard_for(guild_id, self.shard_count) in self.shard_ids
+
+    def describe(self):
+        if not self.sharded:
+            return "connexion unique"
+        shards = (
+            f"shards {self.shard_ids[0]}-{self.shard_ids[-1]}"
+            if self.shard_ids
+            else "tous les shards"
+        )
+        total = self.shard_count or 'auto'
+        if self.cluster_count > 1:
+            return (
+                f"cluster {self.cluster_id}/{self.cluster_count}, {shards} sur {total}"
+            )
+        return f"{shards} sur {total}"
+
+
+shard_config = ShardConfig.from_env()
+
+
+def merge_status(statuses):
+    """Un seul état pour le dashboard à partir de ceux des clusters
+    (None = cluster injoignable)
+    """
+    online = [status for status in statuses if status and status.get('online')]
+    if not online:
+        return None
+    shards = sorted(
+        (shard for status in online for shard in status.get('shards', ())),
+        key=lambda shard: shard['id']
+    )
+    latencies = [status['latency'] for status in online]
+    return {
+        'online': True,
+        'user': online[0]['user'],
+        'guilds': [guild for status in online for guild in status['guilds']],
+        'total_users': sum(status['total_users'] for status in online),
+        'latency': round(sum(latencies) / len(latencies), 2),
+        'shards': shards,
+        'clusters': {'online': len(online), 'total': len(statuses)},
+        # Change dès que la version d'un cluster change
+        'version': sum(status['version'] for status in statuses if status),
+        'updated': max(
+            (status.get('updated') or 0 for status in statuses if status), default=0
+        ) or None
+    }
+
+
+def merge_cache_reports(reports):
+    """Rapports mémoire des clusters joignables réunis
+    (serveurs triés du plus gros au plus petit)
+    """
+    reports = [report for report in reports if report]
+    if not reports:
+        return None
+    merged = dict(reports[0])
+    merged['presence_updates'] = {
+        key: sum(report['presence_updates'][key] for report in reports)
+        for key in ('applied', 'skipped')
+    }
+    for key in ('evicted', 'process_bytes', 'cache_bytes'):
+        merged[key] = sum(report[key] for report in reports)
+    merged['guilds'] = sorted(
+        (guild for report in reports for guild in report['guilds']),
+        key=lambda row: row['total_bytes'],
+        reverse=True
+    )
+    merged['clusters'] = len(reports)
+    return merged
+
+
+class ClusterClient:
+    """Côté serveur web: même interface qu'IPCClient,
+    requêtes routées vers le bon cluster
+    """
+
+    def __init__(self, config, address=IPC_ADDRESS):
+        self.config = config
+        self.clients = [
+            IPCClient(
+                cluster_address(address, cluster_id)
+                if config.cluster_count > 1
+                else address
+            )
+            for cluster_id in range(config.cluster_count)
+        ]
+        self._ranges = (
+            split_shards(config.shard_count, config.cluster_count)
+            if config.cluster_count > 1
+            else None
+        )
+
+    def client_for(self, guild_id):
+        if self._ranges is None:
+            return self.clients[0]
+        shard_id = shard_for(guild_id, self.config.shard_count)
+        for cluster_id, shard_ids in enumerate(self._ranges):
+            if shard_id in shard_ids:
+                return self.clients[cluster_id]
+        raise IPCError(f"Aucun cluster pour le shard {shard_id}")
+
+    def request(self, op, timeout=None, **params):
+        guild_id = params.get('guild_id')
+        if guild_id is None or len(self.clients) == 1:
+            return self.clients[0].request(op, timeout, **params)
+        try:
+            client = self.client_for(int(guild_id))
+        except ValueError:
+            raise IPCError("Identifiant de serveur invalide") from None
+        return client.request(op, timeout, **params)
+
+    def broadcast(self, op, timeout=None, **params):
+        """Même requête à chaque cluster: liste des résultats (None si injoignable)"""
+        results = []
+        for client in self.clients:
+            try:
+                results.append(client.request(op, timeout, **params))
+            except IPCError:
+                results.append(None)
+        return results
+
+    def available(self):
+        return any(client.available() for client in self.clients)
+
+    def close(self):
+        for client in self.clients:
+            client.close()
@@ -1,8 +1,16 @@
 import os
 from pathlib import Path
 
-def load_config():
-    """Charge la configuration depuis différentes sources"""
+# Configuration lue une seule fois par processus (voir load_config(reload=True))
+_config = None
+
+def load_config(reload=False):
+    """Charge la configuration depuis différentes sources
+    (fichiers lus au premier appel seulement)
+    """
+    global _config
+    if _config is not None and not reload:
+        return dict(_config)
     config = {}
     
     # 1. Essayer de charger depuis un fichier .env
@@ -28,7 +36,8 @@ def load_config():
             if content and not config.get('TOKEN'):
                 config['TOKEN'] = content
     
-    return config
+    _config = config
+    return dict(config)
 
 def get_discord_token():
     """Récupère le token Discord depuis différentes sources"""
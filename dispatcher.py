@@ -0,0 +1,210 @@
+"""
+Répartiteur des appels à l'API Discord
+File par serveur avec priorités: les bans/kicks passent avant les embeds et les DM
+"""
+import asyncio
+import itertools
+import os
+import time
+
+import discord
+
+# Priorités (plus petit = plus urgent)
+URGENT = 0   # ban, kick, timeout, verrouillage de canal
+NORMAL = 1   # rôles, permissions, levée de sanctions
+LOW = 2      # embeds de confirmation, messages privés
+
+PRIORITY_NAMES = {URGENT: 'urgent', NORMAL: 'normal', LOW: 'low'}
+
+# Appels simultanés par serveur et pour tout le bot
+GUILD_CONCURRENCY = int(os.getenv('DISPATCH_GUILD_CONCURRENCY', '2'))
+GLOBAL_CONCURRENCY = int(os.getenv('DISPATCH_GLOBAL_CONCURRENCY', '20'))
+# Au-delà de ce délai, discord.py lève RateLimited au lieu de dormir
+# (30s minimum imposé)
+MAX_RATELIMIT_WAIT = 30.0
+# Nouvelles tentatives après un RateLimited
+MAX_RETRIES = 3
+# Un worker sans travail s'arrête après ce délai
+IDLE_TIMEOUT = 30
+
+
+class _Job:
+    __slots__ = (
+        'priority',
+        'seq',
+        'route',
+        'factory',
+        'future',
+        'enqueued_at',
+        'attempts'
+    )
+
+    def __init__(self, priority, seq, route, factory, future):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.factory = factory
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ActionDispatcher:
+    """Files de priorité par serveur + suivi des routes limitées par Discord"""
+
+    def __init__(
+        self, guild_concurrency=GUILD_CONCURRENCY, global_concurrency=GLOBAL_CONCURRENCY
+    ):
+        self.guild_concurrency = guild_concurrency
+        self.global_concurrency = global_concurrency
+        self._queues = {}
+        self._workers = {}
+        self._route_blocked = {}
+        self._global = None
+        self._seq = itertools.count()
+
+        self.rate_limited = 0
+        self._submitted = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        self._completed = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        self._failed = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        self._total_wait = dict.fromkeys(PRIORITY_NAMES.values(), 0.0)
+        self._max_wait = dict.fromkeys(PRIORITY_NAMES.values(), 0.0)
+
+    async def submit(self, guild_id, priority, route, factory):
+        """Met en file un appel (factory renvoie la coroutine) et attend son résultat
+
+        route identifie le bucket Discord concerné, ex: ('ban', guild_id) ou
+        ('channel', channel_id)
+        """
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.global_concurrency)
+        loop = asyncio.get_running_loop()
+        job = _Job(priority, next(self._seq), route, factory, loop.create_future())
+        self._submitted[PRIORITY_NAMES[priority]] += 1
+        self._enqueue(guild_id, job)
+        return await job.future
+
+    def _enqueue(self, guild_id, job):
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = asyncio.PriorityQueue()
+        queue.put_nowait(job)
+        workers = self._workers.setdefault(guild_id, set())
+        if len(workers) < self.guild_concurrency and queue.qsize() > 0:
+            task = asyncio.create_task(self._worker(guild_id, queue))
+            workers.add(task)
+            task.add_done_callback(workers.discard)
+
+    def _requeue_later(self, guild_id, job, delay):
+        asyncio.get_running_loop().call_later(delay, self._enqueue, guild_id, job)
+
+    async def _worker(self, guild_id, queue):
+        while True:
+            try:
+                job = await asyncio.wait_for(queue.get(), timeout=IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                return
+            if job.future.done():
+                continue  # Annulé par l'appelant
+
+            # Route encore limitée: on repasse la main aux autres travaux du serveur
+            blocked_for = self._route_blocked.get(job.route, 0) - time.monotonic()
+            if blocked_for > 0:
+                self._requeue_later(guild_id, job, blocked_for)
+                continue
+
+            name = PRIORITY_NAMES[job.priority]
+            async with self._global:
+                wait = time.monotonic() - job.enqueued_at
+                try:
+                    result = await job.factory()
+                except discord.RateLimited as e:
+                    self.rate_limited += 1
+                    self._block_route(job.route, e.retry_after)
+                    job.attempts += 1
+                    if job.attempts <= MAX_RETRIES:
+                        self._requeue_later(guild_id, job, e.retry_after)
+                    else:
+                        self._failed[name] += 1
+                        self._record_wait(name, wait)
+                        if not job.future.done():
+                            job.future.set_exception(e)
+                except Exception as e:
+                    self._failed[name] += 1
+                    self._record_wait(name, wait)
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    self._completed[name] += 1
+                    self._record_wait(name, wait)
+                    if not job.future.done():
+                        job.future.set_result(result)
+
+    def _record_wait(self, name, wait):
+        # Attente depuis la mise en file, replanifications comprises
+        self._total_wait[name] += wait
+        self._max_wait[name] = max(self._max_wait[name], wait)
+
+    def _block_route(self, route, retry_after):
+        now = time.monotonic()
+        if len(self._route_blocked) > 1000:
+            # Oublie les routes dont la limite est déjà levée
+            self._route_blocked = {
+                r: until for r, until in self._route_blocked.items() if until > now
+            }
+        self._route_blocked[route] = now + retry_after
+
+    def queue_depth(self, guild_id=None):
+        """Nombre d'appels en attente (pour un serveur ou au total)"""
+        if guild_id is not None:
+            queue = self._queues.get(guild_id)
+            return queue.qsize() if queue else 0
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    def stats(self):
+        """Profondeur des files et temps d'attente par priorité"""
+        now = time.monotonic()
+        busiest = sorted(
+            (
+                (str(guild_id), queue.qsize())
+                for guild_id, queue in self._queues.items()
+                if queue.qsize()
+            ),
+            key=lambda item: item[1],
+            reverse=True
+        )[:10]
+        return {
+            'queue_depth': self.queue_depth(),
+            'busiest_guilds': dict(busiest),
+            'rate_limited': self.rate_limited,
+            'blocked_routes': sum(
+                1 for until in self._route_blocked.values() if until > now
+            ),
+            'priorities': {
+                name: {
+                    'submitted': self._submitted[name],
+                    'completed': self._completed[name],
+                    'failed': self._failed[name],
+                    'avg_wait_ms': round(
+                        self._total_wait[name]
+                        / max(1, self._completed[name] + self._failed[name])
+                        * 1000,
+                        2
+                    ),
+                    'max_wait_ms': round(self._max_wait[name] * 1000, 2)
+                }
+                for name in PRIORITY_NAMES.values()
+            }
+        }
+
+
+# Instance partagée par le bot
+dispatcher = ActionDispatcher()
+
+
+async def dispatch(guild_id, priority, route, factory):
+    """Raccourci vers dispatcher.submit"""
+    return await dispatcher.submit(guild_id, priority, route, factory)
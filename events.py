@@ -0,0 +1,282 @@
+"""
+Flux temps réel du dashboard (Server-Sent Events)
+Un seul thread surveille les nouveaux logs et le statut du bot, puis diffuse
+les événements à tous les onglets abonnés au lieu que chacun interroge l'API
+"""
+import contextlib
+import json
+import queue
+import threading
+import time
+
+import storage
+
+# Fréquence de lecture des nouveaux logs (secondes)
+POLL_INTERVAL = 0.5
+# Fréquence de lecture du statut du bot, et rafraîchissement forcé (latence)
+STATUS_INTERVAL = 5
+STATUS_REFRESH = 30
+# Commentaire envoyé périodiquement pour garder la connexion ouverte
+HEARTBEAT_INTERVAL = 15
+# Événements en attente par abonné; au-delà il est déconnecté et rejouera via
+# Last-Event-ID
+MAX_BACKLOG = 500
+# Logs lus par passage; à la reconnexion, un écart plus grand n'est pas rejoué:
+# l'onglet reçoit un événement resync et recharge ses données
+MAX_REPLAY = 200
+
+
+def format_event(event, data, event_id=None):
+    """Sérialise un événement au format text/event-stream"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data, separators=(',', ':'), default=str))
+    return '\n'.join(lines) + '\n\n'
+
+
+def stats_delta(logs):
+    """Variation des statistiques apportée par une série de nouveaux logs"""
+    actions = {}
+    daily = {}
+    for log in logs:
+        actions[log['action']] = actions.get(log['action'], 0) + 1
+        day = log['timestamp'][:10]
+        daily[day] = daily.get(day, 0) + 1
+    return {'count': len(logs), 'actions': actions, 'daily': daily}
+
+
+class Subscriber:
+    """File d'événements d'un onglet abonné"""
+
+    def __init__(self, guild_id=None, last_id=0):
+        self.guild_id = str(guild_id) if guild_id else None
+        # Dernier log examiné pour cet abonné (envoyé ou filtré par serveur)
+        self.last_id = last_id
+        self.closed = False
+        self._queue = queue.Queue(maxsize=MAX_BACKLOG)
+
+    def close(self):
+        """Termine le flux (arrêt du serveur)"""
+        self.closed = True
+        with contextlib.suppress(queue.Full):
+            self._queue.put_nowait(': bye\n\n')
+
+    def push(self, text):
+        try:
+            self._queue.put_nowait(text)
+        except queue.Full:
+            # Client trop lent: on coupe, il reprendra depuis son dernier id
+            self.closed = True
+
+    def get(self, timeout):
+        """Prochain événement, ou None après timeout (heartbeat)"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class HubFull(Exception):
+    """Trop de flux ouverts: le client retombe sur le polling"""
+
+
+class EventHub:
+    """Surveille les logs et le statut du bot, diffuse aux abonnés
+
+    max_subscribers borne le nombre de flux ouverts (chacun occupe un thread du
+    serveur web)
+    """
+
+    def __init__(
+        self,
+        status_source,
+        poll_interval=POLL_INTERVAL,
+        status_interval=STATUS_INTERVAL,
+        max_subscribers=None
+    ):
+        self.status_source = status_source
+        self.poll_interval = poll_interval
+        self.status_interval = status_interval
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._joining = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._status = None
+        self._status_signature = None
+        self._status_checked = 0.0
+        self._status_pushed = 0.0
+
+        self.events_sent = 0
+        self.dropped = 0
+
+    def start(self):
+        """Démarre le thread de surveillance (idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='event-hub', daemon=True
+                )
+                self._thread.start()
+
+    def subscribe(self, guild_id=None, last_event_id=None):
+        """Nouvel abonné; rejoue les logs manqués depuis last_event_id
+        (HubFull si complet)
+        """
+        with self._lock:
+            # Les abonnés en cours d'inscription comptent aussi (connexions simultanées)
+            if (
+                self.max_subscribers is not None
+                and len(self._subscribers) + self._joining >= self.max_subscribers
+            ):
+                raise HubFull(f"{self.max_subscribers} flux déjà ouverts")
+            self._joining += 1
+        self.start()
+        subscriber = Subscriber(guild_id)
+        try:
+            try:
+                start = int(last_event_id) if last_event_id else None
+            except ValueError:
+                start = None
+            # Les logs manqués sont rejoués par le thread de surveillance, qui repart
+            # du curseur le plus ancien des abonnés
+            if (
+                start is not None
+                and len(storage.fetch_logs_after(start, MAX_REPLAY + 1)) > MAX_REPLAY
+            ):
+                subscriber.push(format_event('resync', {}))
+                start = None
+            subscriber.last_id = storage.latest_log_id() if start is None else start
+            if self._status is not None:
+                subscriber.push(format_event('status', self._status))
+        except Exception:
+            with self._lock:
+                self._joining -= 1
+            raise
+
+        with self._lock:
+            self._joining -= 1
+            self._subscribers.add(subscriber)
+        self._wakeup.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def close(self):
+        """Ferme tous les flux pour libérer les threads du serveur"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.close()
+
+    def wake(self):
+        """Force une vérification immédiate (ex: après une commande du dashboard)"""
+        self._wakeup.set()
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _deliver_logs(self, subscriber, logs):
+        last_id = subscriber.last_id
+        if logs[-1]['id'] <= last_id:
+            return
+        # Curseur avancé même si aucun log ne concerne le serveur de l'abonné
+        subscriber.last_id = logs[-1]['id']
+        logs = [
+            log
+            for log in logs
+            if log['id'] > last_id
+            and (subscriber.guild_id is None or log['guild_id'] == subscriber.guild_id)
+        ]
+        if not logs:
+            return
+        for log in logs:
+            subscriber.push(format_event('log', log, log['id']))
+        subscriber.push(format_event('stats', stats_delta(logs)))
+
+    def _run(self):
+        while True:
+            if not self.subscriber_count():
+                # Personne n'écoute: on dort jusqu'au prochain abonné
+                self._status = None
+                self._status_signature = None
+                self._status_checked = 0.0
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            try:
+                self._poll_logs()
+                if time.monotonic() - self._status_checked >= self.status_interval:
+                    self._poll_status()
+            except Exception as e:
+                print(f"Erreur flux temps réel: {e}")
+            self._prune()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _poll_logs(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        # Chaque abonné garde son curseur: on lit à partir du plus en retard (nouvel
+        # abonné, reconnexion), les autres ignorent ce qu'ils ont déjà reçu
+        logs = storage.fetch_logs_after(
+            min(subscriber.last_id for subscriber in subscribers), MAX_REPLAY
+        )
+        if not logs:
+            return
+        for subscriber in subscribers:
+            self._deliver_logs(subscriber, logs)
+        self.events_sent += len(logs)
+        if len(logs) == MAX_REPLAY:
+            # Page pleine: la suite est lue sans attendre le prochain passage
+            self._wakeup.set()
+
+    def _poll_status(self):
+        now = time.monotonic()
+        self._status_checked = now
+        status = self.status_source()
+        # La latence varie en permanence: seule la version de l'instantané déclenche un
+        # envoi
+        signature = status.get('version')
+        if (
+            signature == self._status_signature
+            and now - self._status_pushed < STATUS_REFRESH
+        ):
+            return
+        self._status = status
+        self._status_signature = signature
+        self._status_pushed = now
+        self._broadcast(format_event('status', status))
+
+    def _broadcast(self, text):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.push(text)
+
+    def _prune(self):
+        with self._lock:
+            slow = {subscriber for subscriber in self._subscribers if subscriber.closed}
+            self._subscribers -= slow
+        self.dropped += len(slow)
+
+    def stream(self, subscriber):
+        """Générateur text/event-stream pour une réponse Flask"""
+        try:
+            # Délai de reconnexion conseillé au navigateur (ms)
+            yield 'retry: 3000\n\n'
+            while not subscriber.closed:
+                text = subscriber.get(HEARTBEAT_INTERVAL)
+                # Un commentaire régulier détecte aussi les onglets fermés
+                yield text if text is not None else ': ping\n\n'
+        finally:
+            self.unsubscribe(subscriber)
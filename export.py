@@ -0,0 +1,158 @@
+"""
+Export de l'historique de modération en CSV ou NDJSON
+Les lignes sont lues par lots et envoyées au fil de l'eau (mémoire constante),
+avec compression gzip optionnelle
+
+Utilisation hors ligne:
+    python export.py --format csv --guild 123 --from 2024-01-01 -o logs.csv.gz --gzip
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+
+import storage
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+FIELDS = (
+    'id',
+    'timestamp',
+    'action',
+    'moderator',
+    'target',
+    'duration',
+    'reason',
+    'guild_id',
+    'channel_id'
+)
+# En-têtes lisibles (mêmes libellés que l'ancien export du dashboard)
+CSV_HEADERS = (
+    'ID',
+    'Date/Heure',
+    'Action',
+    'Modérateur',
+    'Cible',
+    'Durée',
+    'Raison',
+    'Serveur ID',
+    'Canal ID'
+)
+# Niveau gzip: bon compromis débit / taille pour du texte répétitif
+GZIP_LEVEL = 6
+
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(CSV_HEADERS)
+    yield buffer.getvalue().encode()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([row[field] for field in FIELDS] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(batches):
+    for rows in batches:
+        yield ''.join(
+            json.dumps(
+                {field: row[field] for field in FIELDS},
+                ensure_ascii=False,
+                separators=(',', ':')
+            )
+            + '\n'
+            for row in rows
+        ).encode()
+
+
+def gzip_chunks(chunks, level=GZIP_LEVEL):
+    """Compresse un flux d'octets au format gzip, morceau par morceau"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_logs(fmt='csv', compress=False, **filters):
+    """Générateur d'octets du fichier exporté
+
+    filters: mêmes filtres que /api/logs (guild_id, action_type, moderator, target,
+    date_from, date_to, order). Lève ValueError immédiatement si un paramètre est
+    invalide.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format inconnu: {fmt} (csv ou ndjson)")
+    batches = storage.iter_log_batches(**filters)
+    chunks = _csv_chunks(batches) if fmt == 'csv' else _ndjson_chunks(batches)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_filename(fmt, compress=False, stamp=''):
+    name = f"moderation_logs{'_' + stamp if stamp else ''}.{fmt}"
+    return name + '.gz' if compress else name
+
+
+def _write(chunks, out):
+    """Écrit les morceaux de l'export, retourne le nombre d'octets écrits"""
+    written = 0
+    for chunk in chunks:
+        out.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Exporte les logs de modération (CSV ou NDJSON)"
+    )
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    parser.add_argument('--gzip', action='store_true', help="compresse la sortie")
+    parser.add_argument(
+        '-o', '--output', help="fichier de sortie (défaut: sortie standard)"
+    )
+    parser.add_argument('--guild', dest='guild_id')
+    parser.add_argument('--action', dest='action_type')
+    parser.add_argument('--moderator')
+    parser.add_argument('--target')
+    parser.add_argument('--from', dest='date_from', help="AAAA-MM-JJ")
+    parser.add_argument('--to', dest='date_to', help="AAAA-MM-JJ (inclus)")
+    parser.add_argument('--order', choices=('asc', 'desc'), default='asc')
+    options = parser.parse_args(argv)
+
+    filters = {
+        key: getattr(options, key)
+        for key in (
+            'guild_id',
+            'action_type',
+            'moderator',
+            'target',
+            'date_from',
+            'date_to',
+            'order'
+        )
+    }
+    try:
+        chunks = export_logs(options.format, options.gzip, **filters)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        if options.output:
+            with open(options.output, 'wb') as out:
+                written = _write(chunks, out)
+        else:
+            written = _write(chunks, sys.stdout.buffer)
+    finally:
+        storage.close_connections()
+    if options.output:
+        print(f"📦 {written} octets écrits dans {options.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Anti-flood et anti-raid: compteurs à fenêtre glissante
+  - flood: N messages d'un même membre en T secondes -> mute (voir main.py)
+  - raid: N arrivées sur un serveur en T secondes -> invitations suspendues, arrivants
+    mutés selon le réglage du serveur
+Chaque compteur est un tampon circulaire des N derniers instants: l'événement le plus
+ancien du tampon dit à lui seul si le seuil est atteint (O(1), 8 octets par case).
+Seuls les membres actifs pendant leur fenêtre sont suivis: les compteurs inactifs
+sont libérés au fil des messages, avec un plafond global (MAX_TRACKED_USERS), si bien
+que la mémoire dépend de l'activité et non du nombre de membres des serveurs.
+"""
+import os
+import time
+from array import array
+from collections import OrderedDict
+
+from guild_settings import settings_store
+
+# Compteurs de membres gardés au maximum (les moins récemment actifs sont libérés)
+MAX_TRACKED_USERS = int(os.getenv('FLOOD_MAX_TRACKED', '50000'))
+# Compteurs libérés par message reçu, au plus (coût borné même après un pic)
+EVICT_BATCH = 32
+
+
+class RateWindow:
+    """Tampon circulaire des `capacity` derniers événements (instants monotones)"""
+    __slots__ = ('times', 'ids', 'index', 'window', 'last')
+
+    def __init__(self, capacity, window, with_ids=False):
+        self.times = array('d', [float('-inf')]) * capacity
+        # Identifiants associés (arrivées d'un raid), sinon None
+        self.ids = array('Q', [0]) * capacity if with_ids else None
+        self.index = 0
+        self.window = window
+        self.last = float('-inf')
+
+    @property
+    def capacity(self):
+        return len(self.times)
+
+    def hit(self, now, item_id=0):
+        """Enregistre un événement; True si `capacity` événements tiennent dans la
+        fenêtre
+        """
+        index = self.index
+        self.times[index] = now
+        if self.ids is not None:
+            self.ids[index] = item_id
+        self.index = index = (index + 1) % len(self.times)
+        self.last = now
+        # La case suivante contient le plus ancien des événements gardés
+        return now - self.times[index] <= self.window
+
+    def recent(self, now):
+        """Identifiants des événements encore dans la fenêtre"""
+        return [
+            item_id
+            for ts, item_id in zip(self.times, self.ids, strict=True)
+            if now - ts <= self.window
+        ]
+
+    def reset(self):
+        for index in range(len(self.times)):
+            self.times[index] = float('-inf')
+
+    def idle(self, now):
+        return now - self.last > self.window
+
+    def memory(self):
+        size = self.times.buffer_info()[1] * self.times.itemsize
+        if self.ids is not None:
+            size += self.ids.buffer_info()[1] * self.ids.itemsize
+        return size
+
+
+class FloodGuard:
+    """Compteurs par membre (messages) et par serveur (arrivées),
+    réglés par guild_settings
+    """
+
+    def __init__(self, settings=settings_store, max_tracked=MAX_TRACKED_USERS):
+        self.settings = settings
+        self.max_tracked = max_tracked
+        # (serveur, membre) -> RateWindow, du moins au plus récemment actif
+        self._users = OrderedDict()
+        self._joins = {}
+        # Serveur -> fin du confinement (instant monotone)
+        self._lockdowns = {}
+        self.floods = 0
+        self.raids = 0
+        self.evicted = 0
+
+    def _window(self, counters, key, capacity, seconds, with_ids=False):
+        counter = counters.get(key)
+        # Seuils modifiés depuis la création du compteur: on repart de zéro
+        if counter is None or counter.capacity != capacity or counter.window != seconds:
+            counter = counters[key] = RateWindow(capacity, seconds, with_ids)
+        return counter
+
+    def message(self, guild_id, user_id, now=None):
+        """Message d'un membre; True s'il vient de dépasser le seuil de flood du serveur
+        """
+        now = time.monotonic() if now is None else now
+        settings = self.settings
+        key = (guild_id, user_id)
+        counter = self._window(
+            self._users,
+            key,
+            settings.get(guild_id, 'flood_messages'),
+            settings.get(guild_id, 'flood_seconds')
+        )
+        self._users.move_to_end(key)
+        flooding = counter.hit(now)
+        if flooding:
+            # Une seule sanction par rafale
+            counter.reset()
+            self.floods += 1
+        self._evict(now)
+        return flooding
+
+    def _evict(self, now):
+        """Libère les compteurs inactifs en tête
+        (ordre d'activité) et ceux au-delà du plafond
+        """
+        users = self._users
+        for _ in range(EVICT_BATCH):
+            if not users:
+                break
+            key, counter = next(iter(users.items()))
+            if len(users) <= self.max_tracked and not counter.idle(now):
+                break
+            del users[key]
+            self.evicted += 1
+
+    def join(self, guild_id, member_id, now=None):
+        """Arrivée d'un membre; IDs des arrivants de la fenêtre si un raid vient d'être
+        détecté, sinon None
+        """
+        now = time.monotonic() if now is None else now
+        settings = self.settings
+        counter = self._window(
+            self._joins,
+            guild_id,
+            settings.get(guild_id, 'raid_joins'),
+            settings.get(guild_id, 'raid_seconds'),
+            True
+        )
+        if not counter.hit(now, member_id) or self.in_lockdown(guild_id, now):
+            return None
+        self.raids += 1
+        return counter.recent(now)
+
+    def start_lockdown(self, guild_id, seconds, now=None):
+        now = time.monotonic() if now is None else now
+        self._lockdowns[guild_id] = now + seconds
+
+    def end_lockdown(self, guild_id):
+        self._joins.pop(guild_id, None)
+        return self._lockdowns.pop(guild_id, None) is not None
+
+    def in_lockdown(self, guild_id, now=None):
+        end = self._lockdowns.get(guild_id)
+        if end is None:
+            return False
+        if (time.monotonic() if now is None else now) >= end:
+            del self._lockdowns[guild_id]
+            return False
+        return True
+
+    def forget(self, guild_id):
+        self._joins.pop(guild_id, None)
+        self._lockdowns.pop(guild_id, None)
+        for key in [key for key in self._users if key[0] == guild_id]:
+            del self._users[key]
+
+    def stats(self):
+        counters = list(self._users.values()) + list(self._joins.values())
+        return {
+            'tracked_users': len(self._users),
+            'tracked_guilds': len(self._joins),
+            'lockdowns': len(self._lockdowns),
+            'floods': self.floods,
+            'raids': self.raids,
+            'evicted': self.evicted,
+            'bytes': sum(counter.memory() for counter in counters)
+        }
@@ -0,0 +1,398 @@
+"""
+Paramètres par serveur (préfixe, raison par défaut, mode et rôle de mute, rétention...)
+Stockés dans la table guild_settings et gardés en mémoire: chaque serveur est lu
+une seule fois, les commandes ne touchent plus le disque pour retrouver un réglage.
+Les paramètres globaux du bot (présence) utilisent le serveur GLOBAL (0).
+
+Le bot et le serveur web ont chacun leur cache: après une modification faite par le
+dashboard, le bot est prévenu par IPC ('settings_changed') et relit le serveur concerné.
+"""
+import asyncio
+import os
+import re
+import threading
+
+import storage
+
+# Pseudo-serveur des paramètres globaux
+GLOBAL = 0
+
+DEFAULT_PREFIX = os.getenv('BOT_PREFIX', '+')
+DEFAULT_REASON = "Aucune raison spécifiée"
+# Mode de mute par serveur:
+#   'timeout' -> timeout natif Discord (un seul appel API, expiration gérée par Discord)
+#   'role'    -> rôle "Muted" + permissions sur chaque canal (ancien fonctionnement)
+MUTE_MODES = ('timeout', 'role')
+DEFAULT_MUTE_MODE = os.getenv('MUTE_MODE', 'timeout')
+# Durée de conservation par défaut en base (jours, 0 = illimitée)
+DEFAULT_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', '0'))
+PRESENCE_STATUSES = ('online', 'idle', 'dnd', 'invisible')
+# Sanction de l'automod après suppression du message
+AUTOMOD_ACTIONS = ('delete', 'warn', 'mute')
+# Termes interdits par serveur
+MAX_AUTOMOD_TERMS = 10000
+# Réaction à un raid: log seul, invitations suspendues,
+# ou invitations suspendues + arrivants mutés
+RAID_ACTIONS = ('log', 'lockdown', 'mute')
+
+
+class Setting:
+    """Un paramètre: valeur par défaut, lecture du texte stocké et validation d'une
+    nouvelle valeur
+    """
+
+    def __init__(self, default, scope='guild'):
+        self.default = default
+        self.scope = scope
+
+    def load(self, text):
+        return text
+
+    def dump(self, value):
+        """Valeur reçue (commande ou JSON) -> texte stocké;
+        lève ValueError si invalide
+        """
+        return str(value)
+
+    def to_json(self, value):
+        return value
+
+
+class Text(Setting):
+    def __init__(self, default, min_length=0, max_length=100, scope='guild'):
+        super().__init__(default, scope)
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def dump(self, value):
+        value = str(value).strip()
+        if not self.min_length <= len(value) <= self.max_length:
+            raise ValueError(
+                f"{self.min_length} à {self.max_length} caractères attendus"
+            )
+        return value
+
+
+class Prefix(Text):
+    def dump(self, value):
+        value = super().dump(value)
+        if any(char.isspace() for char in value):
+            raise ValueError("le préfixe ne peut pas contenir d'espace")
+        return value
+
+
+class Choice(Setting):
+    def __init__(self, default, choices, scope='guild'):
+        super().__init__(default if default in choices else choices[0], scope)
+        self.choices = choices
+
+    def load(self, text):
+        return text if text in self.choices else self.default
+
+    def dump(self, value):
+        value = str(value).lower()
+        if value not in self.choices:
+            raise ValueError(f"valeur attendue: {' ou '.join(self.choices)}")
+        return value
+
+
+class Integer(Setting):
+    def __init__(self, default, minimum=0, maximum=None, scope='guild'):
+        super().__init__(default, scope)
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def load(self, text):
+        try:
+            return int(text)
+        except (TypeError, ValueError):
+            return self.default
+
+    def dump(self, value):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError("nombre entier attendu") from None
+        if value < self.minimum or (self.maximum is not None and value > self.maximum):
+            raise ValueError(
+                f"valeur entre {self.minimum} et "
+                f"{self.maximum if self.maximum is not None else '∞'} attendue"
+            )
+        return str(value)
+
+
+class Boolean(Setting):
+    TRUE = ('1', 'true', 'on', 'oui', 'yes')
+    FALSE = ('0', 'false', 'off', 'non', 'no', '')
+
+    def load(self, text):
+        return text == '1'
+
+    def dump(self, value):
+        text = str(value).lower()
+        if text not in self.TRUE + self.FALSE:
+            raise ValueError("on ou off attendu")
+        return '1' if text in self.TRUE else '0'
+
+
+class Duration(Setting):
+    """Durée au format des commandes (30s, 5m, 2h, 1d), un an au plus"""
+    SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    MAX_SECONDS = 365 * 86400
+
+    def load(self, text):
+        # Valeur enregistrée avant la borne: défaut
+        try:
+            return self.dump(text)
+        except ValueError:
+            return self.default
+
+    def dump(self, value):
+        value = str(value).strip().lower()
+        # Six chiffres au plus: jamais de nombre démesuré à convertir en timedelta
+        match = re.fullmatch(r'([1-9]\d{0,5})([smhd])', value)
+        if not match:
+            raise ValueError("durée attendue (ex: 30s, 5m, 2h, 1d)")
+        if int(match.group(1)) * self.SECONDS[match.group(2)] > self.MAX_SECONDS:
+            raise ValueError("365 jours au maximum")
+        return value
+
+
+class TermList(Setting):
+    """Liste de termes (un par ligne), en minuscules et sans doublon"""
+
+    def __init__(self, max_terms, max_length=100, scope='guild'):
+        super().__init__((), scope)
+        self.max_terms = max_terms
+        self.max_length = max_length
+
+    def load(self, text):
+        return tuple(line for line in (text or '').split('\n') if line)
+
+    def dump(self, values):
+        if isinstance(values, str):
+            values = values.splitlines()
+        terms = sorted(
+            {' '.join(str(value).split()).casefold() for value in values or ()} - {''}
+        )
+        if len(terms) > self.max_terms:
+            raise ValueError(f"{self.max_terms} termes au maximum")
+        if any(len(term) > self.max_length for term in terms):
+            raise ValueError(f"{self.max_length} caractères au maximum par terme")
+        return '\n'.join(terms)
+
+    def to_json(self, value):
+        return list(value)
+
+
+class Snowflake(Setting):
+    """ID Discord optionnel (envoyé en texte au dashboard:
+    trop grand pour un nombre JavaScript)
+    """
+
+    def __init__(self, scope='guild'):
+        super().__init__(None, scope)
+
+    def load(self, text):
+        return storage.to_snowflake(text) if text else None
+
+    def dump(self, value):
+        if value in (None, ''):
+            return ''
+        role_id = storage.to_snowflake(getattr(value, 'id', value))
+        if role_id is None:
+            raise ValueError("ID Discord attendu")
+        return str(role_id)
+
+    def to_json(self, value):
+        return str(value) if value else None
+
+
+class SnowflakeList(Setting):
+    def __init__(self, scope='guild'):
+        super().__init__(frozenset(), scope)
+
+    def load(self, text):
+        return frozenset(
+            int(part) for part in (text or '').split(',') if part.strip().isdigit()
+        )
+
+    def dump(self, values):
+        if isinstance(values, str):
+            values = values.split(',')
+        ids = {
+            storage.to_snowflake(getattr(value, 'id', value))
+            for value in values or ()
+            if value not in (None, '')
+        }
+        if None in ids:
+            raise ValueError("liste d'IDs Discord attendue")
+        return ','.join(str(value) for value in sorted(ids))
+
+    def to_json(self, value):
+        return [str(item) for item in sorted(value)]
+
+
+SETTINGS = {
+    'prefix': Prefix(DEFAULT_PREFIX, 1, 3),
+    'default_reason': Text(DEFAULT_REASON, 1, 512),
+    'mute_mode': Choice(DEFAULT_MUTE_MODE, MUTE_MODES),
+    'mute_role_id': Snowflake(),
+    'moderator_role_ids': SnowflakeList(),
+    'log_retention_days': Integer(DEFAULT_RETENTION_DAYS, 0, 36500),
+    'automod_enabled': Boolean(False),
+    'automod_terms': TermList(MAX_AUTOMOD_TERMS),
+    'automod_block_invites': Boolean(True),
+    'automod_block_links': Boolean(False),
+    'automod_max_mentions': Integer(5, 0, 100),
+    'automod_action': Choice('delete', AUTOMOD_ACTIONS),
+    'automod_mute_duration': Duration('10m'),
+    'flood_enabled': Boolean(False),
+    'flood_messages': Integer(6, 2, 50),
+    'flood_seconds': Integer(5, 1, 60),
+    'flood_mute_duration': Duration('10m'),
+    'raid_enabled': Boolean(False),
+    'raid_joins': Integer(10, 2, 200),
+    'raid_seconds': Integer(10, 1, 300),
+    'raid_action': Choice('lockdown', RAID_ACTIONS),
+    'raid_lockdown_duration': Duration('1h'),
+    'presence_status': Choice('online', PRESENCE_STATUSES, scope='global'),
+    'presence_activity': Text('', 0, 128, scope='global'),
+}
+
+
+def _scope(guild_id):
+    return 'global' if guild_id == GLOBAL else 'guild'
+
+
+def keys_for(guild_id):
+    scope = _scope(guild_id)
+    return [key for key, setting in SETTINGS.items() if setting.scope == scope]
+
+
+class SettingsStore:
+    """Cache en lecture des paramètres: un dict par serveur, chargé au premier accès"""
+
+    def __init__(self):
+        self._guilds = {}
+        self._lock = threading.Lock()
+        # Créé à la première écriture, dans l'event loop du bot
+        self._write_lock = None
+
+    def _values(self, guild_id):
+        guild_id = int(guild_id)
+        values = self._guilds.get(guild_id)
+        if values is None:
+            stored = storage.get_guild_settings(guild_id)
+            values = {
+                key: SETTINGS[key].load(stored[key])
+                if key in stored
+                else SETTINGS[key].default
+                for key in keys_for(guild_id)
+            }
+            with self._lock:
+                # Une écriture concurrente a pu remplir le cache entre-temps:
+                # elle est plus récente
+                values = self._guilds.setdefault(guild_id, values)
+        return values
+
+    def get(self, guild_id, key):
+        """Valeur d'un paramètre (défaut si jamais réglé)"""
+        if guild_id is None:
+            return SETTINGS[key].default
+        return self._values(guild_id)[key]
+
+    def get_all(self, guild_id, fresh=False):
+        """Tous les paramètres du serveur (ou globaux), au format JSON"""
+        if fresh:
+            self.invalidate(guild_id)
+        values = self._values(guild_id)
+        return {key: SETTINGS[key].to_json(value) for key, value in values.items()}
+
+    @staticmethod
+    def defaults(guild_id):
+        return {
+            key: SETTINGS[key].to_json(SETTINGS[key].default)
+            for key in keys_for(guild_id)
+        }
+
+    @staticmethod
+    def validate(guild_id, values):
+        """Textes à stocker pour ces nouvelles valeurs (None = défaut);
+        ValueError au premier invalide
+        """
+        allowed = keys_for(guild_id)
+        dumped = {}
+        for key, value in values.items():
+            if key not in allowed:
+                raise ValueError(f"Paramètre inconnu: {key}")
+            try:
+                dumped[key] = None if value is None else SETTINGS[key].dump(value)
+            except ValueError as e:
+                raise ValueError(f"{key}: {e}") from e
+        return dumped
+
+    def _prepare(self, guild_id, values):
+        """Textes à écrire, valeurs chargées et clés modifiées
+        (rien n'est encore enregistré)
+        """
+        dumped = self.validate(guild_id, values)
+        current = self._values(guild_id) if dumped else {}
+        loaded = {
+            key: SETTINGS[key].default if text is None else SETTINGS[key].load(text)
+            for key, text in dumped.items()
+        }
+        changed = [key for key, value in loaded.items() if current.get(key) != value]
+        return dumped, loaded, changed
+
+    def _store(self, guild_id, loaded):
+        """Cache mis à jour une fois l'écriture en base réussie"""
+        with self._lock:
+            current = self._guilds.get(guild_id)
+            # Serveur oublié pendant l'écriture: relu en base au prochain accès
+            if current is not None:
+                # Copie: les lecteurs en cours gardent un état cohérent
+                self._guilds[guild_id] = dict(current, **loaded)
+
+    def update(self, guild_id, values):
+        """Valide puis enregistre plusieurs paramètres d'un coup
+
+        Retourne les clés modifiées. Écriture synchrone: réservée au serveur web, le
+        bot utilise update_async.
+        """
+        guild_id = int(guild_id)
+        dumped, loaded, changed = self._prepare(guild_id, values)
+        if dumped:
+            storage.set_guild_settings(guild_id, dumped)
+            self._store(guild_id, loaded)
+        return changed
+
+    async def update_async(self, guild_id, values):
+        """Comme update, avec l'écriture SQLite dans un thread de l'executor"""
+        guild_id = int(guild_id)
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        # Écritures dans l'ordre des appels (l'executor ne le garantit pas)
+        async with self._write_lock:
+            dumped, loaded, changed = self._prepare(guild_id, values)
+            if dumped:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(
+                    None, storage.set_guild_settings, guild_id, dumped
+                )
+                self._store(guild_id, loaded)
+        return changed
+
+    async def set_async(self, guild_id, key, value):
+        return await self.update_async(guild_id, {key: value})
+
+    def invalidate(self, guild_id=None):
+        """Oublie un serveur (ou tout): relu au prochain accès"""
+        with self._lock:
+            if guild_id is None:
+                self._guilds.clear()
+            else:
+                self._guilds.pop(int(guild_id), None)
+
+
+settings_store = SettingsStore()
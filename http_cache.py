@@ -0,0 +1,103 @@
+"""
+Politique de cache HTTP du dashboard
+- Fichiers statiques: URL versionnées par le hash du contenu (?v=...), mises en cache
+  un an
+- API: ETag / Last-Modified dérivés de l'état des données, 304 si rien n'a changé
+"""
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from flask import Response, request
+
+# Fichiers statiques versionnés: le contenu d'une URL donnée ne change jamais
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+# Réponses d'API: le navigateur garde une copie mais revalide à chaque fois
+REVALIDATE_CACHE = 'no-cache'
+# Pages HTML et flux: jamais en cache (iframe Replit)
+NO_STORE_CACHE = 'no-cache, no-store, must-revalidate'
+
+_asset_hashes = {}
+
+
+def asset_hash(static_folder, filename):
+    """Hash court du contenu d'un fichier statique,
+    recalculé seulement si le fichier change
+    """
+    path = os.path.join(static_folder, filename)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _asset_hashes.get(path)
+    if cached is None or cached[0] != key:
+        with open(path, 'rb') as f:
+            cached = _asset_hashes[path] = (
+                key,
+                hashlib.sha256(f.read()).hexdigest()[:12]
+            )
+    return cached[1]
+
+
+def init_app(app):
+    """Branche le versionnage des fichiers statiques et les en-têtes de cache sur
+    l'application
+    """
+
+    @app.url_defaults
+    def versioned_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            version = asset_hash(app.static_folder, values['filename'])
+            if version:
+                values['v'] = version
+
+    @app.after_request
+    def cache_headers(response):
+        if request.endpoint == 'static':
+            version = request.args.get('v')
+            if version and version == asset_hash(
+                app.static_folder, request.view_args['filename']
+            ):
+                response.headers['Cache-Control'] = IMMUTABLE_CACHE
+                response.headers.pop('Expires', None)
+            else:
+                # URL non versionnée (ou ancienne version): revalidation par ETag
+                response.headers['Cache-Control'] = REVALIDATE_CACHE
+        elif 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = NO_STORE_CACHE
+            response.headers['Pragma'] = 'no-cache'
+            response.headers['Expires'] = '0'
+        return response
+
+
+def make_etag(*parts):
+    """ETag à partir de l'état des données et des paramètres de la requête"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+
+def epoch_ms_to_datetime(ts):
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc) if ts else None
+
+
+def conditional(etag, build, last_modified=None):
+    """304 si le client possède déjà cette version, sinon la réponse de build()
+
+    build() n'est appelé que si la copie du client est périmée.
+    """
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    else:
+        since = request.if_modified_since
+        fresh = bool(
+            last_modified and since and last_modified.replace(microsecond=0) <= since
+        )
+
+    response = Response(status=304) if fresh else build()
+    if response.status_code not in (200, 304):
+        return response  # Erreurs: pas de validateur
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = REVALIDATE_CACHE
+    return response
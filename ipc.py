@@ -0,0 +1,306 @@
+"""
+Pont IPC entre le processus du bot et le serveur web
+Le bot écoute sur un socket Unix local (TCP 127.0.0.1 si indisponible),
+le dashboard l'interroge au lieu de charger un second client Discord
+Protocole: une ligne JSON par requête {"op": ..., "params": {...}, "timeout": s},
+une ligne par réponse
+"""
+import asyncio
+import json
+import os
+import queue
+import select
+import socket
+
+# Chemin du socket Unix, ou "hôte:port" pour du TCP local
+DEFAULT_ADDRESS = 'bot_ipc.sock' if hasattr(socket, 'AF_UNIX') else '127.0.0.1:5099'
+IPC_ADDRESS = os.getenv('BOT_IPC_ADDRESS', DEFAULT_ADDRESS)
+# Délai de réponse par défaut côté dashboard (secondes)
+IPC_TIMEOUT = float(os.getenv('BOT_IPC_TIMEOUT', '5'))
+# Connexions gardées ouvertes par le serveur web
+IPC_POOL_SIZE = int(os.getenv('BOT_IPC_POOL', '4'))
+# Taille maximale d'un message (listes de membres...)
+MAX_MESSAGE = 8 * 1024 * 1024
+# Marge laissée au bot pour répondre "délai dépassé" avant que le client n'abandonne
+TIMEOUT_MARGIN = 2
+
+
+class IPCError(Exception):
+    """Bot injoignable ou requête refusée par le bot"""
+
+
+def parse_address(address):
+    """'host:port' -> ('tcp', (host, port)), sinon ('unix', chemin)"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        return 'tcp', (host or '127.0.0.1', int(port))
+    return 'unix', address
+
+
+def _encode(message):
+    return json.dumps(message, separators=(',', ':'), default=str).encode() + b'\n'
+
+
+class IPCServer:
+    """Côté bot: exécute les requêtes du dashboard sur l'event loop du bot"""
+
+    def __init__(self, address=IPC_ADDRESS):
+        self.kind, self.address = parse_address(address)
+        self.handlers = {'ping': self._ping}
+        self._server = None
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def handler(self, op):
+        """Décorateur: enregistre la coroutine appelée pour une opération"""
+        def decorator(func):
+            self.handlers[op] = func
+            return func
+        return decorator
+
+    async def _ping(self):
+        return 'pong'
+
+    def _address_in_use(self):
+        """Un autre bot écoute-t-il déjà sur ce socket ?"""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(self.address)
+            return True
+        except OSError:
+            return False
+
+    async def start(self):
+        """Ouvre le socket (idempotent)"""
+        if self._server is not None:
+            return
+        if self.kind == 'unix':
+            if os.path.exists(self.address):
+                if self._address_in_use():
+                    print(
+                        f"⚠️  IPC: {self.address} déjà utilisé par un autre processus, "
+                        "pont désactivé"
+                    )
+                    return
+                os.unlink(self.address)  # Socket orphelin d'un arrêt brutal
+            self._server = await asyncio.start_unix_server(
+                self._handle, path=self.address, limit=MAX_MESSAGE
+            )
+            os.chmod(self.address, 0o600)
+        else:
+            host, port = self.address
+            self._server = await asyncio.start_server(
+                self._handle, host=host, port=port, limit=MAX_MESSAGE
+            )
+        print(f"🔌 Pont IPC à l'écoute sur {self.address}")
+
+    async def close(self):
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        if self.kind == 'unix' and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    async def _handle(self, reader, writer):
+        pending = b''
+        try:
+            while True:
+                try:
+                    line = (
+                        pending + await reader.readline()
+                        if not pending.endswith(b'\n')
+                        else pending
+                    )
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                response, pending = await self._run_until_disconnect(reader, line)
+                if response is None:
+                    break  # Client parti: requête annulée
+                writer.write(_encode(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _run_until_disconnect(self, reader, line):
+        """Exécute la requête; l'annule si le client ferme la connexion entre-temps
+
+        Retourne (réponse ou None si annulée, octets déjà lus de la requête suivante)
+        """
+        task = asyncio.create_task(self._dispatch(line))
+        watcher = asyncio.create_task(reader.read(1))
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if not watcher.done():
+            watcher.cancel()
+        try:
+            received = await watcher
+        except asyncio.CancelledError:
+            received = b''
+        except ConnectionError:
+            received = None
+        if watcher.cancelled() or received:
+            # Connexion toujours ouverte: on attend la fin de la requête
+            return await task, received or b''
+        task.cancel()
+        self.cancelled += 1
+        return None, b''
+
+    async def _dispatch(self, line):
+        self.requests += 1
+        timeout = None
+        try:
+            message = json.loads(line)
+            handler = self.handlers.get(message.get('op'))
+            if handler is None:
+                raise IPCError(f"Opération inconnue: {message.get('op')}")
+            timeout = message.get('timeout')
+            result = await asyncio.wait_for(
+                handler(**(message.get('params') or {})), timeout
+            )
+            return {'ok': True, 'result': result}
+        except asyncio.TimeoutError:
+            self.errors += 1
+            self.cancelled += 1
+            return {'ok': False, 'error': f"Délai dépassé ({timeout}s), action annulée"}
+        except Exception as e:
+            self.errors += 1
+            return {'ok': False, 'error': str(e) or e.__class__.__name__}
+
+
+class IPCClient:
+    """Côté serveur web: requêtes synchrones,
+    connexions réutilisées entre les requêtes HTTP
+    """
+
+    def __init__(
+        self, address=IPC_ADDRESS, timeout=IPC_TIMEOUT, pool_size=IPC_POOL_SIZE
+    ):
+        self.kind, self.address = parse_address(address)
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        if self.kind == 'unix':
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+        except OSError:
+            sock.close()
+            raise
+        return sock, sock.makefile('rb')
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    @staticmethod
+    def _discard(conn):
+        sock, stream = conn
+        stream.close()
+        sock.close()
+
+    @staticmethod
+    def _stale(conn):
+        """True si le bot a fermé une connexion du pool (fin de flux déjà lisible)"""
+        sock, stream = conn
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            return bool(readable) and not stream.peek(1)
+        except (OSError, ValueError):
+            return True
+
+    def _send(self, conn, payload, timeout):
+        sock, _ = conn
+        sock.settimeout(timeout + TIMEOUT_MARGIN)
+        sock.sendall(payload)
+
+    @staticmethod
+    def _receive(conn):
+        _, stream = conn
+        line = stream.readline(MAX_MESSAGE)
+        if not line:
+            raise ConnectionResetError("Connexion IPC fermée par le bot")
+        return json.loads(line)
+
+    def _open(self):
+        """Connexion du pool encore ouverte, sinon nouvelle connexion"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if not self._stale(conn):
+                return conn
+            self._discard(conn)
+
+    def request(self, op, timeout=None, **params):
+        """Envoie une requête au bot et retourne son résultat
+
+        Lève IPCError si le bot est injoignable. Le bot annule la requête si elle
+        dépasse timeout secondes. Une requête déjà envoyée n'est jamais renvoyée:
+        command.execute ou command.mass seraient appliquées deux fois si le bot les
+        avait reçues
+        """
+        timeout = timeout or self.timeout
+        payload = _encode({'op': op, 'params': params, 'timeout': timeout})
+        conn = None
+        for attempt in range(2):
+            try:
+                conn = self._open()
+                self._send(conn, payload, timeout)
+                break
+            except OSError as e:
+                # Échec d'envoi sur une connexion ouverte (bot redémarré): une seule
+                # nouvelle tentative, le bot n'a pas reçu de ligne complète
+                if conn is None or attempt:
+                    if conn is not None:
+                        self._discard(conn)
+                    raise IPCError(f"Bot injoignable: {e}") from e
+                self._discard(conn)
+                conn = None
+
+        try:
+            response = self._receive(conn)
+        except socket.timeout as e:
+            # Réponse tardive possible: la connexion est désynchronisée
+            self._discard(conn)
+            raise IPCError(
+                f"Pas de réponse du bot après {timeout + TIMEOUT_MARGIN}s"
+            ) from e
+        except OSError as e:
+            self._discard(conn)
+            raise IPCError(f"Connexion au bot perdue, résultat inconnu: {e}") from e
+        except ValueError as e:
+            # Réponse illisible: la connexion n'est plus fiable
+            self._discard(conn)
+            raise IPCError(f"Réponse du bot invalide: {e}") from e
+
+        self._release(conn)
+        if not response.get('ok'):
+            raise IPCError(response.get('error') or "Erreur inconnue")
+        return response.get('result')
+
+    def available(self):
+        """True si le bot répond"""
+        try:
+            return self.request('ping', timeout=1) == 'pong'
+        except IPCError:
+            return False
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._pool.get_nowait())
+            except queue.Empty:
+                break
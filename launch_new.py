@@ -3,6 +3,7 @@
 Script de lancement moderne - Version unifiée
 Compatible Replit et environnements locaux
 """
+import argparse
 import subprocess
 import threading
 import time
@@ -20,13 +21,15 @@ def install_requirements():
     requirements = [
         "discord.py>=2.3.2",
         "flask>=3.0.0", 
-        "flask-cors>=4.0.0"
+        "flask-cors>=4.0.0",
+        "waitress>=3.0.0"
     ]
     
     try:
         import discord
         import flask
         import flask_cors
+        import waitress
         print("✅ Toutes les dépendances sont déjà installées")
     except ImportError as e:
         print(f"⚠️  Dépendances manquantes détectées: {e}")
@@ -37,7 +40,7 @@ def install_requirements():
                 subprocess.check_call([sys.executable, "-m", "pip", "install", req])
             except subprocess.CalledProcessError:
                 print(f"❌ Erreur lors de l'installation de {req}")
-                print("💡 Essayez: pip install discord.py flask flask-cors")
+                print("💡 Essayez: pip install discord.py flask flask-cors waitress")
                 return False
         print("✅ Dépendances installées avec succès")
     
@@ -63,22 +66,86 @@ def check_token():
     print("✅ Token Discord configuré")
     return True
 
-def run_discord_bot():
-    """Lance le bot Discord"""
+def run_discord_bot(clusters=1):
+    """Lance le bot Discord (un processus par cluster,
+    chacun avec sa plage de shards)
+    """
+    if clusters <= 1:
+        try:
+            print("🤖 Démarrage du bot Discord...")
+            subprocess.run([sys.executable, 'main.py'], check=True)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Erreur bot Discord: {e}")
+            print(
+                "💡 Vérifiez que le token est valide et que les intentions sont "
+                "activées"
+            )
+        except KeyboardInterrupt:
+            print("🛑 Bot Discord arrêté")
+        return
+
+    processes = []
     try:
-        print("🤖 Démarrage du bot Discord...")
-        subprocess.run([sys.executable, 'main.py'], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Erreur bot Discord: {e}")
-        print("💡 Vérifiez que le token est valide et que les intentions sont activées")
+        for cluster_id in range(clusters):
+            print(f"🤖 Démarrage du cluster {cluster_id + 1}/{clusters}...")
+            env = dict(os.environ, CLUSTER_ID=str(cluster_id))
+            processes.append(subprocess.Popen([sys.executable, 'main.py'], env=env))
+        for cluster_id, process in enumerate(processes):
+            if process.wait() != 0:
+                print(f"❌ Cluster {cluster_id} arrêté (code {process.returncode})")
     except KeyboardInterrupt:
         print("🛑 Bot Discord arrêté")
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
 
-def run_web_server():
-    """Lance le serveur web moderne"""
+def configure_shards(shards, clusters, token):
+    """Variables SHARD_COUNT / CLUSTER_COUNT lues par main.py et le serveur web;
+    False si impossible
+    """
+    if shards is None and clusters > 1:
+        shards = 'auto'
+    if shards == 'auto' and clusters > 1:
+        # Chaque cluster doit connaître le total pour calculer sa plage
+        if not token:
+            print(
+                "❌ --clusters sans --shards demande le token pour interroger Discord"
+            )
+            return False
+        try:
+            from cluster import recommended_shards
+            shards = str(max(recommended_shards(token), clusters))
+            print(f"🧩 Discord recommande {shards} shards")
+        except Exception as e:
+            print(f"❌ Impossible de récupérer le nombre de shards recommandé: {e}")
+            return False
+    if shards is not None:
+        if shards != 'auto' and int(shards) < clusters:
+            print("❌ Il faut au moins un shard par cluster")
+            return False
+        os.environ['SHARD_COUNT'] = shards
+    os.environ['CLUSTER_COUNT'] = str(clusters)
+    return True
+
+def run_web_server(production=True):
+    """Lance le serveur web moderne (waitress en production,
+    Werkzeug en développement)
+    """
     try:
-        print("🌐 Démarrage du serveur web moderne...")
-        subprocess.run([sys.executable, 'web_server_new.py'], check=True)
+        print(
+            "🌐 Démarrage du serveur web moderne "
+            f"({'production' if production else 'développement'})..."
+        )
+        command = [sys.executable, 'web_server_new.py']
+        if production:
+            command.append('--production')
+        subprocess.run(command, check=True)
     except subprocess.CalledProcessError as e:
         print(f"❌ Erreur serveur web: {e}")
     except KeyboardInterrupt:
@@ -98,8 +165,43 @@ def open_browser():
     except Exception as e:
         print(f"⚠️  Impossible d'ouvrir le navigateur: {e}")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Lance le bot Discord et le dashboard")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        '--production',
+        dest='production',
+        action='store_true',
+        help="serveur web waitress multi-threads, sans débogueur (par défaut)"
+    )
+    mode.add_argument(
+        '--dev',
+        dest='production',
+        action='store_false',
+        help="serveur de développement Flask (rechargement auto + débogueur)"
+    )
+    parser.set_defaults(production=os.getenv('WEB_MODE', 'production') != 'dev')
+    parser.add_argument(
+        '--shards',
+        default=os.getenv('SHARD_COUNT'),
+        help="nombre de shards gateway, ou 'auto' (recommandation Discord)"
+    )
+    parser.add_argument(
+        '--clusters',
+        type=int,
+        default=int(os.getenv('CLUSTER_COUNT', '1')),
+        help="processus de bot se partageant les shards"
+    )
+    options = parser.parse_args()
+    if options.shards not in (None, 'auto') and not options.shards.isdigit():
+        parser.error("--shards attend un nombre ou 'auto'")
+    if options.clusters < 1:
+        parser.error("--clusters attend un nombre positif")
+    return options
+
 def main():
     """Fonction principale"""
+    options = parse_args()
     print("🚀 LANCEMENT DU BOT DISCORD + DASHBOARD MODERNE")
     print("=" * 55)
     print(f"🖥️  Système: {platform.system()} {platform.release()}")
@@ -116,6 +218,12 @@ def main():
     # Vérifier le token (optionnel pour le serveur web)
     has_token = check_token()
     
+    # Shards et clusters: avant le serveur web, qui en déduit le routage IPC
+    if not configure_shards(
+        options.shards, options.clusters, os.getenv('TOKEN') if has_token else None
+    ):
+        return
+    
     # Configurer le gestionnaire de signal
     signal.signal(signal.SIGINT, signal_handler)
     
@@ -123,7 +231,9 @@ def main():
     print("-" * 35)
     
     # Démarrer le serveur web dans un thread
-    web_thread = threading.Thread(target=run_web_server, daemon=True)
+    web_thread = threading.Thread(
+        target=run_web_server, args=(options.production,), daemon=True
+    )
     web_thread.start()
     
     # Ouvrir le navigateur dans un thread
@@ -149,7 +259,7 @@ def main():
         print("\n🛑 Appuyez sur Ctrl+C pour arrêter\n")
         
         try:
-            run_discord_bot()
+            run_discord_bot(options.clusters)
         except KeyboardInterrupt:
             print("\n🛑 Arrêt des services...")
     else:
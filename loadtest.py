@@ -0,0 +1,136 @@
+"""
+Test de charge du dashboard: des clients keep-alive rejouent une URL en boucle
+pendant quelques secondes, puis débit et latences sont affichés (une URL après
+l'autre, serveur déjà lancé)
+
+Tableau "Débit mesuré" de README_SETUP.md (bot hors ligne, même machine):
+    MODERATION_DB=/tmp/charge.db python loadtest.py --seed 20000
+    MODERATION_DB=/tmp/charge.db python web_server_new.py                  # dev
+    MODERATION_DB=/tmp/charge.db python web_server_new.py --production --threads 16
+    python loadtest.py --clients 16 --duration 5
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+import storage
+
+DEFAULT_URL = 'http://127.0.0.1:5000'
+DEFAULT_PATHS = ('/api/logs?limit=50', '/api/stats', '/static/modern-style.css')
+# Logs factices du seed: un serveur, quelques modérateurs
+SEED_GUILD_ID = '123456789012345678'
+SEED_CHANNEL_ID = '123456789012345679'
+SEED_ACTIONS = ('warn', 'mute', 'kick', 'ban', 'unmute')
+SEED_BATCH = 1000
+
+
+def seed(count):
+    """Insère count logs factices dans la base MODERATION_DB"""
+    storage.init_database()
+    for start in range(0, count, SEED_BATCH):
+        storage.insert_logs([
+            storage.make_log_record(
+                SEED_ACTIONS[index % len(SEED_ACTIONS)],
+                f"Moderateur#{index % 7:04d}",
+                f"Membre#{index:04d}",
+                SEED_GUILD_ID,
+                reason="test de charge",
+                channel_id=SEED_CHANNEL_ID,
+                moderator_id=100000000000000000 + index % 7,
+                target_id=200000000000000000 + index
+            )
+            for index in range(start, min(start + SEED_BATCH, count))
+        ])
+
+
+def _client(url, path, deadline, latencies, errors):
+    """Une connexion keep-alive: requêtes enchaînées jusqu'à deadline"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    try:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors.append(1)
+                conn.close()
+                continue
+            if response.status != 200:
+                errors.append(1)
+                continue
+            latencies.append(time.perf_counter() - start)
+    finally:
+        conn.close()
+
+
+def run(url, path, clients, duration):
+    """Débit (req/s), latences p50/p99 (ms) et erreurs pour une URL"""
+    latencies = []
+    errors = []
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=_client, args=(url, path, deadline, latencies, errors))
+        for _ in range(clients)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+
+    def percentile(ratio):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * ratio))] * 1000
+
+    return {
+        'requests': len(latencies),
+        'rate': len(latencies) / elapsed,
+        'p50': percentile(0.50),
+        'p99': percentile(0.99),
+        'errors': len(errors)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du dashboard")
+    parser.add_argument(
+        'paths', nargs='*', default=DEFAULT_PATHS, help="URLs relatives à tester"
+    )
+    parser.add_argument('--url', default=DEFAULT_URL, help="adresse du dashboard")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5, help="secondes par URL")
+    parser.add_argument(
+        '--seed',
+        type=int,
+        metavar='N',
+        help="insère N logs factices dans MODERATION_DB puis quitte"
+    )
+    options = parser.parse_args(argv)
+
+    if options.seed:
+        try:
+            seed(options.seed)
+        finally:
+            storage.close_connections()
+        print(f"✅ {options.seed} logs insérés")
+        return
+
+    print(f"🏁 {options.clients} clients keep-alive, {options.duration:g} s par URL")
+    for path in options.paths:
+        result = run(options.url, path, options.clients, options.duration)
+        print(
+            f"{path}: {result['rate']:.0f} req/s, p50 {result['p50']:.0f} ms, "
+            f"p99 {result['p99']:.0f} ms, {result['errors']} erreurs"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Écriture différée des logs de modération
+Les commandes déposent leurs logs dans une file, un thread les commit par lots
+"""
+import asyncio
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+import storage
+
+# Taille maximale d'un lot et délai maximal avant commit
+BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', '200'))
+FLUSH_INTERVAL = int(os.getenv('LOG_FLUSH_MS', '5')) / 1000
+# Au-delà, les commandes attendent qu'il y ait de la place (back-pressure)
+MAX_PENDING = int(os.getenv('LOG_QUEUE_MAX', '10000'))
+# Tentatives avant d'abandonner un lot (base verrouillée, disque plein...)
+MAX_RETRIES = 3
+
+_STOP = object()
+
+
+class LogWriter:
+    """File d'attente + thread d'écriture groupée vers storage.insert_logs"""
+
+    def __init__(
+        self,
+        batch_size=BATCH_SIZE,
+        flush_interval=FLUSH_INTERVAL,
+        max_pending=MAX_PENDING
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._idle = threading.Condition()
+        self._outstanding = 0
+        self._closed = False
+
+        # Compteurs exposés par stats()
+        self.enqueued = 0
+        self.committed = 0
+        self.batches = 0
+        self.failed = 0
+        self.blocked = 0
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+        self._total_commit_ms = 0.0
+
+    def start(self):
+        """Démarre le thread d'écriture (idempotent)"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._closed = False
+                self._thread = threading.Thread(
+                    target=self._run, name='log-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _track(self):
+        with self._idle:
+            self._outstanding += 1
+
+    def enqueue(self, record, block=True, timeout=None):
+        """Dépose un enregistrement; bloque si la file est pleine (hors event loop)"""
+        if self._closed:
+            raise RuntimeError("LogWriter fermé")
+        self.start()
+        self._track()
+        try:
+            self._queue.put(record, block=block, timeout=timeout)
+        except queue.Full:
+            self._done(1)
+            raise
+        self.enqueued += 1
+
+    async def submit(self, record):
+        """Version asynchrone: ne bloque jamais l'event loop"""
+        try:
+            self.enqueue(record, block=False)
+        except queue.Full:
+            # File pleine: on attend dans un thread de l'executor, la commande patiente
+            self.blocked += 1
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.enqueue, record)
+
+    def _done(self, count):
+        with self._idle:
+            self._outstanding -= count
+            if self._outstanding <= 0:
+                self._idle.notify_all()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+        # Arrêt: vider ce qui reste dans la file
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._commit(batch)
+                batch = []
+        if batch:
+            self._commit(batch)
+
+    def _commit(self, batch):
+        for attempt in range(1, MAX_RETRIES + 1):
+            started = time.perf_counter()
+            try:
+                storage.insert_logs(batch)
+            except Exception as e:
+                print(f"Erreur écriture logs (tentative {attempt}/{MAX_RETRIES}): {e}")
+                time.sleep(0.05 * attempt)
+                continue
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.committed += len(batch)
+            self.batches += 1
+            self.last_commit_ms = elapsed_ms
+            self.max_commit_ms = max(self.max_commit_ms, elapsed_ms)
+            self._total_commit_ms += elapsed_ms
+            break
+        else:
+            self.failed += len(batch)
+        self._done(len(batch))
+
+    def flush(self, timeout=None):
+        """Attend que tous les logs déposés soient commités;
+        retourne False si timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding <= 0, timeout=timeout)
+
+    def close(self, timeout=10):
+        """Vide la file puis arrête le thread (appelé à l'arrêt du bot)"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def stats(self):
+        """Compteurs de la file et des commits"""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'outstanding': self._outstanding,
+            'enqueued': self.enqueued,
+            'committed': self.committed,
+            'batches': self.batches,
+            'failed': self.failed,
+            'blocked': self.blocked,
+            'avg_batch_size': round(self.committed / self.batches, 2)
+            if self.batches
+            else 0,
+            'last_commit_ms': round(self.last_commit_ms, 3),
+            'avg_commit_ms': round(self._total_commit_ms / self.batches, 3)
+            if self.batches
+            else 0,
+            'max_commit_ms': round(self.max_commit_ms, 3)
+        }
+
+
+# Instance partagée par le processus du bot
+writer = LogWriter()
+atexit.register(writer.close)
+
+
+async def log_action(
+    action: str,
+    moderator: str,
+    target: str,
+    guild_id: str,
+    duration: Optional[str] = None,
+    reason: Optional[str] = None,
+    channel_id: Optional[str] = None,
+    moderator_id=None,
+    target_id=None
+):
+    """Dépose un log de modération sans bloquer l'event loop"""
+    await writer.submit(
+        storage.make_log_record(
+            action,
+            moderator,
+            target,
+            guild_id,
+            duration,
+            reason,
+            channel_id,
+            moderator_id,
+            target_id
+        )
+    )
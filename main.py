@@ -1,45 +1,45 @@
 import os
 import re
-import sqlite3
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
 from typing import Optional
 import asyncio
+import contextlib
 
 import discord
 from discord.ext import commands
 
+import storage
 # Import our config system
 from config import get_discord_token
-
-# Database setup
-def init_database():
-    conn = sqlite3.connect('moderation_logs.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS moderation_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            action TEXT NOT NULL,
-            moderator TEXT NOT NULL,
-            target TEXT NOT NULL,
-            duration TEXT,
-            reason TEXT,
-            guild_id TEXT NOT NULL,
-            channel_id TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-def log_action(action: str, moderator: str, target: str, guild_id: str, duration: Optional[str] = None, reason: Optional[str] = None, channel_id: Optional[str] = None):
-    conn = sqlite3.connect('moderation_logs.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO moderation_logs (timestamp, action, moderator, target, duration, reason, guild_id, channel_id)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (datetime.now().isoformat(), action, moderator, target, duration, reason, guild_id, channel_id))
-    conn.commit()
-    conn.close()
+# Stockage partagé des logs (connexions persistantes, mode WAL)
+from storage import init_database
+# Écriture des logs en arrière-plan, par lots
+from log_writer import log_action, writer as log_writer
+# Expirations persistantes (fin de mute / de ban temporaire)
+from scheduler import ExpiryScheduler
+# File d'appels Discord par serveur, avec priorités
+from dispatcher import dispatch, dispatcher, URGENT, NORMAL, LOW, MAX_RATELIMIT_WAIT
+# Pont vers le serveur web (processus séparé)
+from ipc import IPCServer
+# Annuaire des membres (recherche et pagination côté bot)
+from member_index import MemberIndex
+# État du bot servi au dashboard (/api/status, /api/guilds)
+from snapshot import BotSnapshot
+# Archivage des vieux logs et compaction de la base
+import retention
+# Rôles modérateur / Muted résolus par ID
+from role_cache import RoleCache
+# Paramètres par serveur (préfixe, raison par défaut, mode de mute...), en cache mémoire
+from guild_settings import settings_store, GLOBAL, MUTE_MODES, DEFAULT_PREFIX
+# Profil de cache des membres et présences (GATEWAY_CACHE_PROFILE)
+from cache_profile import CacheProfile
+# Shards hébergés par ce processus (SHARD_COUNT, CLUSTER_COUNT, CLUSTER_ID)
+from cluster import shard_config
+# Filtre des messages (termes interdits, invitations, liens, mentions en masse)
+from automod import AutoMod
+# Détection de flood et de raid (compteurs à fenêtre glissante)
+from flood import FloodGuard
 
 def parse_duration(duration_str: str) -> Optional[timedelta]:
     """Parse duration string like '1d', '5h', '30m', '45s' into timedelta"""
@@ -69,48 +69,530 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 intents.guilds = True
-intents.presences = True
+# Présences, cache des membres et chargement au démarrage selon le profil choisi
+cache_profile = CacheProfile()
+cache_options = cache_profile.apply(intents)
+
+def get_prefix(_bot, message):
+    """Préfixe du serveur, lu dans le cache des paramètres
+    (aucun accès disque par message)
+    """
+    return (
+        settings_store.get(message.guild.id, 'prefix')
+        if message.guild
+        else DEFAULT_PREFIX
+    )
 
-bot = commands.Bot(command_prefix='+', intents=intents)
+# Raison utilisée quand la commande n'en précise pas (réglable par serveur)
+DefaultReason = commands.parameter(
+    default=lambda ctx: settings_store.get(
+        ctx.guild.id if ctx.guild else None, 'default_reason'
+    ),
+    displayed_default="raison par défaut du serveur"
+)
+
+# Les attentes de rate limit trop longues remontent au dispatcher qui replanifie l'appel
+# SHARD_COUNT défini: plusieurs connexions gateway
+# (éventuellement une plage par processus)
+bot_class = commands.AutoShardedBot if shard_config.sharded else commands.Bot
+bot = bot_class(
+    command_prefix=get_prefix,
+    intents=intents,
+    max_ratelimit_timeout=MAX_RATELIMIT_WAIT,
+    **cache_options,
+    **shard_config.bot_options()
+)
+cache_profile.install(bot)
+# Chaque cluster ne recharge que les expirations de ses propres serveurs
+expiry_scheduler = ExpiryScheduler(bot, owns=shard_config.owns)
+ipc_server = IPCServer(shard_config.ipc_address())
+member_index = MemberIndex()
+status_snapshot = BotSnapshot(bot)
+role_cache = RoleCache()
+automod = AutoMod()
+flood_guard = FloodGuard()
+
+@bot.event
+async def setup_hook():
+    # Recharge les expirations en attente (y compris celles échues pendant l'arrêt)
+    await expiry_scheduler.start()
+    # Passe de rétention toutes les 6 heures,
+    # dans un thread (un seul cluster s'en charge)
+    if shard_config.primary:
+        bot.retention_task = asyncio.create_task(retention.run_forever())
+    # Profil lean: libère les annuaires de membres inutilisés
+    bot.cache_trim_task = asyncio.create_task(
+        cache_profile.run_trimmer(bot, member_index.drop)
+    )
+    # Le dashboard lit l'état du bot et envoie ses commandes par ce socket
+    try:
+        await ipc_server.start()
+    except OSError as e:
+        print(f"⚠️  Pont IPC indisponible: {e}")
 
 @bot.event
 async def on_ready():
-    print(f'Bot connecté en tant que {bot.user}')
-    init_database()
+    print(
+        f'Bot connecté en tant que {bot.user} ({shard_config.describe()}, '
+        f'{len(bot.guilds)} serveurs)'
+    )
+    status_snapshot.rebuild()
+    await apply_presence()
+
+async def apply_presence():
+    """Statut et activité du bot (paramètres globaux)"""
+    activity = settings_store.get(GLOBAL, 'presence_activity')
+    await bot.change_presence(
+        status=discord.Status(settings_store.get(GLOBAL, 'presence_status')),
+        activity=discord.CustomActivity(name=activity) if activity else None
+    )
+
+@expiry_scheduler.handler('unmute')
+async def expire_mute(guild, entry):
+    """Retire le rôle Muted à la fin de la durée du mute"""
+    member = await cache_profile.resolve_member(guild, entry['user_sf'])
+    muted_role = role_cache.mute_role(guild)
+    if member is None or muted_role is None or muted_role not in member.roles:
+        return
+    await dispatch(
+        guild.id,
+        NORMAL,
+        ('member', guild.id),
+        lambda: member.remove_roles(muted_role, reason="Fin de la durée du mute")
+    )
+    await log_action(
+        "unmute",
+        "Expiration automatique",
+        str(member),
+        str(guild.id),
+        None,
+        "Fin de la durée du mute",
+        target_id=member.id
+    )
+
+@expiry_scheduler.handler('unban')
+async def expire_ban(guild, entry):
+    """Lève un ban temporaire arrivé à échéance"""
+    try:
+        await dispatch(
+            guild.id,
+            NORMAL,
+            ('ban', guild.id),
+            lambda: guild.unban(
+                discord.Object(id=entry['user_sf']), reason="Fin de la durée du ban"
+            )
+        )
+    except discord.NotFound:
+        return  # Déjà débanni manuellement
+    await log_action(
+        "unban",
+        "Expiration automatique",
+        f"<@{entry['user_sf']}>",
+        str(guild.id),
+        None,
+        "Fin de la durée du ban",
+        target_id=entry['user_sf']
+    )
+
+async def send_embed(ctx, embed):
+    """Embed de confirmation, envoyé en basse priorité derrière les sanctions"""
+    return await dispatch(
+        ctx.guild.id, LOW, ('channel', ctx.channel.id), lambda: ctx.send(embed=embed)
+    )
+
+# Membres actifs gardés en mémoire (profil lean)
+@bot.listen('on_message')
+async def cache_message_author(message):
+    if message.guild is not None:
+        cache_profile.touch(message.author)
+
+@bot.listen('on_guild_remove')
+async def cache_guild_remove(guild):
+    cache_profile.forget(guild.id)
+    automod.forget(guild.id)
+    flood_guard.forget(guild.id)
+
+# Maintien de l'annuaire des membres
+@bot.listen('on_member_join')
+async def index_member_join(member):
+    cache_profile.touch(member)
+    member_index.on_join(member)
+
+@bot.listen('on_member_remove')
+async def index_member_remove(member):
+    member_index.on_remove(member)
+
+@bot.listen('on_member_update')
+async def index_member_update(before, after):
+    if before.display_name != after.display_name:
+        member_index.on_update(after)
+
+@bot.listen('on_user_update')
+async def index_user_update(before, after):
+    if before.name == after.name and before.display_name == after.display_name:
+        return
+    for guild in after.mutual_guilds:
+        member = guild.get_member(after.id)
+        if member is not None:
+            member_index.on_update(member)
+
+@bot.listen('on_guild_remove')
+async def index_guild_remove(guild):
+    member_index.drop(guild.id)
+
+# Maintien de l'instantané servi au dashboard
+@bot.listen('on_resumed')
+async def snapshot_resumed():
+    status_snapshot.rebuild()
+
+@bot.listen('on_disconnect')
+async def snapshot_disconnect():
+    # Avec plusieurs shards, l'état de chaque shard est lu en direct
+    # (BotSnapshot.shards)
+    if not shard_config.sharded:
+        status_snapshot.set_online(False)
+
+@bot.listen('on_guild_join')
+async def snapshot_guild_join(guild):
+    status_snapshot.update_guild(guild)
+
+@bot.listen('on_guild_update')
+async def snapshot_guild_update(_before, after):
+    status_snapshot.update_guild(after)
+
+@bot.listen('on_guild_remove')
+async def snapshot_guild_remove(guild):
+    status_snapshot.remove_guild(guild.id)
+
+@bot.listen('on_member_join')
+async def snapshot_member_join(member):
+    status_snapshot.update_guild(member.guild)
+
+@bot.listen('on_member_remove')
+async def snapshot_member_remove(member):
+    status_snapshot.update_guild(member.guild)
+
+@bot.listen('on_guild_channel_create')
+async def snapshot_channel_create(channel):
+    status_snapshot.update_guild(channel.guild)
+
+@bot.listen('on_guild_channel_delete')
+async def snapshot_channel_delete(channel):
+    status_snapshot.update_guild(channel.guild)
+
+@bot.listen('on_guild_role_create')
+async def snapshot_role_create(role):
+    status_snapshot.update_guild(role.guild)
+
+@bot.listen('on_guild_role_delete')
+async def snapshot_role_delete(role):
+    status_snapshot.update_guild(role.guild)
+
+# Maintien du cache des rôles de modération
+@bot.listen('on_guild_role_create')
+async def roles_role_create(role):
+    role_cache.on_role_create(role)
+
+@bot.listen('on_guild_role_update')
+async def roles_role_update(before, after):
+    if before.name != after.name:
+        role_cache.on_role_update(after)
+
+@bot.listen('on_guild_role_delete')
+async def roles_role_delete(role):
+    role_cache.on_role_delete(role)
+
+@bot.listen('on_guild_remove')
+async def roles_guild_remove(guild):
+    role_cache.drop(guild.id)
 
 # Check if user has bot role or admin permissions
 def has_bot_permissions():
     async def predicate(ctx):
-        # Check if user is admin
-        if ctx.author.guild_permissions.administrator:
-            return True
-        
-        # Check if user has a role named "bot" (case insensitive)
-        for role in ctx.author.roles:
-            if role.name.lower() == "bot":
-                return True
+        # Admin ou rôle modérateur (rôle "bot" épinglé par ID, voir role_cache.py)
+        return role_cache.is_moderator(ctx.author)
+    return commands.check(predicate)
+
+async def get_or_create_muted_role(guild):
+    """Récupère le rôle Muted, en le créant au besoin"""
+    muted_role = role_cache.mute_role(guild)
+    if not muted_role:
+        muted_role = await dispatch(
+            guild.id,
+            NORMAL,
+            ('roles', guild.id),
+            lambda: guild.create_role(
+                name="Muted", reason="Rôle pour les utilisateurs mutés"
+            )
+        )
+        role_cache.set_mute_role(guild, muted_role)
         
+        # Set permissions for muted role (en parallèle, borné par le dispatcher)
+        await asyncio.gather(
+            *(
+                dispatch(
+                    guild.id,
+                    NORMAL,
+                    ('channel', channel.id),
+                    lambda channel=channel: channel.set_permissions(
+                        muted_role, send_messages=False, speak=False
+                    )
+                )
+                for channel in guild.channels
+            )
+        )
+    return muted_role
+
+# Durée maximale d'un timeout Discord
+MAX_TIMEOUT = timedelta(days=28)
+
+def get_mute_mode(guild_id):
+    """Mode de mute configuré pour un serveur"""
+    return settings_store.get(guild_id, 'mute_mode')
+
+def logged_mute_duration(duration, duration_delta, applied):
+    """Durée à journaliser: celle demandée,
+    ou le plafond du timeout natif s'il a été appliqué
+    """
+    if applied is not None and applied != duration_delta:
+        return f"{MAX_TIMEOUT.days}d"
+    return duration
+
+async def apply_mute(guild, member, duration_delta, reason):
+    """Mute selon le mode du serveur; retourne la durée effective (None = indéfini)"""
+    if get_mute_mode(guild.id) == 'timeout':
+        applied = min(duration_delta or MAX_TIMEOUT, MAX_TIMEOUT)
+        await dispatch(
+            guild.id,
+            URGENT,
+            ('member', guild.id),
+            lambda: member.timeout(applied, reason=reason)
+        )
+        # Expiration gérée par Discord: aucune échéance locale à suivre
+        await expiry_scheduler.cancel('unmute', guild.id, member.id)
+        return applied
+    
+    muted_role = await get_or_create_muted_role(guild)
+    await dispatch(
+        guild.id,
+        URGENT,
+        ('member', guild.id),
+        lambda: member.add_roles(muted_role, reason=reason)
+    )
+    if duration_delta:
+        await expiry_scheduler.schedule(
+            'unmute', guild.id, member.id, duration_delta, reason
+        )
+    else:
+        await expiry_scheduler.cancel('unmute', guild.id, member.id)
+    return duration_delta
+
+async def remove_mute(guild, member, reason):
+    """Lève un mute quel que soit le mode utilisé;
+    retourne False si l'utilisateur n'était pas muté
+    """
+    removed = False
+    if member.is_timed_out():
+        await dispatch(
+            guild.id,
+            NORMAL,
+            ('member', guild.id),
+            lambda: member.timeout(None, reason=reason)
+        )
+        removed = True
+    muted_role = role_cache.mute_role(guild)
+    if muted_role and member.get_role(muted_role.id):
+        await dispatch(
+            guild.id,
+            NORMAL,
+            ('member', guild.id),
+            lambda: member.remove_roles(muted_role, reason=reason)
+        )
+        removed = True
+    await expiry_scheduler.cancel('unmute', guild.id, member.id)
+    return removed
+
+# Actions de modération partagées par les commandes préfixées et le dashboard
+# (action Discord + échéance éventuelle + log)
+async def perform_mute(guild, member, duration, reason, moderator, moderator_id=None):
+    """Mute un membre; retourne (durée appliquée, durée journalisée)"""
+    duration_delta = parse_duration(duration) if duration else None
+    cache_profile.touch(member)
+    applied = await apply_mute(guild, member, duration_delta, reason)
+    duration = logged_mute_duration(duration, duration_delta, applied)
+    await log_action(
+        "mute",
+        moderator,
+        str(member),
+        str(guild.id),
+        duration,
+        reason,
+        moderator_id=moderator_id,
+        target_id=member.id
+    )
+    return applied, duration
+
+async def perform_unmute(guild, member, reason, moderator, moderator_id=None):
+    """Démute un membre; retourne False s'il n'était pas muté"""
+    cache_profile.touch(member)
+    if not await remove_mute(guild, member, reason):
         return False
-    return commands.check(predicate)
+    await log_action(
+        "unmute",
+        moderator,
+        str(member),
+        str(guild.id),
+        None,
+        reason,
+        moderator_id=moderator_id,
+        target_id=member.id
+    )
+    return True
+
+async def perform_ban(guild, member, duration, reason, moderator, moderator_id=None):
+    """Ban un membre; un ban temporaire programme sa levée"""
+    await dispatch(
+        guild.id, URGENT, ('ban', guild.id), lambda: member.ban(reason=reason)
+    )
+    duration_delta = parse_duration(duration) if duration else None
+    if duration_delta:
+        await expiry_scheduler.schedule(
+            'unban', guild.id, member.id, duration_delta, reason
+        )
+    await log_action(
+        "ban",
+        moderator,
+        str(member),
+        str(guild.id),
+        duration,
+        reason,
+        moderator_id=moderator_id,
+        target_id=member.id
+    )
+
+async def perform_kick(guild, member, reason, moderator, moderator_id=None):
+    await dispatch(
+        guild.id, URGENT, ('kick', guild.id), lambda: member.kick(reason=reason)
+    )
+    await log_action(
+        "kick",
+        moderator,
+        str(member),
+        str(guild.id),
+        None,
+        reason,
+        moderator_id=moderator_id,
+        target_id=member.id
+    )
+
+async def perform_warn(guild, member, reason, moderator, moderator_id=None):
+    """Avertit un membre par DM; retourne False si ses DM sont fermés"""
+    cache_profile.touch(member)
+    dm_embed = discord.Embed(
+        title="⚠️ Avertissement",
+        description=f"Vous avez reçu un avertissement sur {guild.name}",
+        color=discord.Color.yellow()
+    )
+    dm_embed.add_field(name="Raison", value=reason, inline=False)
+    try:
+        await dispatch(
+            guild.id, LOW, ('dm', member.id), lambda: member.send(embed=dm_embed)
+        )
+        delivered = True
+    except discord.HTTPException:
+        delivered = False  # User might have DMs disabled
+    await log_action(
+        "warn",
+        moderator,
+        str(member),
+        str(guild.id),
+        None,
+        reason,
+        moderator_id=moderator_id,
+        target_id=member.id
+    )
+    return delivered
+
+async def perform_lock(guild, channel, reason, moderator, moderator_id=None):
+    """Verrouille un canal: seuls les rôles modérateurs peuvent encore y écrire"""
+    moderator_roles = role_cache.moderator_roles(guild)
+    if not moderator_roles:
+        bot_role = await dispatch(
+            guild.id,
+            URGENT,
+            ('roles', guild.id),
+            lambda: guild.create_role(name="bot", reason="Rôle pour les modérateurs")
+        )
+        role_cache.set_moderator_roles(guild, [bot_role])
+        moderator_roles = [bot_role]
+    
+    # Set permissions: deny @everyone, allow moderator roles
+    route = ('channel', channel.id)
+    await dispatch(
+        guild.id,
+        URGENT,
+        route,
+        lambda: channel.set_permissions(guild.default_role, send_messages=False)
+    )
+    for role in moderator_roles:
+        await dispatch(
+            guild.id,
+            URGENT,
+            route,
+            lambda role=role: channel.set_permissions(role, send_messages=True)
+        )
+    await log_action(
+        "lock",
+        moderator,
+        f"#{channel.name}",
+        str(guild.id),
+        None,
+        reason,
+        str(channel.id),
+        moderator_id=moderator_id
+    )
+
+async def perform_unlock(guild, channel, reason, moderator, moderator_id=None):
+    await dispatch(
+        guild.id,
+        NORMAL,
+        ('channel', channel.id),
+        lambda: channel.set_permissions(guild.default_role, send_messages=True)
+    )
+    await log_action(
+        "unlock",
+        moderator,
+        f"#{channel.name}",
+        str(guild.id),
+        None,
+        reason,
+        str(channel.id),
+        moderator_id=moderator_id
+    )
 
 @bot.command(name='mute')
 @has_bot_permissions()
-async def mute_user(ctx, member: discord.Member, duration: Optional[str] = None, *, reason: str = "Aucune raison spécifiée"):
+async def mute_user(
+    ctx,
+    member: discord.Member,
+    duration: Optional[str] = None,
+    *,
+    reason: str = DefaultReason
+):
     """Mute un utilisateur pour une durée spécifiée"""
     try:
-        # Find or create muted role
-        muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
-        if not muted_role:
-            muted_role = await ctx.guild.create_role(name="Muted", reason="Rôle pour les utilisateurs mutés")
-            
-            # Set permissions for muted role
-            for channel in ctx.guild.channels:
-                await channel.set_permissions(muted_role, send_messages=False, speak=False)
-        
-        await member.add_roles(muted_role, reason=reason)
+        applied, logged_duration = await perform_mute(
+            ctx.guild, member, duration, reason, str(ctx.author), ctx.author.id
+        )
         
-        duration_delta = parse_duration(duration) if duration else None
-        duration_text = f"pour {duration}" if duration else "indéfiniment"
+        if applied is None:
+            duration_text = "indéfiniment"
+        elif logged_duration != duration:
+            duration_text = (
+                f"pour {logged_duration} (durée maximale d'un timeout Discord)"
+            )
+        else:
+            duration_text = f"pour {duration}"
         
         embed = discord.Embed(
             title="🔇 Utilisateur Muté",
@@ -120,30 +602,19 @@ async def mute_user(ctx, member: discord.Member, duration: Optional[str] = None,
         embed.add_field(name="Modérateur", value=ctx.author.mention, inline=True)
         embed.add_field(name="Raison", value=reason, inline=False)
         
-        await ctx.send(embed=embed)
-        
-        # Log the action
-        log_action("mute", str(ctx.author), str(member), str(ctx.guild.id), duration, reason)
-        
-        # Auto-unmute after duration
-        if duration_delta:
-            import asyncio
-            await asyncio.sleep(duration_delta.total_seconds())
-            if muted_role in member.roles:
-                await member.remove_roles(muted_role, reason="Fin de la durée du mute")
+        await send_embed(ctx, embed)
                 
     except Exception as e:
         await ctx.send(f"Erreur lors du mute: {str(e)}")
 
 @bot.command(name='unmute')
 @has_bot_permissions()
-async def unmute_user(ctx, member: discord.Member, *, reason: str = "Aucune raison spécifiée"):
+async def unmute_user(ctx, member: discord.Member, *, reason: str = DefaultReason):
     """Unmute un utilisateur"""
     try:
-        muted_role = discord.utils.get(ctx.guild.roles, name="Muted")
-        if muted_role and muted_role in member.roles:
-            await member.remove_roles(muted_role, reason=reason)
-            
+        if await perform_unmute(
+            ctx.guild, member, reason, str(ctx.author), ctx.author.id
+        ):
             embed = discord.Embed(
                 title="🔊 Utilisateur Démuté",
                 description=f"{member.mention} a été démuté",
@@ -152,20 +623,106 @@ async def unmute_user(ctx, member: discord.Member, *, reason: str = "Aucune rais
             embed.add_field(name="Modérateur", value=ctx.author.mention, inline=True)
             embed.add_field(name="Raison", value=reason, inline=False)
             
-            await ctx.send(embed=embed)
-            log_action("unmute", str(ctx.author), str(member), str(ctx.guild.id), None, reason)
+            await send_embed(ctx, embed)
         else:
             await ctx.send("Cet utilisateur n'est pas muté.")
             
     except Exception as e:
         await ctx.send(f"Erreur lors de l'unmute: {str(e)}")
 
+@bot.command(name='mutemode')
+@has_bot_permissions()
+async def mute_mode(ctx, mode: Optional[str] = None):
+    """Affiche ou change le mode de mute du serveur (timeout ou role)"""
+    if mode is None:
+        await ctx.send(
+            f"Mode de mute actuel: **{get_mute_mode(ctx.guild.id)}** (timeout ou role)"
+        )
+        return
+    mode = mode.lower()
+    if mode not in MUTE_MODES:
+        await ctx.send("❌ Mode inconnu. Utilisez `timeout` ou `role`.")
+        return
+    await settings_store.set_async(ctx.guild.id, 'mute_mode', mode)
+    await ctx.send(f"✅ Mode de mute: **{mode}**")
+
+@bot.command(name='retention')
+@has_bot_permissions()
+async def log_retention(ctx, days: Optional[int] = None):
+    """Affiche ou change la durée de conservation des logs du serveur (0 = illimitée)"""
+    if days is None:
+        current = retention.retention_days(ctx.guild.id)
+        await ctx.send(
+            "Conservation des logs: "
+            f"**{current or 'illimitée'}{' jours' if current else ''}** (les plus "
+            "anciens sont archivés)"
+        )
+        return
+    if days < 0:
+        await ctx.send("❌ La durée doit être positive (0 = illimitée).")
+        return
+    await settings_store.set_async(ctx.guild.id, retention.SETTING_KEY, days)
+    await ctx.send(
+        f"✅ Conservation des logs: **{days or 'illimitée'}{' jours' if days else ''}**"
+    )
+
+@bot.command(name='prefix')
+@commands.has_permissions(administrator=True)
+async def prefix_command(ctx, prefix: Optional[str] = None):
+    """Affiche ou change le préfixe des commandes du serveur"""
+    if prefix is None:
+        await ctx.send(
+            f"Préfixe actuel: **{settings_store.get(ctx.guild.id, 'prefix')}**"
+        )
+        return
+    try:
+        await settings_store.set_async(ctx.guild.id, 'prefix', prefix)
+    except ValueError as e:
+        await ctx.send(f"❌ Préfixe invalide: {e}")
+        return
+    await ctx.send(f"✅ Nouveau préfixe: **{prefix}** (ex: `{prefix}bothelp`)")
+
+@bot.command(name='modrole')
+@commands.has_permissions(administrator=True)
+async def moderator_role(ctx, roles: commands.Greedy[discord.Role]):
+    """Affiche ou remplace les rôles autorisés à utiliser les commandes de modération"""
+    if not roles:
+        current = role_cache.moderator_roles(ctx.guild)
+        mentions = ', '.join(role.mention for role in current)
+        fallback = 'aucun (administrateurs seulement)'
+        await ctx.send(f"Rôles modérateurs: {mentions or fallback}")
+        return
+    role_cache.set_moderator_roles(ctx.guild, roles)
+    await ctx.send(f"✅ Rôles modérateurs: {', '.join(role.mention for role in roles)}")
+
+@bot.command(name='muterole')
+@commands.has_permissions(administrator=True)
+async def mute_role_command(ctx, role: Optional[discord.Role] = None):
+    """Affiche ou change le rôle utilisé par le mode de mute 'role'"""
+    if role is None:
+        current = role_cache.mute_role(ctx.guild)
+        await ctx.send(
+            "Rôle de mute: "
+            f"{current.mention if current else 'aucun (créé au premier mute)'}"
+        )
+        return
+    role_cache.set_mute_role(ctx.guild, role)
+    await ctx.send(f"✅ Rôle de mute: {role.mention}")
+
 @bot.command(name='ban')
 @has_bot_permissions()
-async def ban_user(ctx, member: discord.Member, duration: Optional[str] = None, *, reason: str = "Aucune raison spécifiée"):
+async def ban_user(
+    ctx,
+    member: discord.Member,
+    duration: Optional[str] = None,
+    *,
+    reason: str = DefaultReason
+):
     """Ban un utilisateur"""
     try:
-        await member.ban(reason=reason)
+        await perform_ban(
+            ctx.guild, member, duration, reason, str(ctx.author), ctx.author.id
+        )
         
         duration_text = f"pour {duration}" if duration else "définitivement"
         
@@ -177,18 +734,17 @@ async def ban_user(ctx, member: discord.Member, duration: Optional[str] = None,
         embed.add_field(name="Modérateur", value=ctx.author.mention, inline=True)
         embed.add_field(name="Raison", value=reason, inline=False)
         
-        await ctx.send(embed=embed)
-        log_action("ban", str(ctx.author), str(member), str(ctx.guild.id), duration, reason)
+        await send_embed(ctx, embed)
         
     except Exception as e:
         await ctx.send(f"Erreur lors du ban: {str(e)}")
 
 @bot.command(name='kick')
 @has_bot_permissions()
-async def kick_user(ctx, member: discord.Member, *, reason: str = "Aucune raison spécifiée"):
+async def kick_user(ctx, member: discord.Member, *, reason: str = DefaultReason):
     """Kick un utilisateur"""
     try:
-        await member.kick(reason=reason)
+        await perform_kick(ctx.guild, member, reason, str(ctx.author), ctx.author.id)
         
         embed = discord.Embed(
             title="👢 Utilisateur Kické",
@@ -198,25 +754,19 @@ async def kick_user(ctx, member: discord.Member, *, reason: str = "Aucune raison
         embed.add_field(name="Modérateur", value=ctx.author.mention, inline=True)
         embed.add_field(name="Raison", value=reason, inline=False)
         
-        await ctx.send(embed=embed)
-        log_action("kick", str(ctx.author), str(member), str(ctx.guild.id), None, reason)
+        await send_embed(ctx, embed)
         
     except Exception as e:
         await ctx.send(f"Erreur lors du kick: {str(e)}")
 
 @bot.command(name='lock')
 @has_bot_permissions()
-async def lock_channel(ctx, *, reason: str = "Aucune raison spécifiée"):
-    """Lock un channel (seuls les utilisateurs avec le rôle 'bot' peuvent parler)"""
+async def lock_channel(ctx, *, reason: str = DefaultReason):
+    """Lock un channel (seuls les rôles modérateurs peuvent parler)"""
     try:
-        # Get bot role
-        bot_role = discord.utils.get(ctx.guild.roles, name="bot")
-        if not bot_role:
-            bot_role = await ctx.guild.create_role(name="bot", reason="Rôle pour les modérateurs")
-        
-        # Set permissions: deny @everyone, allow bot role
-        await ctx.channel.set_permissions(ctx.guild.default_role, send_messages=False)
-        await ctx.channel.set_permissions(bot_role, send_messages=True)
+        await perform_lock(
+            ctx.guild, ctx.channel, reason, str(ctx.author), ctx.author.id
+        )
         
         embed = discord.Embed(
             title="🔒 Channel Verrouillé",
@@ -226,18 +776,19 @@ async def lock_channel(ctx, *, reason: str = "Aucune raison spécifiée"):
         embed.add_field(name="Modérateur", value=ctx.author.mention, inline=True)
         embed.add_field(name="Raison", value=reason, inline=False)
         
-        await ctx.send(embed=embed)
-        log_action("lock", str(ctx.author), f"#{ctx.channel.name}", str(ctx.guild.id), None, reason, str(ctx.channel.id))
+        await send_embed(ctx, embed)
         
     except Exception as e:
         await ctx.send(f"Erreur lors du verrouillage: {str(e)}")
 
 @bot.command(name='unlock')
 @has_bot_permissions()
-async def unlock_channel(ctx, *, reason: str = "Aucune raison spécifiée"):
+async def unlock_channel(ctx, *, reason: str = DefaultReason):
     """Unlock un channel"""
     try:
-        await ctx.channel.set_permissions(ctx.guild.default_role, send_messages=True)
+        await perform_unlock(
+            ctx.guild, ctx.channel, reason, str(ctx.author), ctx.author.id
+        )
         
         embed = discord.Embed(
             title="🔓 Channel Déverrouillé",
@@ -247,15 +798,14 @@ async def unlock_channel(ctx, *, reason: str = "Aucune raison spécifiée"):
         embed.add_field(name="Modérateur", value=ctx.author.mention, inline=True)
         embed.add_field(name="Raison", value=reason, inline=False)
         
-        await ctx.send(embed=embed)
-        log_action("unlock", str(ctx.author), f"#{ctx.channel.name}", str(ctx.guild.id), None, reason, str(ctx.channel.id))
+        await send_embed(ctx, embed)
         
     except Exception as e:
         await ctx.send(f"Erreur lors du déverrouillage: {str(e)}")
 
 @bot.command(name='warn')
 @has_bot_permissions()
-async def warn_user(ctx, member: discord.Member, *, reason: str = "Aucune raison spécifiée"):
+async def warn_user(ctx, member: discord.Member, *, reason: str = DefaultReason):
     """Warn un utilisateur"""
     try:
         embed = discord.Embed(
@@ -266,25 +816,718 @@ async def warn_user(ctx, member: discord.Member, *, reason: str = "Aucune raison
         embed.add_field(name="Modérateur", value=ctx.author.mention, inline=True)
         embed.add_field(name="Raison", value=reason, inline=False)
         
-        await ctx.send(embed=embed)
-        
-        # Send DM to warned user
-        try:
-            dm_embed = discord.Embed(
-                title="⚠️ Avertissement",
-                description=f"Vous avez reçu un avertissement sur {ctx.guild.name}",
-                color=discord.Color.yellow()
-            )
-            dm_embed.add_field(name="Raison", value=reason, inline=False)
-            await member.send(embed=dm_embed)
-        except:
-            pass  # User might have DMs disabled
-        
-        log_action("warn", str(ctx.author), str(member), str(ctx.guild.id), None, reason)
+        await send_embed(ctx, embed)
+        await perform_warn(ctx.guild, member, reason, str(ctx.author), ctx.author.id)
         
     except Exception as e:
         await ctx.send(f"Erreur lors de l'avertissement: {str(e)}")
 
+# Actions de masse (raids)
+MASS_ACTION_CONCURRENCY = 5
+MASS_ACTION_MAX_TARGETS = 200
+
+MASS_ACTION_TITLES = {
+    'ban': "🔨 Ban de masse",
+    'kick': "👢 Kick de masse",
+    'mute': "🔇 Mute de masse"
+}
+
+async def run_mass_action(
+    guild, action, target_ids, moderator, moderator_id=None, reason=None, duration=None
+):
+    """Applique ban/kick/mute à plusieurs cibles avec une concurrence bornée
+
+    Retourne un résumé: cibles traitées, échecs par cible, durée et débit.
+    Tous les logs du lot sont écrits dans une seule transaction.
+    """
+    started = time.perf_counter()
+    target_ids = list(dict.fromkeys(int(target_id) for target_id in target_ids))[
+        :MASS_ACTION_MAX_TARGETS
+    ]
+    if not target_ids:
+        raise ValueError("Aucune cible")
+    duration_delta = parse_duration(duration) if duration else None
+    succeeded = []
+    failed = {}
+    # Durée réellement appliquée par cible (mute plafonné),
+    # journalisée à la place de celle demandée
+    logged_durations = {}
+
+    try:
+        if action == 'ban':
+            # Un seul appel API pour tout le lot (jusqu'à 200 utilisateurs)
+            users = [discord.Object(id=target_id) for target_id in target_ids]
+            result = await dispatch(
+                guild.id,
+                URGENT,
+                ('ban', guild.id),
+                lambda: guild.bulk_ban(users, reason=reason)
+            )
+            succeeded = [user.id for user in result.banned]
+            failed = {user.id: "Ban refusé" for user in result.failed}
+        else:
+            if action == 'mute' and get_mute_mode(guild.id) == 'role':
+                # Créer le rôle une seule fois avant les appels concurrents
+                await get_or_create_muted_role(guild)
+            # Cibles absentes du cache (profil lean) chargées par lots avant les actions
+            await cache_profile.resolve_members(guild, target_ids)
+            semaphore = asyncio.Semaphore(MASS_ACTION_CONCURRENCY)
+            
+            async def apply(target_id):
+                async with semaphore:
+                    member = guild.get_member(target_id)
+                    if member is None:
+                        raise LookupError("Membre introuvable")
+                    if action == 'kick':
+                        await dispatch(
+                            guild.id,
+                            URGENT,
+                            ('kick', guild.id),
+                            lambda: member.kick(reason=reason)
+                        )
+                    else:
+                        applied = await apply_mute(
+                            guild, member, duration_delta, reason
+                        )
+                        logged_durations[target_id] = logged_mute_duration(
+                            duration, duration_delta, applied
+                        )
+                    # Enregistré au fil de l'eau: un lot annulé garde les cibles déjà
+                    # traitées
+                    succeeded.append(target_id)
+            
+            results = await asyncio.gather(
+                *(apply(target_id) for target_id in target_ids), return_exceptions=True
+            )
+            for target_id, result in zip(target_ids, results, strict=True):
+                if isinstance(result, Exception):
+                    failed[target_id] = str(result)
+
+        if duration_delta and action == 'ban':
+            for target_id in succeeded:
+                await expiry_scheduler.schedule(
+                    'unban', guild.id, target_id, duration_delta, reason
+                )
+    finally:
+        # Journalise aussi les cibles traitées avant une annulation
+        # (timeout du dashboard)
+        records = [
+            storage.make_log_record(action, moderator, f"<@{target_id}>", str(guild.id),
+                                    logged_durations.get(target_id, duration), reason,
+                                    moderator_id=moderator_id, target_id=target_id)
+            for target_id in succeeded
+        ]
+        if records:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, storage.insert_logs, records)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'action': action,
+        'requested': len(target_ids),
+        'succeeded': [str(target_id) for target_id in succeeded],
+        'failed': {str(target_id): error for target_id, error in failed.items()},
+        'elapsed': round(elapsed, 3),
+        'per_second': round(len(succeeded) / elapsed, 1)
+        if elapsed > 0
+        else len(succeeded)
+    }
+
+def mass_action_embed(summary, moderator_mention, reason):
+    """Un seul embed récapitulatif pour tout le lot"""
+    embed = discord.Embed(
+        title=MASS_ACTION_TITLES[summary['action']],
+        description=f"{len(summary['succeeded'])}/{summary['requested']} cibles "
+                    f"traitées en {summary['elapsed']}s ({summary['per_second']}/s)",
+        color=discord.Color.red() if summary['failed'] else discord.Color.green()
+    )
+    embed.add_field(name="Modérateur", value=moderator_mention, inline=True)
+    embed.add_field(name="Raison", value=reason, inline=False)
+    if summary['failed']:
+        lines = [
+            f"<@{target_id}>: {error}"
+            for target_id, error in list(summary['failed'].items())[:10]
+        ]
+        if len(summary['failed']) > 10:
+            lines.append(f"... et {len(summary['failed']) - 10} autres")
+        embed.add_field(
+            name=f"Échecs ({len(summary['failed'])})",
+            value="\n".join(lines),
+            inline=False
+        )
+    return embed
+
+async def mass_command(ctx, action, targets, duration, reason):
+    if not targets:
+        await ctx.send(
+            "❌ Aucune cible valide. Mentionnez des membres ou donnez leurs IDs."
+        )
+        return
+    try:
+        async with ctx.typing():
+            summary = await run_mass_action(
+                ctx.guild,
+                action,
+                [target.id for target in targets],
+                str(ctx.author),
+                ctx.author.id,
+                reason,
+                duration
+            )
+        await send_embed(ctx, mass_action_embed(summary, ctx.author.mention, reason))
+    except Exception as e:
+        await ctx.send(f"Erreur lors de l'action de masse: {str(e)}")
+
+@bot.command(name='massban')
+@has_bot_permissions()
+async def mass_ban(
+    ctx,
+    targets: commands.Greedy[discord.Object],
+    duration: Optional[str] = None,
+    *,
+    reason: str = DefaultReason
+):
+    """Ban plusieurs utilisateurs (mentions ou IDs) en un seul appel"""
+    await mass_command(ctx, 'ban', targets, duration, reason)
+
+@bot.command(name='masskick')
+@has_bot_permissions()
+async def mass_kick(
+    ctx, targets: commands.Greedy[discord.Object], *, reason: str = DefaultReason
+):
+    """Kick plusieurs utilisateurs (mentions ou IDs)"""
+    await mass_command(ctx, 'kick', targets, None, reason)
+
+@bot.command(name='massmute')
+@has_bot_permissions()
+async def mass_mute(
+    ctx,
+    targets: commands.Greedy[discord.Object],
+    duration: Optional[str] = None,
+    *,
+    reason: str = DefaultReason
+):
+    """Mute plusieurs utilisateurs (mentions ou IDs)"""
+    await mass_command(ctx, 'mute', targets, duration, reason)
+
+# AutoMod: messages filtrés dès leur réception, sanction selon le réglage du serveur
+AUTOMOD_MODERATOR = "AutoMod"
+
+@bot.listen('on_message')
+async def automod_message(message):
+    guild = message.guild
+    author = message.author
+    if guild is None or author.bot or not isinstance(author, discord.Member):
+        return
+    # Réglages lus en mémoire: aucun accès disque par message
+    if not automod.enabled(guild.id) or role_cache.is_moderator(author):
+        return
+    violation = automod.check_message(message)
+    if violation is not None:
+        await apply_automod(guild, message, violation)
+
+@bot.listen('on_message_edit')
+async def automod_message_edit(before, after):
+    if before.content != after.content:
+        await automod_message(after)
+
+async def apply_automod(guild, message, violation):
+    """Supprime le message fautif puis avertit, mute ou journalise seulement"""
+    member = message.author
+    reason = violation.reason
+    try:
+        await dispatch(
+            guild.id, URGENT, ('channel', message.channel.id), lambda: message.delete()
+        )
+    except discord.NotFound:
+        pass  # Déjà supprimé
+    except discord.HTTPException as e:
+        print(f"⚠️  AutoMod: suppression impossible dans #{message.channel}: {e}")
+    
+    action = settings_store.get(guild.id, 'automod_action')
+    try:
+        if action == 'mute' and not member.is_timed_out():
+            await perform_mute(
+                guild,
+                member,
+                settings_store.get(guild.id, 'automod_mute_duration'),
+                reason,
+                AUTOMOD_MODERATOR,
+                bot.user.id
+            )
+        elif action == 'warn':
+            await perform_warn(guild, member, reason, AUTOMOD_MODERATOR, bot.user.id)
+        else:
+            await log_action(
+                "automod",
+                AUTOMOD_MODERATOR,
+                str(member),
+                str(guild.id),
+                None,
+                reason,
+                str(message.channel.id),
+                moderator_id=bot.user.id,
+                target_id=member.id
+            )
+    except discord.HTTPException as e:
+        print(f"⚠️  AutoMod: sanction impossible pour {member} ({guild.name}): {e}")
+
+# Réglages modifiables par +automod <réglage> <valeur>
+AUTOMOD_OPTIONS = {
+    'invites': 'automod_block_invites',
+    'links': 'automod_block_links',
+    'mentions': 'automod_max_mentions',
+    'action': 'automod_action',
+    'duration': 'automod_mute_duration'
+}
+
+def automod_embed(guild):
+    enabled = settings_store.get(guild.id, 'automod_enabled')
+    embed = discord.Embed(
+        title=f"🛡️ AutoMod {'activé' if enabled else 'désactivé'}",
+        color=discord.Color.green() if enabled else discord.Color.light_grey()
+    )
+    action = settings_store.get(guild.id, 'automod_action')
+    if action == 'mute':
+        action += f" {settings_store.get(guild.id, 'automod_mute_duration')}"
+    max_mentions = settings_store.get(guild.id, 'automod_max_mentions')
+    embed.add_field(name="Sanction", value=action, inline=True)
+    embed.add_field(
+        name="Termes interdits",
+        value=str(len(settings_store.get(guild.id, 'automod_terms'))),
+        inline=True
+    )
+    embed.add_field(
+        name="Invitations",
+        value="bloquées"
+        if settings_store.get(guild.id, 'automod_block_invites')
+        else "autorisées",
+        inline=True
+    )
+    embed.add_field(
+        name="Liens",
+        value="bloqués"
+        if settings_store.get(guild.id, 'automod_block_links')
+        else "autorisés",
+        inline=True
+    )
+    embed.add_field(
+        name="Mentions max",
+        value=str(max_mentions) if max_mentions else "illimitées",
+        inline=True
+    )
+    return embed
+
+@bot.command(name='automod')
+@has_bot_permissions()
+async def automod_command(
+    ctx, option: Optional[str] = None, *, value: Optional[str] = None
+):
+    """Affiche ou règle l'AutoMod (on/off,
+    invites, links, mentions, action, duration)
+    """
+    if option is None:
+        await ctx.send(embed=automod_embed(ctx.guild))
+        return
+    option = option.lower()
+    values = {}
+    if option in ('on', 'off'):
+        values['automod_enabled'] = option
+    elif option in AUTOMOD_OPTIONS and value:
+        if option == 'action':
+            # +automod action mute 1h
+            action, _, duration = value.partition(' ')
+            values['automod_action'] = action
+            if duration:
+                values['automod_mute_duration'] = duration
+        else:
+            values[AUTOMOD_OPTIONS[option]] = value
+    else:
+        await ctx.send(
+            f"❌ Utilisation: `{ctx.clean_prefix}automod "
+            f"[on|off|{'|'.join(AUTOMOD_OPTIONS)}] [valeur]`"
+        )
+        return
+    try:
+        await settings_store.update_async(ctx.guild.id, values)
+    except ValueError as e:
+        await ctx.send(f"❌ Valeur invalide: {e}")
+        return
+    await ctx.send(embed=automod_embed(ctx.guild))
+
+def split_terms(text):
+    """Termes séparés par des virgules ou des retours à la ligne"""
+    return [term for term in re.split(r'[,\n]', text or '') if term.strip()]
+
+@bot.command(name='banword')
+@has_bot_permissions()
+async def ban_words(ctx, *, terms: Optional[str] = None):
+    """Ajoute des termes interdits (séparés par des virgules), ou les liste"""
+    current = settings_store.get(ctx.guild.id, 'automod_terms')
+    if not terms:
+        listing = ', '.join(f"`{term}`" for term in current[:50])
+        more = f" (+{len(current) - 50})" if len(current) > 50 else ""
+        await ctx.send(f"Termes interdits ({len(current)}): {listing or 'aucun'}{more}")
+        return
+    try:
+        await settings_store.set_async(
+            ctx.guild.id, 'automod_terms', list(current) + split_terms(terms)
+        )
+    except ValueError as e:
+        await ctx.send(f"❌ {e}")
+        return
+    # Le message contenait les termes: inutile de le laisser dans le canal
+    with contextlib.suppress(discord.HTTPException):
+        await ctx.message.delete()
+    await ctx.send(
+        f"✅ {len(settings_store.get(ctx.guild.id, 'automod_terms')) - len(current)} "
+        "terme(s) ajouté(s)"
+    )
+
+@bot.command(name='unbanword')
+@has_bot_permissions()
+async def unban_words(ctx, *, terms: str):
+    """Retire des termes interdits (séparés par des virgules)"""
+    current = settings_store.get(ctx.guild.id, 'automod_terms')
+    removed = {' '.join(term.split()).casefold() for term in split_terms(terms)}
+    await settings_store.set_async(
+        ctx.guild.id, 'automod_terms', [term for term in current if term not in removed]
+    )
+    await ctx.send(
+        f"✅ {len(current) - len(settings_store.get(ctx.guild.id, 'automod_terms'))} "
+        "terme(s) retiré(s)"
+    )
+
+# Anti-flood / anti-raid: seuils par serveur,
+# sanctions par les chemins habituels (mute, logs)
+FLOOD_MODERATOR = "Anti-flood"
+RAID_MODERATOR = "Anti-raid"
+# Suspension des invitations limitée à 24 heures par Discord
+MAX_LOCKDOWN = timedelta(hours=24)
+
+@bot.listen('on_message')
+async def flood_message(message):
+    guild = message.guild
+    author = message.author
+    if guild is None or author.bot or not isinstance(author, discord.Member):
+        return
+    if not settings_store.get(guild.id, 'flood_enabled') or role_cache.is_moderator(
+        author
+    ):
+        return
+    if not flood_guard.message(guild.id, author.id) or author.is_timed_out():
+        return
+    reason = (
+        f"Anti-flood: {settings_store.get(guild.id, 'flood_messages')} messages "
+        f"en {settings_store.get(guild.id, 'flood_seconds')} s"
+    )
+    try:
+        await perform_mute(
+            guild,
+            author,
+            settings_store.get(guild.id, 'flood_mute_duration'),
+            reason,
+            FLOOD_MODERATOR,
+            bot.user.id
+        )
+    except discord.HTTPException as e:
+        print(f"⚠️  Anti-flood: mute impossible pour {author} ({guild.name}): {e}")
+
+@bot.listen('on_member_join')
+async def raid_member_join(member):
+    guild = member.guild
+    if member.bot or not settings_store.get(guild.id, 'raid_enabled'):
+        return
+    raiders = flood_guard.join(guild.id, member.id)
+    if raiders:
+        await start_lockdown(guild, raiders)
+    elif (
+        flood_guard.in_lockdown(guild.id)
+        and settings_store.get(guild.id, 'raid_action') == 'mute'
+    ):
+        # Arrivées pendant le confinement (invitations déjà copiées,
+        # comptes en attente...)
+        try:
+            await perform_mute(
+                guild,
+                member,
+                settings_store.get(guild.id, 'raid_lockdown_duration'),
+                "Anti-raid: arrivée pendant le confinement",
+                RAID_MODERATOR,
+                bot.user.id
+            )
+        except discord.HTTPException as e:
+            print(f"⚠️  Anti-raid: mute impossible pour {member} ({guild.name}): {e}")
+
+async def start_lockdown(guild, raiders):
+    """Raid détecté: log, puis invitations suspendues et arrivants de la fenêtre mutés
+    selon le réglage
+    """
+    action = settings_store.get(guild.id, 'raid_action')
+    duration = settings_store.get(guild.id, 'raid_lockdown_duration')
+    lockdown = min(parse_duration(duration) or MAX_LOCKDOWN, MAX_LOCKDOWN)
+    if lockdown == MAX_LOCKDOWN:
+        duration = "24h"
+    # Un seul déclenchement par raid, même en mode log
+    flood_guard.start_lockdown(guild.id, lockdown.total_seconds())
+    reason = (
+        f"Anti-raid: {len(raiders)} arrivées en "
+        f"{settings_store.get(guild.id, 'raid_seconds')} s"
+    )
+    print(f"🚨 Raid détecté sur {guild.name}: {len(raiders)} arrivées")
+    if action == 'log':
+        await log_action(
+            "raid",
+            RAID_MODERATOR,
+            f"{len(raiders)} membres",
+            str(guild.id),
+            None,
+            reason,
+            moderator_id=bot.user.id
+        )
+        return
+    
+    try:
+        await dispatch(
+            guild.id,
+            URGENT,
+            ('guild', guild.id),
+            lambda: guild.edit(
+                invites_disabled_until=discord.utils.utcnow() + lockdown, reason=reason
+            )
+        )
+    except discord.HTTPException as e:
+        print(
+            f"⚠️  Anti-raid: suspension des invitations impossible sur {guild.name}: {e}"
+        )
+    await log_action(
+        "lockdown",
+        RAID_MODERATOR,
+        guild.name,
+        str(guild.id),
+        duration,
+        reason,
+        moderator_id=bot.user.id
+    )
+    if action == 'mute':
+        try:
+            summary = await run_mass_action(
+                guild, 'mute', raiders, RAID_MODERATOR, bot.user.id, reason, duration
+            )
+            print(
+                f"🔇 Anti-raid: {len(summary['succeeded'])}/{summary['requested']} "
+                f"arrivants mutés sur {guild.name}"
+            )
+        except Exception as e:
+            print(f"⚠️  Anti-raid: mute des arrivants impossible sur {guild.name}: {e}")
+
+async def end_lockdown(guild, moderator, moderator_id=None):
+    """Rouvre les invitations avant la fin du confinement;
+    False si aucun n'était en cours
+    """
+    paused_until = guild.invites_paused_until
+    active = flood_guard.end_lockdown(guild.id) or (
+        paused_until is not None and paused_until > discord.utils.utcnow()
+    )
+    if not active:
+        return False
+    await dispatch(
+        guild.id,
+        NORMAL,
+        ('guild', guild.id),
+        lambda: guild.edit(
+            invites_disabled_until=None, reason="Fin du confinement anti-raid"
+        )
+    )
+    await log_action(
+        "unlock",
+        moderator,
+        guild.name,
+        str(guild.id),
+        None,
+        "Fin du confinement anti-raid",
+        moderator_id=moderator_id
+    )
+    return True
+
+def protection_embed(guild):
+    settings = {
+        key: settings_store.get(guild.id, key)
+        for key in (
+            'flood_enabled',
+            'flood_messages',
+            'flood_seconds',
+            'flood_mute_duration',
+            'raid_enabled',
+            'raid_joins',
+            'raid_seconds',
+            'raid_action',
+            'raid_lockdown_duration'
+        )
+    }
+    embed = discord.Embed(
+        title="🚨 Anti-flood / anti-raid", color=discord.Color.orange()
+    )
+    embed.add_field(
+        name=f"Anti-flood {'activé' if settings['flood_enabled'] else 'désactivé'}",
+        value=f"{settings['flood_messages']} messages en {settings['flood_seconds']} s "
+              f"→ mute {settings['flood_mute_duration']}",
+        inline=False
+    )
+    embed.add_field(
+        name=f"Anti-raid {'activé' if settings['raid_enabled'] else 'désactivé'}",
+        value=f"{settings['raid_joins']} arrivées en {settings['raid_seconds']} s → "
+              f"{settings['raid_action']} ({settings['raid_lockdown_duration']})"
+        + ("\n🔒 Confinement en cours" if flood_guard.in_lockdown(guild.id) else ""),
+        inline=False
+    )
+    return embed
+
+async def update_protection(ctx, values):
+    try:
+        await settings_store.update_async(ctx.guild.id, values)
+    except ValueError as e:
+        await ctx.send(f"❌ Valeur invalide: {e}")
+        return
+    await ctx.send(embed=protection_embed(ctx.guild))
+
+@bot.command(name='antiflood')
+@has_bot_permissions()
+async def anti_flood(ctx, option: Optional[str] = None, *, value: Optional[str] = None):
+    """Affiche ou règle l'anti-flood: on/off,
+    ou <messages> <secondes> [durée du mute]
+    """
+    if option is None:
+        await ctx.send(embed=protection_embed(ctx.guild))
+        return
+    if option.lower() in ('on', 'off'):
+        await update_protection(ctx, {'flood_enabled': option})
+        return
+    parts = [option] + (value or '').split()
+    if not 2 <= len(parts) <= 3:
+        await ctx.send(
+            f"❌ Utilisation: `{ctx.clean_prefix}antiflood [on|off]` ou "
+            f"`{ctx.clean_prefix}antiflood <messages> <secondes> [durée]`"
+        )
+        return
+    keys = ('flood_messages', 'flood_seconds', 'flood_mute_duration')
+    await update_protection(ctx, dict(zip(keys, parts, strict=False)))
+
+@bot.command(name='antiraid')
+@has_bot_permissions()
+async def anti_raid(ctx, option: Optional[str] = None, *, value: Optional[str] = None):
+    """Affiche ou règle l'anti-raid: on/off, end,
+    action <log|lockdown|mute> [durée], ou <arrivées> <secondes>
+    """
+    if option is None:
+        await ctx.send(embed=protection_embed(ctx.guild))
+        return
+    option = option.lower()
+    if option in ('on', 'off'):
+        await update_protection(ctx, {'raid_enabled': option})
+    elif option == 'end':
+        if await end_lockdown(ctx.guild, str(ctx.author), ctx.author.id):
+            await ctx.send("🔓 Confinement levé: les invitations sont rouvertes.")
+        else:
+            await ctx.send("Aucun confinement en cours.")
+    elif option == 'action' and value:
+        action, _, duration = value.partition(' ')
+        values = {'raid_action': action}
+        if duration:
+            values['raid_lockdown_duration'] = duration
+        await update_protection(ctx, values)
+    elif value and len(value.split()) == 1:
+        await update_protection(ctx, {'raid_joins': option, 'raid_seconds': value})
+    else:
+        await ctx.send(
+            f"❌ Utilisation: `{ctx.clean_prefix}antiraid [on|off|end]`, "
+            f"`{ctx.clean_prefix}antiraid action <log|lockdown|mute> [durée]` ou "
+            f"`{ctx.clean_prefix}antiraid <arrivées> <secondes>`"
+        )
+
+@bot.command(name='queuestats')
+@has_bot_permissions()
+async def queue_stats(ctx):
+    """Affiche l'état de la file d'appels Discord"""
+    stats = dispatcher.stats()
+    embed = discord.Embed(
+        title="📊 File d'actions",
+        color=discord.Color.blue()
+    )
+    embed.add_field(
+        name="En attente (serveur)",
+        value=str(dispatcher.queue_depth(ctx.guild.id)),
+        inline=True
+    )
+    embed.add_field(
+        name="En attente (total)", value=str(stats['queue_depth']), inline=True
+    )
+    embed.add_field(
+        name="Rate limits",
+        value=f"{stats['rate_limited']} ({stats['blocked_routes']} routes bloquées)",
+        inline=True
+    )
+    for name, values in stats['priorities'].items():
+        embed.add_field(
+            name=f"Priorité {name}",
+            value=f"{values['completed']}/{values['submitted']} terminées, "
+                  f"{values['failed']} échecs\nAttente moy. {values['avg_wait_ms']} "
+                  "ms, "
+                  f"max {values['max_wait_ms']} ms",
+            inline=False
+        )
+    await ctx.send(embed=embed)
+
+def format_bytes(size):
+    for unit in ('o', 'Ko', 'Mo'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'o' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} Go"
+
+@bot.command(name='cachestats')
+@has_bot_permissions()
+async def cache_stats(ctx):
+    """Mémoire estimée du cache de membres, par serveur"""
+    report = cache_profile.report(bot.guilds, member_index.stats)
+    embed = discord.Embed(
+        title=f"🧠 Cache gateway (profil {report['profile']})",
+        color=discord.Color.blue()
+    )
+    embed.add_field(
+        name="Processus", value=format_bytes(report['process_bytes']), inline=True
+    )
+    embed.add_field(
+        name="Cache membres (estimé)",
+        value=format_bytes(report['cache_bytes']),
+        inline=True
+    )
+    presence_updates = report['presence_updates']
+    embed.add_field(
+        name="Présences",
+        value=f"{presence_updates['applied']} appliquées, "
+              f"{presence_updates['skipped']} ignorées"
+        if report['presences']
+        else "désactivées",
+        inline=True
+    )
+    flood_stats = flood_guard.stats()
+    embed.add_field(
+        name="Anti-flood",
+        value=f"{flood_stats['tracked_users']} compteurs • "
+              f"{format_bytes(flood_stats['bytes'])}",
+        inline=True
+    )
+    for row in report['guilds'][:10]:
+        embed.add_field(
+            name=row['name'],
+            value=f"{row['cached_members']}/{row['member_count']} membres en mémoire • "
+                  f"{format_bytes(row['total_bytes'])}"
+            + (f" • index {row['index_entries']}" if row['index_entries'] else ""),
+            inline=False
+        )
+    await ctx.send(embed=embed)
+
 @bot.command(name='bothelp')
 async def help_command(ctx):
     """Affiche l'aide des commandes"""
@@ -297,19 +1540,65 @@ async def help_command(ctx):
     commands_list = [
         ("+mute @user [durée] [raison]", "Mute un utilisateur (ex: +mute @user 1d spam)"),
         ("+unmute @user [raison]", "Unmute un utilisateur"),
+        (
+            "+mutemode [timeout|role]",
+            "Mute via le timeout Discord (défaut) ou via le rôle Muted"
+        ),
         ("+ban @user [durée] [raison]", "Ban un utilisateur"),
         ("+kick @user [raison]", "Kick un utilisateur"),
         ("+warn @user [raison]", "Avertir un utilisateur"),
+        (
+            "+massban @user1 @user2... [durée] [raison]",
+            "Ban plusieurs utilisateurs (mentions ou IDs)"
+        ),
+        ("+masskick @user1 @user2... [raison]", "Kick plusieurs utilisateurs"),
+        ("+massmute @user1 @user2... [durée] [raison]", "Mute plusieurs utilisateurs"),
         ("+lock [raison]", "Verrouiller le channel actuel"),
         ("+unlock [raison]", "Déverrouiller le channel actuel"),
+        ("+modrole [@role...]", "Rôles autorisés à modérer (administrateurs)"),
+        (
+            "+muterole [@role]",
+            "Rôle utilisé par le mode de mute 'role' (administrateurs)"
+        ),
+        ("+prefix [préfixe]", "Préfixe des commandes du serveur (administrateurs)"),
+        (
+            "+retention [jours]",
+            "Durée de conservation des logs avant archivage (0 = illimitée)"
+        ),
+        (
+            "+automod [on|off|invites|links|mentions|action] [valeur]",
+            "Filtre automatique des messages (ex: +automod action mute 1h)"
+        ),
+        (
+            "+banword [terme1, terme2...]",
+            "Ajoute des termes interdits à l'AutoMod, ou les liste"
+        ),
+        ("+unbanword terme1, terme2...", "Retire des termes interdits"),
+        (
+            "+antiflood [on|off|messages secondes [durée]]",
+            "Mute automatique des membres qui floodent (ex: +antiflood 6 5 10m)"
+        ),
+        (
+            "+antiraid [on|off|end|action|arrivées secondes]",
+            "Détection des arrivées en masse (ex: +antiraid action mute 1h)"
+        ),
+        ("+queuestats", "État de la file d'actions (attente, rate limits)"),
+        ("+cachestats", "Mémoire du cache de membres par serveur"),
         ("+bothelp", "Afficher cette aide")
     ]
     
     for command, description in commands_list:
-        embed.add_field(name=command, value=description, inline=False)
+        embed.add_field(
+            name=ctx.clean_prefix + command[1:], value=description, inline=False
+        )
     
     embed.add_field(name="Durées supportées", value="s = secondes, m = minutes, h = heures, d = jours\nExemple: 30s, 5m, 2h, 1d", inline=False)
-    embed.add_field(name="Permissions", value="Seuls les administrateurs et les utilisateurs avec le rôle 'bot' peuvent utiliser ces commandes.", inline=False)
+    embed.add_field(
+        name="Permissions",
+        value="Seuls les administrateurs et les rôles modérateurs (rôle 'bot' par "
+              "défaut, voir +modrole) peuvent utiliser ces commandes.",
+        inline=False
+    )
     
     await ctx.send(embed=embed)
 
@@ -321,7 +1610,10 @@ async def on_command_error(ctx, error):
     elif isinstance(error, commands.MemberNotFound):
         await ctx.send("❌ Utilisateur introuvable.")
     elif isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send("❌ Arguments manquants. Utilisez +help pour voir la syntaxe.")
+        await ctx.send(
+            f"❌ Arguments manquants. Utilisez {ctx.clean_prefix}bothelp pour voir la "
+            "syntaxe."
+        )
     else:
         await ctx.send(f"❌ Une erreur s'est produite: {str(error)}")
 
@@ -333,32 +1625,222 @@ def get_bot():
     global current_bot
     return current_bot
 
+WEB_MODERATOR = "Web Interface"
+USER_COMMANDS = ('mute', 'unmute', 'ban', 'kick', 'warn')
+CHANNEL_COMMANDS = ('lock', 'unlock')
+
 async def execute_bot_command(guild_id, command_name, user_id=None, reason=None, duration=None, channel_id=None):
-    """Exécute une commande bot depuis l'interface web"""
+    """Exécute une commande bot depuis l'interface web
+    (mêmes actions que les commandes préfixées)
+    """
     global current_bot
     if not current_bot or not current_bot.is_ready():
         return False, "Bot non connecté"
+    if command_name not in USER_COMMANDS + CHANNEL_COMMANDS:
+        return False, "Commande inconnue"
+    if duration and not parse_duration(duration):
+        return False, "Durée invalide (ex: 30s, 5m, 2h, 1d)"
     
     try:
         guild = current_bot.get_guild(int(guild_id))
         if not guild:
             return False, "Serveur non trouvé"
+        reason = reason or settings_store.get(guild.id, 'default_reason')
         
-        if command_name in ['mute', 'unmute', 'ban', 'kick', 'warn'] and user_id:
-            member = guild.get_member(int(user_id))
-            if not member:
-                return False, "Utilisateur non trouvé"
+        if command_name in CHANNEL_COMMANDS:
+            channel = guild.get_channel(int(channel_id)) if channel_id else None
+            if channel is None:
+                return False, "Canal non trouvé"
+            if command_name == 'lock':
+                await perform_lock(guild, channel, reason, WEB_MODERATOR)
+                return True, f"#{channel.name} verrouillé"
+            await perform_unlock(guild, channel, reason, WEB_MODERATOR)
+            return True, f"#{channel.name} déverrouillé"
         
-        # Log l'action dans la base
-        if user_id:
-            log_action(command_name, "Web Interface", f"<@{user_id}>", str(guild_id), duration, reason, channel_id)
-        elif channel_id:
-            log_action(command_name, "Web Interface", f"<#{channel_id}>", str(guild_id), duration, reason, channel_id)
+        member = (
+            await cache_profile.resolve_member(guild, int(user_id)) if user_id else None
+        )
+        if not member:
+            return False, "Utilisateur non trouvé"
         
-        return True, "Commande exécutée avec succès"
+        if command_name == 'mute':
+            applied, logged_duration = await perform_mute(
+                guild, member, duration, reason, WEB_MODERATOR
+            )
+            return True, f"{member} muté " + (
+                f"pour {logged_duration}" if applied else "indéfiniment"
+            )
+        if command_name == 'unmute':
+            if not await perform_unmute(guild, member, reason, WEB_MODERATOR):
+                return False, "Cet utilisateur n'est pas muté"
+            return True, f"{member} démuté"
+        if command_name == 'ban':
+            await perform_ban(guild, member, duration, reason, WEB_MODERATOR)
+            return True, f"{member} banni " + (
+                f"pour {duration}" if duration else "définitivement"
+            )
+        if command_name == 'kick':
+            await perform_kick(guild, member, reason, WEB_MODERATOR)
+            return True, f"{member} kické"
+        delivered = await perform_warn(guild, member, reason, WEB_MODERATOR)
+        return True, f"{member} averti" + ("" if delivered else " (DM impossible)")
+    except discord.Forbidden:
+        return False, "Permissions Discord insuffisantes"
     except Exception as e:
         return False, f"Erreur: {str(e)}"
 
+async def execute_mass_command(
+    guild_id, command_name, user_ids, reason=None, duration=None
+):
+    """Exécute une action de masse depuis l'interface web"""
+    global current_bot
+    if not current_bot or not current_bot.is_ready():
+        return False, "Bot non connecté", None
+    if command_name not in MASS_ACTION_TITLES:
+        return False, "Action de masse inconnue", None
+    
+    try:
+        guild = current_bot.get_guild(int(guild_id))
+        if not guild:
+            return False, "Serveur non trouvé", None
+        
+        reason = reason or settings_store.get(guild.id, 'default_reason')
+        summary = await run_mass_action(
+            guild, command_name, user_ids, WEB_MODERATOR, None, reason, duration
+        )
+        return (
+            True,
+            f"{len(summary['succeeded'])}/{summary['requested']} cibles traitées",
+            summary
+        )
+    except Exception as e:
+        return False, f"Erreur: {str(e)}", None
+
+# Requêtes du dashboard (web_server_new.py), exécutées sur l'event loop du bot
+@ipc_server.handler('status')
+async def ipc_status(since=None):
+    return status_snapshot.status(since)
+
+def member_to_dict(member):
+    return {
+        'id': str(member.id),
+        'name': member.name,
+        'display_name': member.display_name,
+        'avatar': str(member.avatar.url) if member.avatar else None,
+        # Sans intent présences, le statut est inconnu
+        'status': str(member.status) if cache_profile.presences else 'unknown',
+        'roles': [role.name for role in member.roles[1:]]  # Exclure @everyone
+    }
+
+@ipc_server.handler('members')
+async def ipc_members(
+    guild_id,
+    q=None,
+    mode='prefix',
+    role_id=None,
+    status=None,
+    include_bots=False,
+    cursor=None,
+    limit=50
+):
+    guild = bot.get_guild(int(guild_id))
+    if not guild:
+        return {'members': [], 'next_cursor': None, 'total': 0}
+    if status and not cache_profile.presences:
+        raise ValueError(
+            "Filtre par statut indisponible: présences désactivées (profil lean)"
+        )
+    # Profil lean: liste complète chargée à la demande,
+    # l'index partiel est alors reconstruit
+    was_chunked = guild.chunked
+    if not await cache_profile.ensure_directory(guild):
+        return {
+            'members': [],
+            'next_cursor': None,
+            'total': guild.member_count,
+            'loading': True
+        }
+    if not was_chunked and cache_profile.bounded:
+        member_index.drop(guild.id)
+    # Index construit hors de l'event loop:
+    # le dashboard réessaie tant qu'il n'est pas prêt
+    if not await member_index.ready(guild):
+        return {
+            'members': [],
+            'next_cursor': None,
+            'total': guild.member_count,
+            'loading': True
+        }
+    members, next_cursor = member_index.search(
+        guild, q, mode, role_id, status, include_bots, cursor, limit
+    )
+    return {
+        'members': [member_to_dict(member) for member in members],
+        'next_cursor': next_cursor,
+        'total': guild.member_count
+    }
+
+@ipc_server.handler('cache')
+async def ipc_cache():
+    return cache_profile.report(bot.guilds, member_index.stats)
+
+@ipc_server.handler('roles')
+async def ipc_roles(guild_id):
+    guild = bot.get_guild(int(guild_id))
+    if not guild:
+        return []
+    return [
+        {'id': str(role.id), 'name': role.name}
+        for role in reversed(guild.roles)
+        if not role.is_default()
+    ]
+
+@ipc_server.handler('channels')
+async def ipc_channels(guild_id):
+    guild = bot.get_guild(int(guild_id))
+    if not guild:
+        return []
+    return [
+        {
+            'id': str(channel.id),
+            'name': channel.name,
+            'type': str(channel.type),
+            'category': channel.category.name if channel.category else None
+        }
+        for channel in guild.channels
+        if hasattr(channel, 'send')  # Canaux texte seulement
+    ]
+
+@ipc_server.handler('execute')
+async def ipc_execute(
+    guild_id, command, user_id=None, reason=None, duration=None, channel_id=None
+):
+    success, message = await execute_bot_command(
+        guild_id, command, user_id, reason, duration, channel_id
+    )
+    return {'success': success, 'message': message}
+
+@ipc_server.handler('settings_changed')
+async def ipc_settings_changed(guild_id, keys=()):
+    """Paramètres modifiés par le dashboard:
+    relecture du serveur, appliqués sans redémarrage
+    """
+    guild_id = int(guild_id)
+    settings_store.invalidate(guild_id)
+    if guild_id == GLOBAL:
+        if bot.is_ready():
+            await apply_presence()
+    elif {'moderator_role_ids', 'mute_role_id'} & set(keys):
+        role_cache.drop(guild_id)
+    return {'reloaded': True}
+
+@ipc_server.handler('mass')
+async def ipc_mass(guild_id, command, user_ids, reason=None, duration=None):
+    success, message, summary = await execute_mass_command(
+        guild_id, command, user_ids, reason, duration
+    )
+    return {'success': success, 'message': message, 'summary': summary}
+
 def start_bot():
     """Démarre le bot de façon synchrone"""
     global current_bot
@@ -368,6 +1850,9 @@ def start_bot():
         print("❌ Impossible de démarrer le bot sans token")
         return False
     
+    # Schéma créé une seule fois au démarrage, pas à chaque reconnexion
+    init_database()
+    
     try:
         bot.run(token)
         return True
@@ -380,6 +1865,10 @@ def start_bot():
     except Exception as e:
         print(f"Erreur lors du démarrage du bot: {e}")
         return False
+    finally:
+        # Garantit que les logs en attente sont écrits avant de quitter
+        log_writer.close()
+        print(f"📝 Logs écrits: {log_writer.stats()}")
 
 # Run the bot
 if __name__ == "__main__":
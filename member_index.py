@@ -0,0 +1,301 @@
+"""
+Index des membres par serveur pour l'annuaire du dashboard
+Listes triées (nom affiché, nom d'utilisateur) tenues à jour par les événements
+gateway: recherche par préfixe en O(log n), sous-chaîne et filtres avec un budget de
+parcours borné
+"""
+import asyncio
+import base64
+import sys
+from bisect import bisect_left, bisect_right, insort
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# Entrées examinées au plus par requête (recherche par sous-chaîne,
+# filtres sans recherche)
+MAX_SCAN = 20000
+# Attente maximale de la construction d'un index dans une requête du dashboard
+# (secondes)
+BUILD_WAIT = 1.0
+STATUSES = ('online', 'idle', 'dnd', 'offline')
+SEARCH_MODES = ('prefix', 'substring')
+
+
+def _fold(text):
+    return (text or '').casefold()
+
+
+def _key(text, member_id):
+    # Clé triable en une seule chaîne (bien plus rapide à trier que des tuples)
+    return f'{_fold(text)}\x00{member_id:020d}'
+
+
+def _key_id(key):
+    return int(key[-20:])
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Curseur opaque -> clé de tri; lève ValueError si invalide"""
+    try:
+        key = base64.urlsafe_b64decode(cursor.encode()).decode()
+        _key_id(key)
+        return key
+    except Exception:
+        raise ValueError("Curseur invalide") from None
+
+
+class GuildIndex:
+    """Membres d'un serveur triés par nom affiché et par nom d'utilisateur"""
+
+    def __init__(self, members=()):
+        self._keys = {
+            member.id: (
+                _key(member.display_name, member.id),
+                _key(member.name, member.id)
+            )
+            for member in members
+        }
+        self._by_display = sorted(display for display, _ in self._keys.values())
+        self._by_name = sorted(name for _, name in self._keys.values())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, member):
+        if member.id in self._keys:
+            self.remove(member.id)
+        display, name = (
+            _key(member.display_name, member.id),
+            _key(member.name, member.id)
+        )
+        self._keys[member.id] = (display, name)
+        insort(self._by_display, display)
+        insort(self._by_name, name)
+
+    def remove(self, member_id):
+        keys = self._keys.pop(member_id, None)
+        if keys is None:
+            return
+        for entries, key in zip((self._by_display, self._by_name), keys, strict=True):
+            position = bisect_left(entries, key)
+            if position < len(entries) and entries[position] == key:
+                del entries[position]
+
+    def update(self, member):
+        """Réindexe si le nom affiché ou le nom d'utilisateur a changé"""
+        if self._keys.get(member.id) != (
+            _key(member.display_name, member.id),
+            _key(member.name, member.id)
+        ):
+            self.add(member)
+
+    def memory(self):
+        """Octets approximatifs: listes triées,
+        clés (partagées par les listes et le dict) et tuples
+        """
+        sample = self._by_display[:64] + self._by_name[:64]
+        per_key = sum(map(sys.getsizeof, sample)) / len(sample) if sample else 0
+        count = len(self._keys)
+        return int(
+            sys.getsizeof(self._keys)
+            + sys.getsizeof(self._by_display)
+            + sys.getsizeof(self._by_name)
+            + count * (2 * per_key + sys.getsizeof((0, 0)))
+        )
+
+    def _prefix_ranges(self, prefix):
+        """Bornes des entrées commençant par prefix dans chacune des deux listes"""
+        upper = prefix + '\U0010ffff'
+        return [
+            (entries, bisect_left(entries, prefix), bisect_left(entries, upper))
+            for entries in (self._by_display, self._by_name)
+        ]
+
+    def page(
+        self, query=None, mode='prefix', accept=None, after=None, limit=DEFAULT_LIMIT
+    ):
+        """Une page d'ids dans l'ordre du nom affiché
+
+        accept(member_id) -> bool applique les filtres (rôle, statut, bots).
+        Retourne (ids, next_key): next_key vaut None quand il n'y a plus rien après.
+        """
+        query = _fold(query).strip()
+        match = None
+        entries = self._by_display
+        budget = MAX_SCAN
+        if query and mode == 'prefix':
+            ranges = self._prefix_ranges(query)
+            if sum(end - start for _, start, end in ranges) <= MAX_SCAN:
+                # Peu de correspondances: on les trie directement
+                ids = {
+                    _key_id(key)
+                    for source, start, end in ranges
+                    for key in source[start:end]
+                }
+                entries = sorted(self._keys[member_id][0] for member_id in ids)
+                budget = len(entries)
+            else:
+                # Préfixe très courant: parcours borné de l'ordre d'affichage
+                def match(display, name):
+                    return display.startswith(query) or name.startswith(query)
+        elif query:
+            def match(display, name):
+                return (
+                    query in display.rpartition('\x00')[0]
+                    or query in name.rpartition('\x00')[0]
+                )
+        position = bisect_right(entries, after) if after else 0
+
+        ids = []
+        last_key = None
+        scanned = 0
+        while position < len(entries) and scanned < budget:
+            key = entries[position]
+            position += 1
+            scanned += 1
+            member_id = _key_id(key)
+            if match is not None and not match(key, self._keys[member_id][1]):
+                continue
+            if accept is not None and not accept(member_id):
+                continue
+            if len(ids) == limit:
+                # Il reste au moins un résultat: la page s'arrête au précédent
+                return ids, last_key
+            ids.append(member_id)
+            last_key = key
+
+        if position < len(entries):
+            # Budget épuisé: on reprendra à la dernière entrée examinée
+            return ids, entries[position - 1]
+        return ids, None
+
+
+class _Build:
+    """Construction en cours: événements reçus entre-temps,
+    rejoués sur l'index terminé
+    """
+    __slots__ = ('future', 'pending')
+
+    def __init__(self, future):
+        self.future = future
+        self.pending = []
+
+
+class MemberIndex:
+    """Index par serveur, construit à la première consultation puis tenu à jour
+
+    Les événements gateway maintiennent l'index. Le tri (près d'une seconde pour
+    200 000 membres) se fait dans un thread de l'executor: l'event loop (heartbeat
+    gateway, commandes) n'est jamais bloqué.
+    """
+
+    def __init__(self):
+        self._guilds = {}
+        self._building = {}
+
+    async def ready(self, guild, wait=BUILD_WAIT):
+        """Index du serveur prêt; False s'il est encore en construction
+        (le dashboard réessaie)
+        """
+        if guild.id in self._guilds:
+            return True
+        build = self._building.get(guild.id)
+        if build is None:
+            # Copie prise sur l'event loop: les événements suivants sont mis en attente
+            members = list(guild.members)
+            future = asyncio.get_running_loop().run_in_executor(
+                None, GuildIndex, members
+            )
+            build = self._building[guild.id] = _Build(future)
+            future.add_done_callback(
+                lambda _done, guild_id=guild.id, build=build: self._built(
+                    guild_id, build
+                )
+            )
+        # La construction continue si la requête abandonne
+        await asyncio.wait({build.future}, timeout=wait)
+        return guild.id in self._guilds
+
+    def _built(self, guild_id, build):
+        if self._building.get(guild_id) is not build:
+            return  # Oublié (drop) pendant la construction
+        del self._building[guild_id]
+        if build.future.cancelled() or build.future.exception() is not None:
+            print(
+                f"Erreur construction de l'index des membres ({guild_id}): "
+                f"{build.future.exception()}"
+            )
+            return
+        index = build.future.result()
+        for method, arg in build.pending:
+            getattr(index, method)(arg)
+        self._guilds[guild_id] = index
+
+    def _apply(self, guild_id, method, arg):
+        index = self._guilds.get(guild_id)
+        if index is not None:
+            getattr(index, method)(arg)
+            return
+        build = self._building.get(guild_id)
+        if build is not None:
+            build.pending.append((method, arg))
+
+    def on_join(self, member):
+        self._apply(member.guild.id, 'add', member)
+
+    def on_remove(self, member):
+        self._apply(member.guild.id, 'remove', member.id)
+
+    def on_update(self, member):
+        self._apply(member.guild.id, 'update', member)
+
+    def drop(self, guild_id):
+        self._guilds.pop(guild_id, None)
+        self._building.pop(guild_id, None)
+
+    def stats(self, guild_id):
+        """(entrées, octets approximatifs) de l'index d'un serveur,
+        None s'il n'est pas construit
+        """
+        index = self._guilds.get(guild_id)
+        return (len(index), index.memory()) if index is not None else None
+
+    def search(
+        self,
+        guild,
+        query=None,
+        mode='prefix',
+        role_id=None,
+        status=None,
+        include_bots=False,
+        cursor=None,
+        limit=DEFAULT_LIMIT
+    ):
+        """Recherche paginée (index prêt, voir ready);
+        retourne (membres discord.py, next_cursor)
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError("Mode de recherche inconnu")
+        if status and status not in STATUSES:
+            raise ValueError("Statut inconnu")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        after = decode_cursor(cursor) if cursor else None
+        role_id = int(role_id) if role_id else None
+
+        def accept(member_id):
+            member = guild.get_member(member_id)
+            if member is None:
+                return False
+            if member.bot and not include_bots:
+                return False
+            if role_id is not None and member.get_role(role_id) is None:
+                return False
+            return not status or str(member.status) == status
+
+        ids, next_key = self._guilds[guild.id].page(query, mode, accept, after, limit)
+        members = [guild.get_member(member_id) for member_id in ids]
+        return members, encode_cursor(next_key) if next_key else None
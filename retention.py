@@ -0,0 +1,306 @@
+"""
+Rétention des logs de modération
+Les logs plus anciens que la durée de rétention du serveur sont déplacés dans des
+archives gzip partitionnées par serveur et par mois, puis supprimés de la base;
+l'espace libéré est rendu au disque par petits pas de vacuum incrémental
+
+Rétention désactivée par défaut: LOG_RETENTION_DAYS (jours) pour tous les serveurs,
+ou +retention <jours> par serveur.
+Le vacuum incrémental demande une conversion unique de la base, qui la réécrit en
+entier: à lancer une fois, bot et dashboard arrêtés, avec
+    python retention.py --enable-incremental-vacuum
+Sans elle, les pages libérées sont seulement réutilisées par les écritures suivantes.
+
+Archives: <ARCHIVE_DIR>/<guild_id|unknown>/<AAAA-MM>.ndjson.gz (une ligne JSON par log)
+Utilisation manuelle: python retention.py [--dry-run | --enable-incremental-vacuum]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import storage
+
+# Durée de conservation en base réglable par serveur (défaut: LOG_RETENTION_DAYS)
+from guild_settings import settings_store
+
+ARCHIVE_DIR = os.getenv('MODERATION_ARCHIVE_DIR', 'archives')
+SETTING_KEY = 'log_retention_days'
+# Intervalle entre deux passes dans le bot (secondes)
+RETENTION_INTERVAL = int(os.getenv('LOG_RETENTION_INTERVAL', str(6 * 3600)))
+# Pause entre deux lots pour laisser passer les écritures du bot
+BATCH_PAUSE = 0.05
+FIELDS = (
+    'id',
+    'timestamp',
+    'action',
+    'moderator',
+    'target',
+    'duration',
+    'reason',
+    'guild_id',
+    'channel_id',
+    'ts'
+)
+
+
+def retention_days(guild_sf):
+    """Durée de rétention d'un serveur (jours, 0 = illimitée)"""
+    return settings_store.get(guild_sf, SETTING_KEY)
+
+
+def _month(ts):
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime('%Y-%m')
+
+
+def _guild_dir(guild_sf):
+    return os.path.join(ARCHIVE_DIR, str(guild_sf) if guild_sf else 'unknown')
+
+
+def _append_partition(path, rows):
+    """Ajoute un membre gzip à la partition
+    (un fichier gzip peut en enchaîner plusieurs)
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = ''.join(
+        json.dumps(
+            {field: row[field] for field in FIELDS},
+            ensure_ascii=False,
+            separators=(',', ':')
+        )
+        + '\n'
+        for row in rows
+    ).encode()
+    with open(path, 'ab') as f:
+        f.write(gzip.compress(data))
+        f.flush()
+        # Sur disque avant la suppression en base
+        os.fsync(f.fileno())
+
+
+def archive_guild(guild_sf, cutoff_ms, dry_run=False):
+    """Archive puis supprime les logs d'un serveur antérieurs à cutoff_ms;
+    retourne le nombre de logs
+    """
+    if dry_run:
+        return storage.count_expired_logs(guild_sf, cutoff_ms)
+    archived = 0
+    while True:
+        rows = storage.fetch_expired_logs(guild_sf, cutoff_ms)
+        if not rows:
+            break
+        partitions = {}
+        for row in rows:
+            partitions.setdefault(_month(row['ts']), []).append(row)
+        for month, partition_rows in partitions.items():
+            _append_partition(
+                os.path.join(_guild_dir(guild_sf), f'{month}.ndjson.gz'), partition_rows
+            )
+        # Un arrêt entre l'écriture et la suppression laisse au pire un doublon,
+        # ignoré à la lecture
+        storage.delete_archived_logs(rows)
+        archived += len(rows)
+        if len(rows) < storage.RETENTION_BATCH_SIZE:
+            break
+        time.sleep(BATCH_PAUSE)
+    return archived
+
+
+def compact(max_seconds=30):
+    """Vacuum incrémental par petits pas; retourne le nombre de pages rendues"""
+    if not storage.incremental_vacuum_enabled():
+        storage.checkpoint()
+        return 0
+    start = storage.free_pages()
+    deadline = time.monotonic() + max_seconds
+    remaining = start
+    while remaining and time.monotonic() < deadline:
+        remaining = storage.vacuum_step()
+        time.sleep(BATCH_PAUSE)
+    storage.checkpoint()
+    return start - remaining
+
+
+def run_once(dry_run=False):
+    """Une passe complète: archivage de chaque serveur puis compaction"""
+    storage.init_database()
+    now_ms = int(time.time() * 1000)
+    archived = {}
+    for guild_sf in storage.log_guilds():
+        days = retention_days(guild_sf)
+        if days <= 0:
+            continue
+        count = archive_guild(guild_sf, now_ms - days * 86400000, dry_run)
+        if count:
+            archived[str(guild_sf or 'unknown')] = count
+    pages = 0 if dry_run else compact()
+    return {'archived': archived, 'pages_freed': pages}
+
+
+async def run_forever(interval=RETENTION_INTERVAL):
+    """Boucle du bot: une passe toutes les interval secondes, hors de l'event loop"""
+    while True:
+        try:
+            summary = await asyncio.to_thread(run_once)
+            total = sum(summary['archived'].values())
+            if total or summary['pages_freed']:
+                print(
+                    f"🗄️ Rétention: {total} logs archivés, {summary['pages_freed']} "
+                    "pages libérées"
+                )
+        except Exception as e:
+            print(f"Erreur rétention des logs: {e}")
+        await asyncio.sleep(interval)
+
+
+def _partitions(guild_id=None, ts_from=None, ts_to=None):
+    """Fichiers d'archive concernés, du mois le plus récent au plus ancien"""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    if guild_id:
+        guild_sf = storage.to_snowflake(guild_id)
+        guild_dirs = [_guild_dir(guild_sf)]
+    else:
+        guild_dirs = [
+            os.path.join(ARCHIVE_DIR, name) for name in os.listdir(ARCHIVE_DIR)
+        ]
+    # Partitions en mois UTC: les bornes locales sont converties
+    first = _month(ts_from) if ts_from is not None else None
+    last = _month(ts_to - 1) if ts_to is not None else None
+
+    by_month = {}
+    for directory in guild_dirs:
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            month = name.split('.')[0]
+            if (
+                name.endswith('.ndjson.gz')
+                and (not first or month >= first)
+                and (not last or month <= last)
+            ):
+                by_month.setdefault(month, []).append(os.path.join(directory, name))
+    return [
+        path for month in sorted(by_month, reverse=True) for path in by_month[month]
+    ]
+
+
+def query_archive(
+    guild_id=None,
+    action_type=None,
+    moderator=None,
+    target=None,
+    date_from=None,
+    date_to=None,
+    order='desc',
+    limit=storage.DEFAULT_PAGE_SIZE,
+    cursor=None
+):
+    """Page de logs archivés, mêmes filtres et même curseur (ts, id) que query_logs
+
+    Lecture à la demande: seules les partitions du serveur et des mois demandés sont
+    décompressées.
+    """
+    limit = max(1, min(int(limit), storage.MAX_PAGE_SIZE))
+    descending = order != 'asc'
+    after = storage.decode_cursor(cursor) if cursor else None
+    ts_from = storage._date_to_epoch_ms(date_from) if date_from else None
+    ts_to = storage._date_to_epoch_ms(date_to, end=True) if date_to else None
+    moderator = moderator.casefold() if moderator else None
+    target = target.casefold() if target else None
+
+    def matches(log):
+        key = (log['ts'], log['id'])
+        if after and (key >= after if descending else key <= after):
+            return False
+        if action_type and log['action'] != action_type:
+            return False
+        if moderator and moderator not in log['moderator'].casefold():
+            return False
+        if target and target not in log['target'].casefold():
+            return False
+        if ts_from is not None and log['ts'] < ts_from:
+            return False
+        return ts_to is None or log['ts'] < ts_to
+
+    # Le curseur borne aussi les mois à lire: une page profonde ne relit pas les
+    # partitions déjà parcourues
+    first_ts, last_ts = ts_from, ts_to
+    if after and descending:
+        last_ts = after[0] + 1 if last_ts is None else min(last_ts, after[0] + 1)
+    elif after:
+        first_ts = after[0] if first_ts is None else max(first_ts, after[0])
+    partitions = _partitions(guild_id, first_ts, last_ts)
+    if not descending:
+        partitions.reverse()
+    # Les partitions d'un même mois (plusieurs serveurs) sont fusionnées avant le tri
+    results = []
+    month_rows = {}
+    for index, path in enumerate(partitions):
+        month = os.path.basename(path).split('.')[0]
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                log = json.loads(line)
+                if matches(log):
+                    month_rows[log['id']] = log
+        next_month = (
+            os.path.basename(partitions[index + 1]).split('.')[0]
+            if index + 1 < len(partitions)
+            else None
+        )
+        if next_month == month:
+            continue
+        results.extend(
+            sorted(
+                month_rows.values(),
+                key=lambda log: (log['ts'], log['id']),
+                reverse=descending
+            )
+        )
+        month_rows = {}
+        if len(results) > limit:
+            break
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = storage.encode_cursor(results[-1]['ts'], results[-1]['id'])
+    for log in results:
+        del log['ts']
+    return results, next_cursor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Archive les logs expirés et compacte la base"
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help="compte les logs à archiver sans rien modifier"
+    )
+    parser.add_argument(
+        '--enable-incremental-vacuum',
+        action='store_true',
+        help="conversion unique de la base (VACUUM complet), bot arrêté"
+    )
+    options = parser.parse_args(argv)
+    try:
+        if options.enable_incremental_vacuum:
+            print("🗃️ VACUUM complet pour activer l'auto_vacuum incrémental...")
+            if storage.enable_incremental_vacuum():
+                print("✅ Auto_vacuum incrémental activé")
+            else:
+                print("ℹ️ Auto_vacuum incrémental déjà actif")
+            return
+        summary = run_once(options.dry_run)
+    finally:
+        storage.close_connections()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
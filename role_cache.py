@@ -0,0 +1,146 @@
+"""
+Résolution des rôles de modération par serveur
+Les rôles modérateur ("bot") et "Muted" sont retrouvés par nom une seule fois, puis
+épinglés par ID dans les paramètres du serveur: un renommage ne casse plus rien et les
+vérifications de permissions deviennent des recherches dans un ensemble d'IDs
+"""
+import asyncio
+
+from guild_settings import settings_store
+
+MODERATOR_SETTING = 'moderator_role_ids'
+MUTE_SETTING = 'mute_role_id'
+# Noms recherchés quand aucun rôle n'est encore épinglé
+MODERATOR_ROLE_NAME = 'bot'
+MUTE_ROLE_NAME = 'Muted'
+
+
+class GuildRoles:
+    __slots__ = ('moderator_ids', 'mute_id')
+
+    def __init__(self, moderator_ids=(), mute_id=None):
+        self.moderator_ids = set(moderator_ids)
+        self.mute_id = mute_id
+
+
+class RoleCache:
+    """IDs des rôles de modération par serveur,
+    tenus à jour par les événements de rôles
+    """
+
+    def __init__(self):
+        self._guilds = {}
+        # Écritures des rôles épinglés en cours (références gardées jusqu'à la fin)
+        self._writes = set()
+
+    def get(self, guild):
+        entry = self._guilds.get(guild.id)
+        if entry is None:
+            entry = self._guilds[guild.id] = self._load(guild)
+        return entry
+
+    def _load(self, guild):
+        entry = GuildRoles(
+            settings_store.get(guild.id, MODERATOR_SETTING),
+            settings_store.get(guild.id, MUTE_SETTING)
+        )
+        # Rôles épinglés supprimés pendant que le bot était arrêté
+        entry.moderator_ids = {
+            role_id for role_id in entry.moderator_ids if guild.get_role(role_id)
+        }
+        if entry.mute_id and guild.get_role(entry.mute_id) is None:
+            entry.mute_id = None
+
+        self._resolve_by_name(guild, entry)
+        return entry
+
+    def _resolve_by_name(self, guild, entry):
+        """Résolution par nom des rôles manquants (un seul parcours des rôles),
+        puis épinglage
+        """
+        if entry.moderator_ids and entry.mute_id is not None:
+            return
+        for role in guild.roles:
+            if not entry.moderator_ids and role.name.lower() == MODERATOR_ROLE_NAME:
+                self._pin_moderators(guild.id, entry, {role.id})
+            elif entry.mute_id is None and role.name == MUTE_ROLE_NAME:
+                self._pin_mute(guild.id, entry, role.id)
+
+    def _pin_moderators(self, guild_id, entry, role_ids):
+        entry.moderator_ids = set(role_ids)
+        self._persist(guild_id, MODERATOR_SETTING, role_ids)
+
+    def _pin_mute(self, guild_id, entry, role_id):
+        entry.mute_id = role_id
+        self._persist(guild_id, MUTE_SETTING, role_id)
+
+    def _persist(self, guild_id, key, value):
+        """Enregistre un rôle épinglé sans bloquer l'event loop
+        (le cache local est déjà à jour)
+        """
+        task = asyncio.get_running_loop().create_task(
+            settings_store.set_async(guild_id, key, value)
+        )
+        self._writes.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _write_done(self, task):
+        self._writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Erreur enregistrement des rôles de modération: {task.exception()}")
+
+    def is_moderator(self, member):
+        """Administrateur ou porteur d'un rôle modérateur"""
+        if member.guild_permissions.administrator:
+            return True
+        # Parcourt les rôles modérateurs (1 ou 2), pas les rôles du membre
+        return any(
+            member.get_role(role_id) is not None
+            for role_id in self.get(member.guild).moderator_ids
+        )
+
+    def moderator_roles(self, guild):
+        return [
+            role
+            for role in map(guild.get_role, self.get(guild).moderator_ids)
+            if role is not None
+        ]
+
+    def mute_role(self, guild):
+        entry = self.get(guild)
+        return guild.get_role(entry.mute_id) if entry.mute_id else None
+
+    def set_moderator_roles(self, guild, roles):
+        self._pin_moderators(guild.id, self.get(guild), {role.id for role in roles})
+
+    def set_mute_role(self, guild, role):
+        self._pin_mute(guild.id, self.get(guild), role.id if role else None)
+
+    # Événements gateway
+    def on_role_create(self, role):
+        entry = self._guilds.get(role.guild.id)
+        if entry is None:
+            return
+        if not entry.moderator_ids and role.name.lower() == MODERATOR_ROLE_NAME:
+            self._pin_moderators(role.guild.id, entry, {role.id})
+        elif entry.mute_id is None and role.name == MUTE_ROLE_NAME:
+            self._pin_mute(role.guild.id, entry, role.id)
+
+    def on_role_update(self, role):
+        # Un rôle épinglé garde son ID quand il est renommé;
+        # seul un rôle renommé vers un nom attendu compte
+        self.on_role_create(role)
+
+    def on_role_delete(self, role):
+        entry = self._guilds.get(role.guild.id)
+        if entry is None:
+            return
+        if role.id in entry.moderator_ids:
+            self._pin_moderators(role.guild.id, entry, entry.moderator_ids - {role.id})
+        if role.id == entry.mute_id:
+            self._pin_mute(role.guild.id, entry, None)
+        # Un autre rôle du même nom peut prendre le relais
+        self._resolve_by_name(role.guild, entry)
+
+    def drop(self, guild_id):
+        self._guilds.pop(guild_id, None)
@@ -0,0 +1,206 @@
+"""
+Planificateur des expirations (fin de mute, fin de ban temporaire)
+Les échéances sont stockées en base et rechargées dans un tas au démarrage
+"""
+import asyncio
+import contextlib
+import heapq
+import time
+from datetime import timedelta
+
+import storage
+
+# Les expirations à moins de GRACE secondes près sont traitées dans le même lot
+GRACE = 1.0
+# Réveil maximal du timer, même sans échéance proche
+MAX_SLEEP = 3600
+# Nouvelles tentatives en cas d'échec (erreur Discord temporaire...)
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 60
+
+
+class ExpiryScheduler:
+    """Tas min des échéances + une seule tâche qui dort jusqu'à la prochaine"""
+
+    def __init__(self, bot, owns=None):
+        self.bot = bot
+        # owns(guild_id): ce processus héberge-t-il ce serveur ?
+        # (déploiement en clusters)
+        self.owns = owns or (lambda _guild_id: True)
+        self.handlers = {}
+        self._heap = []
+        self._entries = {}
+        self._by_target = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+        self.processed = 0
+        self.failed = 0
+
+    def handler(self, action):
+        """Décorateur: enregistre la coroutine (guild, entry) exécutée à l'échéance"""
+        def decorator(func):
+            self.handlers[action] = func
+            return func
+        return decorator
+
+    async def start(self):
+        """Charge les échéances en attente et lance le timer (idempotent)"""
+        if self._task is not None and not self._task.done():
+            return
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(None, storage.fetch_scheduled_actions)
+        # Les échéances des serveurs d'un autre cluster restent en base pour lui
+        rows = [entry for entry in rows if self.owns(entry['guild_sf'])]
+        for entry in rows:
+            self._push(entry)
+        overdue = sum(1 for entry in rows if entry['due_ts'] <= time.time() * 1000)
+        print(f"⏰ {len(rows)} expirations chargées ({overdue} en retard)")
+        self._task = asyncio.create_task(self._run())
+
+    def _push(self, entry):
+        self._entries[entry['id']] = entry
+        self._by_target.setdefault(
+            (entry['guild_sf'], entry['user_sf'], entry['action']), set()
+        ).add(entry['id'])
+        heapq.heappush(self._heap, (entry['due_ts'], entry['id']))
+
+    def _forget(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        key = (entry['guild_sf'], entry['user_sf'], entry['action'])
+        ids = self._by_target.get(key)
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_target[key]
+
+    async def schedule(self, action, guild_id, user_id, delay: timedelta, reason=None):
+        """Programme une action; remplace une échéance existante pour la même cible"""
+        await self.cancel(action, guild_id, user_id)
+        due_ts = int((time.time() + delay.total_seconds()) * 1000)
+        loop = asyncio.get_running_loop()
+        entry_id = await loop.run_in_executor(
+            None,
+            storage.add_scheduled_action,
+            action,
+            guild_id,
+            user_id,
+            due_ts,
+            reason
+        )
+        self._push(
+            {
+                'id': entry_id,
+                'due_ts': due_ts,
+                'action': action,
+                'guild_sf': int(guild_id),
+                'user_sf': int(user_id),
+                'reason': reason,
+                'attempts': 0
+            }
+        )
+        # Réveille le timer si cette échéance passe en tête
+        if self._heap[0][1] == entry_id:
+            self._wakeup.set()
+        return entry_id
+
+    async def cancel(self, action, guild_id, user_id):
+        """Annule les échéances d'une cible (ex:
+        unmute manuel); retourne le nombre annulé
+        """
+        ids = list(self._by_target.get((int(guild_id), int(user_id), action), ()))
+        if not ids:
+            return 0
+        for entry_id in ids:
+            self._forget(entry_id)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, storage.delete_scheduled_actions, ids)
+        return len(ids)
+
+    def pending_count(self):
+        return len(self._entries)
+
+    def _pop_due(self):
+        """Retire du tas toutes les entrées échues
+        (les entrées annulées sont ignorées)
+        """
+        limit = (time.time() + GRACE) * 1000
+        due = []
+        while self._heap and self._heap[0][0] <= limit:
+            due_ts, entry_id = heapq.heappop(self._heap)
+            entry = self._entries.get(entry_id)
+            if entry is not None and entry['due_ts'] == due_ts:
+                due.append(entry)
+        return due
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            due = self._pop_due()
+            if due:
+                await self._process(due)
+                continue
+
+            delay = MAX_SLEEP
+            if self._heap:
+                delay = min(delay, max(0, self._heap[0][0] / 1000 - time.time()))
+            self._wakeup.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+
+    async def _process(self, due):
+        """Exécute un lot d'expirations puis met la base à jour en une transaction"""
+        # Si le planificateur lui-même est annulé, gather lève CancelledError ici malgré
+        # return_exceptions: les expirations restent en base et seront rejouées au
+        # démarrage
+        results = await asyncio.gather(
+            *(self._execute(entry) for entry in due), return_exceptions=True
+        )
+        for result in results:
+            # KeyboardInterrupt, SystemExit...:
+            # ne pas les avaler comme un échec d'expiration
+            if isinstance(result, BaseException) and not isinstance(
+                result, (Exception, asyncio.CancelledError)
+            ):
+                raise result
+
+        done_ids = []
+        retries = []
+        for entry, result in zip(due, results, strict=True):
+            # Une expiration annulée (CancelledError) n'a pas abouti: nouvelle tentative
+            error = None
+            if isinstance(result, BaseException):
+                error = str(result) or result.__class__.__name__
+            if error is not None and entry['attempts'] + 1 < MAX_ATTEMPTS:
+                print(
+                    f"Erreur expiration {entry['action']} ({entry['user_sf']}): {error}"
+                )
+                entry['attempts'] += 1
+                entry['due_ts'] = int((time.time() + RETRY_DELAY) * 1000)
+                retries.append((entry['due_ts'], entry['id']))
+                heapq.heappush(self._heap, (entry['due_ts'], entry['id']))
+                continue
+            if error is not None:
+                print(
+                    f"Expiration abandonnée {entry['action']} ({entry['user_sf']}): "
+                    f"{error}"
+                )
+                self.failed += 1
+            else:
+                self.processed += 1
+            self._forget(entry['id'])
+            done_ids.append(entry['id'])
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, storage.delete_scheduled_actions, done_ids)
+        await loop.run_in_executor(None, storage.reschedule_actions, retries)
+
+    async def _execute(self, entry):
+        handler = self.handlers.get(entry['action'])
+        guild = self.bot.get_guild(entry['guild_sf'])
+        if handler is None or guild is None:
+            # Action inconnue ou bot retiré du serveur: rien à faire
+            return
+        await handler(guild, entry)
@@ -0,0 +1,190 @@
+"""
+Instantané de l'état du bot pour le dashboard
+Le résumé de chaque serveur est tenu à jour par les événements gateway et porte
+un numéro de version: /api/status et /api/guilds deviennent de simples lectures,
+et un client peut demander "a-t-il changé depuis la version N ?"
+"""
+import math
+import threading
+import time
+
+# Durée pendant laquelle le serveur web réutilise l'instantané sans interroger le bot
+# (secondes)
+STATUS_TTL = 2.0
+
+
+def offline_status(version=0, updated=None):
+    return {
+        'online': False,
+        'user': None,
+        'guilds': [],
+        'total_users': 0,
+        'latency': 0,
+        'version': version,
+        'updated': updated
+    }
+
+
+def guild_summary(guild):
+    return {
+        'id': str(guild.id),
+        'name': guild.name,
+        'member_count': guild.member_count,
+        'channels': len(guild.channels),
+        'roles': len(guild.roles),
+        'shard_id': guild.shard_id
+    }
+
+
+class BotSnapshot:
+    """Côté bot: résumé des serveurs maintenu événement par événement"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # Part de l'horloge: les versions restent croissantes d'un redémarrage à l'autre
+        self.version = int(time.time() * 1000)
+        # Instant du dernier changement (epoch ms): Last-Modified de /api/guilds
+        self.updated = self.version
+        self.online = False
+        self._user = None
+        self._guilds = {}
+        self._total_users = 0
+        self._cached = None
+
+    def _bump(self):
+        self.version += 1
+        self.updated = int(time.time() * 1000)
+        self._cached = None
+
+    def rebuild(self):
+        """Reconstruction complète (connexion ou reprise de session)"""
+        self.online = self.bot.is_ready()
+        user = self.bot.user
+        self._user = {
+            'name': user.name,
+            'id': str(user.id),
+            'avatar': str(user.avatar.url) if user.avatar else None
+        } if user else None
+        self._guilds = {guild.id: guild_summary(guild) for guild in self.bot.guilds}
+        self._total_users = sum(
+            summary['member_count'] or 0 for summary in self._guilds.values()
+        )
+        self._bump()
+
+    def set_online(self, online):
+        if online != self.online:
+            self.online = online
+            self._bump()
+
+    def update_guild(self, guild):
+        """Serveur rejoint ou modifié (nom, membres, canaux, rôles)"""
+        summary = guild_summary(guild)
+        previous = self._guilds.get(guild.id)
+        if summary == previous:
+            return
+        self._total_users += (summary['member_count'] or 0) - (
+            (previous or {}).get('member_count') or 0
+        )
+        self._guilds[guild.id] = summary
+        self._bump()
+
+    def remove_guild(self, guild_id):
+        previous = self._guilds.pop(guild_id, None)
+        if previous is None:
+            return
+        self._total_users -= previous['member_count'] or 0
+        self._bump()
+
+    def shards(self):
+        """Latence et nombre de serveurs de chaque shard hébergé par ce processus"""
+        counts = {}
+        for summary in self._guilds.values():
+            counts[summary['shard_id']] = counts.get(summary['shard_id'], 0) + 1
+        shards = getattr(self.bot, 'shards', None)
+        if not shards:
+            # Connexion unique: un seul "shard" 0
+            return [
+                {
+                    'id': 0,
+                    'latency': round(self.bot.latency * 1000, 2) if self.online else 0,
+                    'guilds': len(self._guilds),
+                    'online': self.online
+                }
+            ]
+        result = []
+        for shard_id, shard in sorted(shards.items()):
+            online = self.online and not shard.is_closed()
+            result.append(
+                {
+                    'id': shard_id,
+                    'latency': round(shard.latency * 1000, 2)
+                    if online and math.isfinite(shard.latency)
+                    else 0,
+                    'guilds': counts.get(shard_id, 0),
+                    'online': online
+                }
+            )
+        return result
+
+    def status(self, since=None):
+        """État complet, ou seulement les latences si rien n'a changé depuis la version
+        since
+        """
+        latency = round(self.bot.latency * 1000, 2) if self.online else 0
+        if since is not None and int(since) == self.version:
+            return {
+                'changed': False,
+                'version': self.version,
+                'latency': latency,
+                'shards': self.shards()
+            }
+        if not self.online:
+            return offline_status(self.version, self.updated)
+        if self._cached is None:
+            self._cached = {
+                'online': True,
+                'user': self._user,
+                'guilds': list(self._guilds.values()),
+                'total_users': self._total_users,
+                'version': self.version,
+                'updated': self.updated
+            }
+        return dict(self._cached, latency=latency, shards=self.shards())
+
+
+class SnapshotCache:
+    """Côté serveur web: dernier instantané reçu
+
+    Rafraîchi au plus toutes les ttl secondes. fetch(since) interroge le bot; une
+    erreur remet l'état hors ligne
+    """
+
+    def __init__(self, fetch, ttl=STATUS_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._status = offline_status()
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if time.monotonic() - self._fetched_at >= self.ttl:
+                self._refresh()
+            return self._status
+
+    def _refresh(self):
+        try:
+            response = self.fetch(self._status['version'] or None)
+        except Exception:
+            self._status = offline_status()
+            raise
+        finally:
+            self._fetched_at = time.monotonic()
+        if response.get('changed') is False:
+            # Même version: seules les latences sont mises à jour
+            self._status = dict(
+                self._status,
+                **{key: value for key, value in response.items() if key != 'changed'}
+            )
+        else:
+            self._status = response
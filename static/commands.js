@@ -4,6 +4,8 @@ let currentServer = null;
 let servers = [];
 let users = [];
 let channels = [];
+let commandHistory = [];
+const HISTORY_LIMIT = 20;
 
 // Initialisation
 document.addEventListener('DOMContentLoaded', function() {
@@ -11,6 +13,14 @@ document.addEventListener('DOMContentLoaded', function() {
     loadBotStatus();
     loadCommandHistory();
     setupFormHandler();
+    // Historique et statut poussés par le serveur; polling seulement si le flux est coupé
+    subscribeLive({
+        log: addHistoryItem,
+        status: updateBotStatus
+    }, () => {
+        loadBotStatus();
+        loadCommandHistory();
+    });
 });
 
 async function initializeCommands() {
@@ -49,38 +59,9 @@ async function loadBotStatus() {
 
 async function loadCommandHistory() {
     try {
-        const response = await fetch(`${API_BASE}/api/logs?limit=20`);
-        const history = await response.json();
-        
-        const container = document.getElementById('command-history');
-        
-        if (!history || history.length === 0) {
-            container.innerHTML = '<div class="empty-state"><i class="fas fa-inbox"></i><p>Aucune commande exécutée récemment</p></div>';
-            return;
-        }
-        
-        const html = history.map(item => `
-            <div class="history-item">
-                <div class="history-badge ${item.action}">
-                    <i class="fas ${getActionIcon(item.action)}"></i>
-                </div>
-                <div class="history-details">
-                    <div class="history-action">
-                        <strong>${item.action.toUpperCase()}</strong> ${escapeHtml(item.target)}
-                    </div>
-                    <div class="history-info">
-                        Par ${escapeHtml(item.moderator)} • ${formatRelativeTime(item.timestamp)}
-                        ${item.reason ? ` • ${escapeHtml(item.reason)}` : ''}
-                    </div>
-                </div>
-                <div class="history-status success">
-                    <i class="fas fa-check"></i>
-                </div>
-            </div>
-        `).join('');
-        
-        container.innerHTML = html;
-        
+        const response = await fetch(`${API_BASE}/api/logs?limit=${HISTORY_LIMIT}`);
+        commandHistory = (await response.json()).logs || [];
+        renderCommandHistory();
     } catch (error) {
         console.error('Erreur chargement historique:', error);
         document.getElementById('command-history').innerHTML = 
@@ -88,6 +69,43 @@ async function loadCommandHistory() {
     }
 }
 
+function addHistoryItem(item) {
+    commandHistory = [item, ...commandHistory.filter(entry => entry.id !== item.id)].slice(0, HISTORY_LIMIT);
+    renderCommandHistory();
+}
+
+function renderCommandHistory() {
+    const history = commandHistory;
+    const container = document.getElementById('command-history');
+    
+    if (history.length === 0) {
+        container.innerHTML = '<div class="empty-state"><i class="fas fa-inbox"></i><p>Aucune commande exécutée récemment</p></div>';
+        return;
+    }
+    
+    const html = history.map(item => `
+        <div class="history-item">
+            <div class="history-badge ${item.action}">
+                <i class="fas ${getActionIcon(item.action)}"></i>
+            </div>
+            <div class="history-details">
+                <div class="history-action">
+                    <strong>${item.action.toUpperCase()}</strong> ${escapeHtml(item.target)}
+                </div>
+                <div class="history-info">
+                    Par ${escapeHtml(item.moderator)} • ${formatRelativeTime(item.timestamp)}
+                    ${item.reason ? ` • ${escapeHtml(item.reason)}` : ''}
+                </div>
+            </div>
+            <div class="history-status success">
+                <i class="fas fa-check"></i>
+            </div>
+        </div>
+    `).join('');
+    
+    container.innerHTML = html;
+}
+
 function populateServerSelect(selectId, serverList) {
     const select = document.getElementById(selectId);
     if (!select) return;
@@ -129,8 +147,8 @@ async function onServerSelect() {
 
 async function loadServerUsers(serverId) {
     try {
-        const response = await fetch(`${API_BASE}/api/guild/${serverId}/members`);
-        users = await response.json();
+        const response = await fetch(`${API_BASE}/api/guild/${serverId}/members?limit=200`);
+        users = (await response.json()).members;
     } catch (error) {
         console.error('Erreur chargement utilisateurs:', error);
         users = [];
@@ -185,14 +203,19 @@ function openCommandModal(command) {
     const commandInput = document.getElementById('modal-command');
     const userGroup = document.getElementById('user-group');
     const channelGroup = document.getElementById('channel-group');
+    const massGroup = document.getElementById('mass-group');
     const durationGroup = document.getElementById('duration-group');
     
     // Configuration du modal selon la commande
     commandInput.value = command;
-    title.textContent = `Exécuter: ${command.toUpperCase()}`;
+    title.textContent = command === 'mass' ? 'Action de masse' : `Exécuter: ${command.toUpperCase()}`;
+    massGroup.style.display = command === 'mass' ? 'block' : 'none';
     
     // Définir les champs requis selon la commande
-    if (['lock', 'unlock'].includes(command)) {
+    if (command === 'mass') {
+        userGroup.style.display = 'none';
+        channelGroup.style.display = 'none';
+    } else if (['lock', 'unlock'].includes(command)) {
         userGroup.style.display = 'none';
         channelGroup.style.display = 'block';
         populateChannelSelect();
@@ -203,7 +226,7 @@ function openCommandModal(command) {
     }
     
     // Gérer le champ durée
-    durationGroup.style.display = ['mute', 'ban'].includes(command) ? 'block' : 'none';
+    durationGroup.style.display = ['mute', 'ban', 'mass'].includes(command) ? 'block' : 'none';
     
     // Pré-sélectionner le serveur
     document.getElementById('modal-server').value = currentServer;
@@ -265,6 +288,44 @@ function setupFormHandler() {
     });
 }
 
+function parseUserIds(text) {
+    // Accepte IDs bruts et mentions <@id>, séparés par espaces, virgules ou retours à la ligne
+    const ids = (text.match(/\d{15,20}/g) || []);
+    return [...new Set(ids)];
+}
+
+async function executeMassCommand() {
+    const command = document.getElementById('modal-mass-action').value;
+    const userIds = parseUserIds(document.getElementById('modal-mass-users').value);
+    
+    if (userIds.length === 0) {
+        throw new Error('Veuillez indiquer au moins un utilisateur');
+    }
+    
+    const response = await fetch(`${API_BASE}/api/command/mass`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            command: command,
+            guild_id: document.getElementById('modal-server').value,
+            user_ids: userIds,
+            duration: document.getElementById('modal-duration').value,
+            reason: document.getElementById('modal-reason').value
+        })
+    });
+    
+    const result = await response.json();
+    if (!result.success) {
+        throw new Error(result.message || 'Erreur lors de l\'exécution');
+    }
+    
+    const failures = Object.keys(result.summary.failed).length;
+    showNotification(`${result.message} (${result.summary.per_second}/s)${failures ? ` • ${failures} échecs` : ''}`, failures ? 'warning' : 'success');
+    closeCommandModal();
+}
+
 async function executeCommand() {
     const executeBtn = document.getElementById('execute-btn');
     const originalContent = executeBtn.innerHTML;
@@ -274,6 +335,11 @@ async function executeCommand() {
         executeBtn.disabled = true;
         executeBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Exécution...';
         
+        if (document.getElementById('modal-command').value === 'mass') {
+            await executeMassCommand();
+            return;
+        }
+        
         const formData = {
             command: document.getElementById('modal-command').value,
             guild_id: document.getElementById('modal-server').value,
@@ -307,7 +373,6 @@ async function executeCommand() {
         if (result.success) {
             showNotification(`Commande ${formData.command} exécutée avec succès`, 'success');
             closeCommandModal();
-            setTimeout(() => loadCommandHistory(), 1000); // Actualiser l'historique
         } else {
             throw new Error(result.message || 'Erreur lors de l\'exécution');
         }
@@ -354,7 +419,10 @@ function getActionIcon(action) {
         'kick': 'fa-boot',
         'warn': 'fa-exclamation-triangle',
         'lock': 'fa-lock',
-        'unlock': 'fa-unlock'
+        'unlock': 'fa-unlock',
+        'automod': 'fa-filter',
+        'lockdown': 'fa-user-shield',
+        'raid': 'fa-user-shield'
     };
     return icons[action] || 'fa-cog';
 }
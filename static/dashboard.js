@@ -1,8 +1,13 @@
 // Configuration globale
 const API_BASE = '';
-let refreshInterval;
 let chartsInitialized = false;
 let actionsChart, dailyChart;
+let currentStats = null;
+let recentActions = [];
+const RECENT_ACTIONS_LIMIT = 10;
+// Dernier instantané du bot reçu (version + données) pour les requêtes ?since=
+let botStatus = null;
+let serversVersion = null;
 
 // Initialisation au chargement de la page
 document.addEventListener('DOMContentLoaded', function() {
@@ -30,17 +35,36 @@ async function initializeDashboard() {
 
 async function loadBotStatus() {
     try {
-        const response = await fetch(`${API_BASE}/api/status`);
+        const since = botStatus ? `?since=${botStatus.version}` : '';
+        const response = await fetch(`${API_BASE}/api/status${since}`);
         const data = await response.json();
         
-        updateBotStatus(data);
-        updateStatsNumbers(data);
+        applyBotStatus(data);
     } catch (error) {
         console.error('Erreur chargement statut bot:', error);
         updateBotStatus({ online: false });
     }
 }
 
+function applyBotStatus(data) {
+    // Rien de changé depuis la dernière version: seule la latence bouge
+    if (data.changed === false && botStatus) {
+        botStatus.latency = data.latency;
+        botStatus.shards = data.shards;
+        botStatus.clusters = data.clusters;
+        updateBotStatus(botStatus);
+        renderShards(botStatus);
+        return;
+    }
+    botStatus = data;
+    updateBotStatus(data);
+    renderShards(data);
+    updateStatsNumbers(data);
+    if (serversVersion !== null && data.version !== serversVersion) {
+        renderServers(data.guilds, data.version);
+    }
+}
+
 function updateBotStatus(data) {
     const statusElement = document.getElementById('bot-status');
     const indicator = statusElement.querySelector('.status-indicator');
@@ -78,61 +102,55 @@ function updateStatsNumbers(data) {
 async function loadStats() {
     try {
         const response = await fetch(`${API_BASE}/api/stats`);
-        const data = await response.json();
-        
-        const totalActions = document.getElementById('total-actions');
-        const recentActivity = document.getElementById('recent-activity');
-        
-        if (totalActions) {
-            totalActions.textContent = formatNumber(data.total_actions);
-            animateNumber(totalActions);
-        }
-        
-        if (recentActivity) {
-            recentActivity.textContent = formatNumber(data.recent_activity);
-            animateNumber(recentActivity);
-        }
-        
-        // Mettre à jour les graphiques avec les nouvelles données
-        if (chartsInitialized) {
-            updateCharts(data);
-        } else {
-            // Stocker les données pour l'initialisation des graphiques
-            window.statsData = data;
-        }
-        
+        currentStats = await response.json();
+        renderStats(currentStats);
     } catch (error) {
         console.error('Erreur chargement stats:', error);
     }
 }
 
+function renderStats(data) {
+    const totalActions = document.getElementById('total-actions');
+    const recentActivity = document.getElementById('recent-activity');
+    
+    if (totalActions) {
+        totalActions.textContent = formatNumber(data.total_actions);
+        animateNumber(totalActions);
+    }
+    
+    if (recentActivity) {
+        recentActivity.textContent = formatNumber(data.recent_activity);
+        animateNumber(recentActivity);
+    }
+    
+    // Mettre à jour les graphiques avec les nouvelles données
+    if (chartsInitialized) {
+        updateCharts(data);
+    } else {
+        // Stocker les données pour l'initialisation des graphiques
+        window.statsData = data;
+    }
+}
+
+// Variation poussée par le flux temps réel (nouveaux logs)
+function applyStatsDelta(delta) {
+    if (!currentStats) return;
+    currentStats.total_actions += delta.count;
+    currentStats.recent_activity += delta.count;
+    Object.entries(delta.actions).forEach(([action, count]) => {
+        currentStats.actions_by_type[action] = (currentStats.actions_by_type[action] || 0) + count;
+    });
+    Object.entries(delta.daily).forEach(([day, count]) => {
+        currentStats.daily_activity[day] = (currentStats.daily_activity[day] || 0) + count;
+    });
+    renderStats(currentStats);
+}
+
 async function loadRecentActions() {
     try {
-        const response = await fetch(`${API_BASE}/api/logs?limit=10`);
-        const data = await response.json();
-        
-        const container = document.getElementById('recent-actions-list');
-        
-        if (!data || data.length === 0) {
-            container.innerHTML = '<div class=\"loading\">Aucune action récente</div>';
-            return;
-        }
-        
-        const html = data.map(action => `
-            <div class=\"action-item\">
-                <div class=\"action-badge ${action.action}\">
-                    <i class=\"fas ${getActionIcon(action.action)}\"></i>
-                </div>
-                <div class=\"action-details\">
-                    <div class=\"action-user\">${escapeHtml(action.target)} par ${escapeHtml(action.moderator)}</div>
-                    <div class=\"action-reason\">${escapeHtml(action.reason || 'Aucune raison spécifiée')}</div>
-                </div>
-                <div class=\"action-time\">${formatRelativeTime(action.timestamp)}</div>
-            </div>
-        `).join('');
-        
-        container.innerHTML = html;
-        
+        const response = await fetch(`${API_BASE}/api/logs?limit=${RECENT_ACTIONS_LIMIT}`);
+        recentActions = (await response.json()).logs || [];
+        renderRecentActions();
     } catch (error) {
         console.error('Erreur chargement actions récentes:', error);
         document.getElementById('recent-actions-list').innerHTML = 
@@ -140,30 +158,40 @@ async function loadRecentActions() {
     }
 }
 
+function addRecentAction(action) {
+    recentActions = [action, ...recentActions.filter(item => item.id !== action.id)].slice(0, RECENT_ACTIONS_LIMIT);
+    renderRecentActions();
+}
+
+function renderRecentActions() {
+    const container = document.getElementById('recent-actions-list');
+    
+    if (recentActions.length === 0) {
+        container.innerHTML = '<div class=\"loading\">Aucune action récente</div>';
+        return;
+    }
+    
+    container.innerHTML = recentActions.map(action => `
+        <div class=\"action-item\">
+            <div class=\"action-badge ${action.action}\">
+                <i class=\"fas ${getActionIcon(action.action)}\"></i>
+            </div>
+            <div class=\"action-details\">
+                <div class=\"action-user\">${escapeHtml(action.target)} par ${escapeHtml(action.moderator)}</div>
+                <div class=\"action-reason\">${escapeHtml(action.reason || 'Aucune raison spécifiée')}</div>
+            </div>
+            <div class=\"action-time\">${formatRelativeTime(action.timestamp)}</div>
+        </div>
+    `).join('');
+}
+
 async function loadServers() {
     try {
-        const response = await fetch(`${API_BASE}/api/guilds`);
+        const since = serversVersion !== null ? `?since=${serversVersion}` : '';
+        const response = await fetch(`${API_BASE}/api/guilds${since}`);
+        if (response.status === 204) return;  // Liste inchangée
         const data = await response.json();
-        
-        const container = document.getElementById('servers-grid');
-        
-        if (!data || data.length === 0) {
-            container.innerHTML = '<div class=\"loading\">Aucun serveur connecté</div>';
-            return;
-        }
-        
-        const html = data.map(server => `
-            <div class=\"server-card\" onclick=\"selectServer('${server.id}')\">
-                <div class=\"server-name\">${escapeHtml(server.name)}</div>
-                <div class=\"server-stats\">
-                    <span><i class=\"fas fa-users\"></i> ${formatNumber(server.member_count)}</span>
-                    <span><i class=\"fas fa-hashtag\"></i> ${server.channels}</span>
-                </div>
-            </div>
-        `).join('');
-        
-        container.innerHTML = html;
-        
+        renderServers(data, Number(response.headers.get('X-Snapshot-Version')));
     } catch (error) {
         console.error('Erreur chargement serveurs:', error);
         document.getElementById('servers-grid').innerHTML = 
@@ -171,6 +199,58 @@ async function loadServers() {
     }
 }
 
+function renderServers(data, version) {
+    serversVersion = version;
+    const container = document.getElementById('servers-grid');
+    
+    if (!data || data.length === 0) {
+        container.innerHTML = '<div class=\"loading\">Aucun serveur connecté</div>';
+        return;
+    }
+    
+    container.innerHTML = data.map(server => `
+        <div class=\"server-card\" onclick=\"selectServer('${server.id}')\">
+            <div class=\"server-name\">${escapeHtml(server.name)}</div>
+            <div class=\"server-stats\">
+                <span><i class=\"fas fa-users\"></i> ${formatNumber(server.member_count)}</span>
+                <span><i class=\"fas fa-hashtag\"></i> ${server.channels}</span>
+            </div>
+        </div>
+    `).join('');
+}
+
+function renderShards(data) {
+    const panel = document.getElementById('shards-overview');
+    if (!panel) return;
+    const shards = data.online && data.shards ? data.shards : [];
+    // Une seule connexion gateway: rien à détailler
+    if (shards.length <= 1 && !data.clusters) {
+        panel.style.display = 'none';
+        return;
+    }
+    panel.style.display = '';
+    
+    const online = shards.filter(shard => shard.online).length;
+    let summary = `${online}/${shards.length} connectés`;
+    if (data.clusters) {
+        summary += ` • ${data.clusters.online}/${data.clusters.total} clusters`;
+    }
+    document.getElementById('shards-summary').textContent = summary;
+    
+    document.getElementById('shards-grid').innerHTML = shards.map(shard => `
+        <div class="server-card">
+            <div class="server-name">
+                <span class="status-indicator ${shard.online ? 'online' : 'offline'}"></span>
+                Shard ${shard.id}
+            </div>
+            <div class="server-stats">
+                <span><i class="fas fa-server"></i> ${formatNumber(shard.guilds)}</span>
+                <span><i class="fas fa-signal"></i> ${shard.online ? `${shard.latency}ms` : 'hors ligne'}</span>
+            </div>
+        </div>
+    `).join('');
+}
+
 function initializeCharts() {
     // Configuration commune pour les graphiques
     Chart.defaults.color = '#b9bbbe';
@@ -314,7 +394,10 @@ function getActionIcon(action) {
         'kick': 'fa-boot',
         'warn': 'fa-exclamation-triangle',
         'lock': 'fa-lock',
-        'unlock': 'fa-unlock'
+        'unlock': 'fa-unlock',
+        'automod': 'fa-filter',
+        'lockdown': 'fa-user-shield',
+        'raid': 'fa-user-shield'
     };
     return icons[action] || 'fa-cog';
 }
@@ -351,18 +434,14 @@ function refreshData() {
 }
 
 function startAutoRefresh() {
-    // Actualiser automatiquement toutes les 30 secondes
-    refreshInterval = setInterval(() => {
+    // Mises à jour poussées par le serveur; polling toutes les 30 secondes seulement si le flux est coupé
+    subscribeLive({
+        status: applyBotStatus,
+        log: addRecentAction,
+        stats: applyStatsDelta
+    }, () => {
         loadBotStatus();
         loadStats();
-    }, 30000);
-}
-
-function stopAutoRefresh() {
-    if (refreshInterval) {
-        clearInterval(refreshInterval);
-    }
+        loadRecentActions();
+    });
 }
-
-// Nettoyage lors de la fermeture de la page
-window.addEventListener('beforeunload', stopAutoRefresh);
\ No newline at end of file
@@ -0,0 +1,80 @@
+// Flux temps réel partagé par les pages (Server-Sent Events sur /api/events)
+// Tant que le flux est coupé, la page retombe sur son ancien polling.
+const LIVE_RETRY_MIN = 2000;
+const LIVE_RETRY_MAX = 60000;
+// Coupure plus longue que ce délai: on repasse au polling
+const LIVE_FALLBACK_AFTER = 10000;
+
+function subscribeLive(handlers, fallback, fallbackInterval = 30000) {
+    let source = null;
+    let lastEventId = null;
+    let pollTimer = null;
+    let retryTimer = null;
+    let fallbackTimer = null;
+    let retryDelay = LIVE_RETRY_MIN;
+
+    function startPolling() {
+        if (pollTimer || !fallback) return;
+        // Les données rechargées font foi: pas de rejeu des événements manqués
+        lastEventId = null;
+        fallback();
+        pollTimer = setInterval(fallback, fallbackInterval);
+    }
+
+    function stopPolling() {
+        if (!pollTimer) return false;
+        clearInterval(pollTimer);
+        pollTimer = null;
+        return true;
+    }
+
+    function connect() {
+        if (!window.EventSource) {
+            startPolling();
+            return;
+        }
+        const params = lastEventId ? `?last_id=${encodeURIComponent(lastEventId)}` : '';
+        source = new EventSource(`${API_BASE}/api/events${params}`);
+
+        source.addEventListener('open', () => {
+            retryDelay = LIVE_RETRY_MIN;
+            clearTimeout(fallbackTimer);
+            fallbackTimer = null;
+            // Dernière mise à jour complète pour combler l'écart depuis le dernier polling
+            if (stopPolling() && fallback) fallback();
+        });
+
+        // Trop de logs manqués pour être rejoués: la page recharge ses données
+        source.addEventListener('resync', () => {
+            if (fallback) fallback();
+        });
+
+        ['log', 'stats', 'status'].forEach(type => {
+            if (!handlers[type]) return;
+            source.addEventListener(type, event => {
+                if (event.lastEventId) lastEventId = event.lastEventId;
+                handlers[type](JSON.parse(event.data));
+            });
+        });
+
+        source.addEventListener('error', () => {
+            // Reconnexion gérée ici (avec Last-Event-ID) plutôt que par le navigateur
+            source.close();
+            source = null;
+            if (!fallbackTimer && !pollTimer) {
+                fallbackTimer = setTimeout(startPolling, LIVE_FALLBACK_AFTER);
+            }
+            retryTimer = setTimeout(connect, retryDelay);
+            retryDelay = Math.min(retryDelay * 2, LIVE_RETRY_MAX);
+        });
+    }
+
+    connect();
+
+    window.addEventListener('beforeunload', () => {
+        if (source) source.close();
+        stopPolling();
+        clearTimeout(retryTimer);
+        clearTimeout(fallbackTimer);
+    });
+}
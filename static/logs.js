@@ -1,11 +1,13 @@
 // Configuration globale
 const API_BASE = '';
-let allLogs = [];
-let filteredLogs = [];
+let currentLogs = [];
+let pageCursors = [null];  // Curseur de début de chaque page déjà visitée
+let nextCursor = null;
 let currentPage = 1;
 let logsPerPage = 50;
 let sortColumn = 'timestamp';
 let sortDirection = 'desc';
+let filterTimeout = null;
 
 // Initialisation
 document.addEventListener('DOMContentLoaded', function() {
@@ -44,12 +46,55 @@ async function loadServers() {
     }
 }
 
+function buildLogsQuery() {
+    // Les filtres sont appliqués côté serveur
+    const params = new URLSearchParams();
+    const filters = {
+        guild_id: document.getElementById('server-filter').value,
+        action: document.getElementById('action-filter').value,
+        moderator: document.getElementById('moderator-filter').value.trim(),
+        target: document.getElementById('target-filter').value.trim(),
+        date_from: document.getElementById('date-from').value,
+        date_to: document.getElementById('date-to').value
+    };
+    
+    Object.entries(filters).forEach(([key, value]) => {
+        if (value) params.set(key, value);
+    });
+    
+    params.set('limit', logsPerPage);
+    params.set('order', sortDirection);
+    return params;
+}
+
+function buildSearchQuery(text) {
+    // Recherche plein texte: résultats classés par pertinence
+    const params = new URLSearchParams({ q: text, limit: logsPerPage });
+    const serverFilter = document.getElementById('server-filter').value;
+    const actionFilter = document.getElementById('action-filter').value;
+    if (serverFilter) params.set('guild_id', serverFilter);
+    if (actionFilter) params.set('action', actionFilter);
+    return params;
+}
+
 async function loadLogs() {
     try {
-        const response = await fetch(`${API_BASE}/api/logs?limit=1000`);
-        allLogs = await response.json();
+        const searchText = document.getElementById('search-filter').value.trim();
+        const params = searchText ? buildSearchQuery(searchText) : buildLogsQuery();
+        const cursor = pageCursors[currentPage - 1];
+        if (cursor) params.set('cursor', cursor);
+        
+        const endpoint = searchText ? '/api/logs/search' : '/api/logs';
+        const response = await fetch(`${API_BASE}${endpoint}?${params}`);
+        const data = await response.json();
         
-        filteredLogs = [...allLogs];
+        currentLogs = data.logs || [];
+        nextCursor = data.next_cursor;
+        pageCursors[currentPage] = nextCursor;
+        
+        if (sortColumn !== 'timestamp' && !searchText) {
+            sortCurrentPage();
+        }
         updateLogsDisplay();
         
     } catch (error) {
@@ -65,32 +110,19 @@ async function loadLogs() {
     }
 }
 
-function filterLogs() {
-    const serverFilter = document.getElementById('server-filter').value;
-    const actionFilter = document.getElementById('action-filter').value;
-    const moderatorFilter = document.getElementById('moderator-filter').value.toLowerCase();
-    const targetFilter = document.getElementById('target-filter').value.toLowerCase();
-    const dateFrom = document.getElementById('date-from').value;
-    const dateTo = document.getElementById('date-to').value;
-    
-    filteredLogs = allLogs.filter(log => {
-        const matchesServer = !serverFilter || log.guild_id === serverFilter;
-        const matchesAction = !actionFilter || log.action === actionFilter;
-        const matchesModerator = !moderatorFilter || log.moderator.toLowerCase().includes(moderatorFilter);
-        const matchesTarget = !targetFilter || log.target.toLowerCase().includes(targetFilter);
-        
-        let matchesDate = true;
-        if (dateFrom || dateTo) {
-            const logDate = new Date(log.timestamp).toISOString().split('T')[0];
-            if (dateFrom && logDate < dateFrom) matchesDate = false;
-            if (dateTo && logDate > dateTo) matchesDate = false;
-        }
-        
-        return matchesServer && matchesAction && matchesModerator && matchesTarget && matchesDate;
-    });
-    
+function resetPagination() {
+    pageCursors = [null];
+    nextCursor = null;
     currentPage = 1;
-    updateLogsDisplay();
+}
+
+function filterLogs() {
+    // Petit délai pour ne pas envoyer une requête à chaque frappe
+    clearTimeout(filterTimeout);
+    filterTimeout = setTimeout(() => {
+        resetPagination();
+        loadLogs();
+    }, 250);
 }
 
 function sortLogs(column) {
@@ -101,22 +133,26 @@ function sortLogs(column) {
         sortDirection = 'desc';
     }
     
-    filteredLogs.sort((a, b) => {
-        let valueA = a[column];
-        let valueB = b[column];
-        
-        if (column === 'timestamp') {
-            valueA = new Date(valueA);
-            valueB = new Date(valueB);
-        }
+    if (column === 'timestamp') {
+        // Le tri chronologique est fait par le serveur (pagination par curseur)
+        resetPagination();
+        loadLogs();
+    } else {
+        sortCurrentPage();
+        updateLogsDisplay();
+    }
+    updateSortIndicators();
+}
+
+function sortCurrentPage() {
+    currentLogs.sort((a, b) => {
+        const valueA = a[sortColumn];
+        const valueB = b[sortColumn];
         
         if (valueA < valueB) return sortDirection === 'asc' ? -1 : 1;
         if (valueA > valueB) return sortDirection === 'asc' ? 1 : -1;
         return 0;
     });
-    
-    updateLogsDisplay();
-    updateSortIndicators();
 }
 
 function updateSortIndicators() {
@@ -137,14 +173,15 @@ function updateLogsDisplay() {
 }
 
 function updateLogsStats() {
-    const totalCount = allLogs.length;
-    const filteredCount = filteredLogs.length;
+    const start = (currentPage - 1) * logsPerPage;
     
-    document.getElementById('logs-count').textContent = `${totalCount} logs au total`;
+    document.getElementById('logs-count').textContent = currentLogs.length
+        ? `Logs ${start + 1} à ${start + currentLogs.length}`
+        : '0 logs';
     
     const filteredElement = document.getElementById('logs-filtered');
-    if (filteredCount !== totalCount) {
-        filteredElement.textContent = `(${filteredCount} affichés après filtrage)`;
+    if (nextCursor) {
+        filteredElement.textContent = '(d\'autres logs sur les pages suivantes)';
         filteredElement.style.display = 'inline';
     } else {
         filteredElement.style.display = 'none';
@@ -154,7 +191,7 @@ function updateLogsStats() {
 function displayLogs() {
     const tbody = document.getElementById('logs-tbody');
     
-    if (filteredLogs.length === 0) {
+    if (currentLogs.length === 0) {
         tbody.innerHTML = `
             <tr><td colspan=\"7\">
                 <div class=\"empty-state\">
@@ -166,11 +203,7 @@ function displayLogs() {
         return;
     }
     
-    const startIndex = (currentPage - 1) * logsPerPage;
-    const endIndex = startIndex + logsPerPage;
-    const pageData = filteredLogs.slice(startIndex, endIndex);
-    
-    const html = pageData.map(log => `
+    const html = currentLogs.map(log => `
         <tr>
             <td>${formatDateTime(log.timestamp)}</td>
             <td>
@@ -179,10 +212,10 @@ function displayLogs() {
                     ${log.action.toUpperCase()}
                 </span>
             </td>
-            <td>${escapeHtml(log.moderator)}</td>
-            <td>${escapeHtml(log.target)}</td>
+            <td>${highlighted(log, 'moderator')}</td>
+            <td>${highlighted(log, 'target')}</td>
             <td>${log.duration || '-'}</td>
-            <td>${escapeHtml(log.reason || '-')}</td>
+            <td>${highlighted(log, 'reason') || '-'}</td>
             <td>
                 <button class=\"btn-sm btn-secondary\" onclick=\"viewLogDetails('${log.id}')\">
                     <i class=\"fas fa-eye\"></i>
@@ -194,51 +227,42 @@ function displayLogs() {
     tbody.innerHTML = html;
 }
 
+function highlighted(log, field) {
+    // Le serveur renvoie le texte déjà échappé avec les correspondances dans <mark>
+    if (log.highlight && log.highlight[field]) {
+        return log.highlight[field];
+    }
+    return escapeHtml(log[field] || '');
+}
+
 function updatePagination() {
-    const totalPages = Math.ceil(filteredLogs.length / logsPerPage);
     const pagination = document.getElementById('pagination');
     
-    if (totalPages <= 1) {
+    if (currentPage === 1 && !nextCursor) {
         pagination.innerHTML = '';
         return;
     }
     
-    let html = '';
-    
-    // Bouton précédent
-    html += `
+    // Pagination par curseur: on ne connaît que les pages déjà visitées et la suivante
+    let html = `
         <button ${currentPage === 1 ? 'disabled' : ''} onclick=\"changePage(${currentPage - 1})\">
             <i class=\"fas fa-chevron-left\"></i>
         </button>
     `;
     
-    // Numéros de page
     const startPage = Math.max(1, currentPage - 2);
-    const endPage = Math.min(totalPages, currentPage + 2);
-    
-    if (startPage > 1) {
-        html += `<button onclick=\"changePage(1)\">1</button>`;
-        if (startPage > 2) {
-            html += '<span>...</span>';
-        }
-    }
-    
-    for (let i = startPage; i <= endPage; i++) {
+    for (let i = startPage; i <= currentPage; i++) {
         html += `
             <button ${i === currentPage ? 'class=\"active\"' : ''} onclick=\"changePage(${i})\">${i}</button>
         `;
     }
     
-    if (endPage < totalPages) {
-        if (endPage < totalPages - 1) {
-            html += '<span>...</span>';
-        }
-        html += `<button onclick=\"changePage(${totalPages})\">${totalPages}</button>`;
+    if (nextCursor) {
+        html += `<button onclick=\"changePage(${currentPage + 1})\">${currentPage + 1}</button>`;
     }
     
-    // Bouton suivant
     html += `
-        <button ${currentPage === totalPages ? 'disabled' : ''} onclick=\"changePage(${currentPage + 1})\">
+        <button ${!nextCursor ? 'disabled' : ''} onclick=\"changePage(${currentPage + 1})\">
             <i class=\"fas fa-chevron-right\"></i>
         </button>
     `;
@@ -247,12 +271,13 @@ function updatePagination() {
 }
 
 function changePage(page) {
+    if (page < 1 || page > pageCursors.length || (page > 1 && !pageCursors[page - 1])) return;
     currentPage = page;
-    displayLogs();
-    updatePagination();
+    loadLogs();
 }
 
 function clearFilters() {
+    document.getElementById('search-filter').value = '';
     document.getElementById('server-filter').value = '';
     document.getElementById('action-filter').value = '';
     document.getElementById('moderator-filter').value = '';
@@ -260,13 +285,12 @@ function clearFilters() {
     document.getElementById('date-from').value = '';
     document.getElementById('date-to').value = '';
     
-    filteredLogs = [...allLogs];
-    currentPage = 1;
-    updateLogsDisplay();
+    resetPagination();
+    loadLogs();
 }
 
 function viewLogDetails(logId) {
-    const log = allLogs.find(l => l.id == logId);
+    const log = currentLogs.find(l => l.id == logId);
     if (!log) return;
     
     const details = `
@@ -284,47 +308,17 @@ function viewLogDetails(logId) {
     alert(details);
 }
 
-async function exportLogs() {
-    try {
-        const csvContent = generateCSV(filteredLogs);
-        const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-        const link = document.createElement('a');
-        
-        if (link.download !== undefined) {
-            const url = URL.createObjectURL(blob);
-            link.setAttribute('href', url);
-            link.setAttribute('download', `logs_${new Date().toISOString().split('T')[0]}.csv`);
-            link.style.visibility = 'hidden';
-            document.body.appendChild(link);
-            link.click();
-            document.body.removeChild(link);
-        }
-    } catch (error) {
-        console.error('Erreur export logs:', error);
-        alert('Erreur lors de l\\'export des logs');
-    }
-}
-
-function generateCSV(logs) {
-    const headers = ['ID', 'Date/Heure', 'Action', 'Modérateur', 'Cible', 'Durée', 'Raison', 'Serveur ID', 'Canal ID'];
-    const csvRows = [headers.join(',')];
-    
-    logs.forEach(log => {
-        const row = [
-            log.id,
-            log.timestamp,
-            log.action,
-            `\"${log.moderator}\"`,
-            `\"${log.target}\"`,
-            log.duration || '',
-            `\"${log.reason || ''}\"`,
-            log.guild_id,
-            log.channel_id || ''
-        ];
-        csvRows.push(row.join(','));
-    });
-    
-    return csvRows.join('\\n');
+function exportLogs() {
+    // Export complet généré en flux par le serveur, avec les filtres affichés
+    const params = buildLogsQuery();
+    params.delete('limit');
+    params.set('format', 'csv');
+    const link = document.createElement('a');
+    link.href = `${API_BASE}/api/logs/export?${params}`;
+    link.style.visibility = 'hidden';
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
 }
 
 async function loadBotStatus() {
@@ -357,6 +351,7 @@ function updateBotStatus(data) {
 }
 
 function refreshLogs() {
+    resetPagination();
     loadLogs();
     loadBotStatus();
 }
@@ -375,7 +370,10 @@ function getActionIcon(action) {
         'kick': 'fa-boot',
         'warn': 'fa-exclamation-triangle',
         'lock': 'fa-lock',
-        'unlock': 'fa-unlock'
+        'unlock': 'fa-unlock',
+        'automod': 'fa-filter',
+        'lockdown': 'fa-user-shield',
+        'raid': 'fa-user-shield'
     };
     return icons[action] || 'fa-cog';
 }
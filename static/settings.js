@@ -1,7 +1,10 @@
 // Configuration globale
 const API_BASE = '';
-let settings = {};
+let settings = { global: {}, guild: null };
 let unsavedChanges = false;
+// Serveur choisi (null: seulement les paramètres globaux) et valeurs par défaut envoyées par l'API
+let currentGuild = null;
+let defaults = { global: {}, guild: {} };
 
 // Initialisation
 document.addEventListener('DOMContentLoaded', function() {
@@ -13,61 +16,125 @@ document.addEventListener('DOMContentLoaded', function() {
 
 async function initializeSettings() {
     try {
-        await loadSettings();
+        await Promise.all([loadServers(), loadSettings()]);
         updateSystemStats();
     } catch (error) {
         console.error('Erreur initialisation paramètres:', error);
     }
 }
 
+async function loadServers() {
+    try {
+        const response = await fetch(`${API_BASE}/api/guilds`);
+        const servers = await response.json();
+        
+        const select = document.getElementById('settings-guild');
+        select.innerHTML = '<option value="">Choisir un serveur...</option>';
+        servers.forEach(server => {
+            const option = document.createElement('option');
+            option.value = server.id;
+            option.textContent = server.name;
+            select.appendChild(option);
+        });
+    } catch (error) {
+        console.error('Erreur chargement serveurs:', error);
+    }
+}
+
+async function loadServerRoles(guildId) {
+    const muteSelect = document.getElementById('mute-role');
+    const adminSelect = document.getElementById('admin-role');
+    muteSelect.innerHTML = '<option value="">Rôle "Muted" (créé au besoin)</option>';
+    adminSelect.innerHTML = '';
+    if (!guildId) return;
+    
+    try {
+        const response = await fetch(`${API_BASE}/api/guild/${guildId}/roles`);
+        const roles = await response.json();
+        roles.forEach(role => {
+            const option = document.createElement('option');
+            option.value = role.id;
+            option.textContent = role.name;
+            muteSelect.appendChild(option);
+            adminSelect.appendChild(option.cloneNode(true));
+        });
+    } catch (error) {
+        console.error('Erreur chargement rôles:', error);
+    }
+}
+
+async function onGuildSelect() {
+    if (unsavedChanges && !confirm('Des modifications ne sont pas enregistrées. Changer de serveur quand même ?')) {
+        document.getElementById('settings-guild').value = currentGuild || '';
+        return;
+    }
+    currentGuild = document.getElementById('settings-guild').value || null;
+    // Rôles d'abord: les listes doivent exister avant de sélectionner les valeurs
+    await loadServerRoles(currentGuild);
+    await loadSettings();
+    unsavedChanges = false;
+    updateSaveButton();
+}
+
 async function loadSettings() {
     try {
-        // Pour l'instant, on utilise des valeurs par défaut
-        // Dans une implémentation complète, cela viendrait d'un API
-        settings = {
-            botPrefix: '+',
-            botStatus: 'online',
-            botActivity: 'Surveille les serveurs',
-            autoMod: true,
-            logActions: true,
-            muteRole: 'Muted',
-            adminRole: 'bot',
-            webEnabled: true,
-            webPort: 5000,
-            refreshRate: 30,
-            darkTheme: true,
-            requirePermissions: true,
-            maxWarns: 3,
-            autoAction: 'none'
-        };
+        const query = currentGuild ? `?guild_id=${currentGuild}` : '';
+        const response = await fetch(`${API_BASE}/api/settings${query}`);
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const data = await response.json();
+        defaults = data.defaults;
+        settings = { global: data.global, guild: data.guild };
         
         // Appliquer les paramètres à l'interface
         applySettingsToUI();
         
     } catch (error) {
         console.error('Erreur chargement paramètres:', error);
+        showNotification('Impossible de charger les paramètres', 'error');
     }
 }
 
 function applySettingsToUI() {
-    document.getElementById('bot-prefix').value = settings.botPrefix;
-    document.getElementById('bot-status').value = settings.botStatus;
-    document.getElementById('bot-activity').value = settings.botActivity;
-    document.getElementById('auto-mod').checked = settings.autoMod;
-    document.getElementById('log-actions').checked = settings.logActions;
-    document.getElementById('mute-role').value = settings.muteRole;
-    document.getElementById('admin-role').value = settings.adminRole;
-    document.getElementById('web-enabled').checked = settings.webEnabled;
-    document.getElementById('web-port').value = settings.webPort;
-    document.getElementById('refresh-rate').value = settings.refreshRate;
-    document.getElementById('dark-theme').checked = settings.darkTheme;
-    document.getElementById('require-permissions').checked = settings.requirePermissions;
-    document.getElementById('max-warns').value = settings.maxWarns;
-    document.getElementById('auto-action').value = settings.autoAction;
+    document.getElementById('bot-presence').value = settings.global.presence_status;
+    document.getElementById('bot-activity').value = settings.global.presence_activity;
+    
+    const guild = settings.guild || defaults.guild;
+    document.getElementById('bot-prefix').value = guild.prefix;
+    document.getElementById('default-reason').value = guild.default_reason;
+    document.getElementById('mute-mode').value = guild.mute_mode;
+    document.getElementById('mute-role').value = guild.mute_role_id || '';
+    const moderatorRoles = new Set(guild.moderator_role_ids || []);
+    Array.from(document.getElementById('admin-role').options).forEach(option => {
+        option.selected = moderatorRoles.has(option.value);
+    });
+    document.getElementById('retention-days').value = guild.log_retention_days;
+    document.getElementById('automod-enabled').value = String(guild.automod_enabled);
+    document.getElementById('automod-terms').value = (guild.automod_terms || []).join('\n');
+    document.getElementById('automod-invites').value = String(guild.automod_block_invites);
+    document.getElementById('automod-links').value = String(guild.automod_block_links);
+    document.getElementById('automod-mentions').value = guild.automod_max_mentions;
+    document.getElementById('automod-action').value = guild.automod_action;
+    document.getElementById('automod-duration').value = guild.automod_mute_duration;
+    document.getElementById('flood-enabled').value = String(guild.flood_enabled);
+    document.getElementById('flood-messages').value = guild.flood_messages;
+    document.getElementById('flood-seconds').value = guild.flood_seconds;
+    document.getElementById('flood-duration').value = guild.flood_mute_duration;
+    document.getElementById('raid-enabled').value = String(guild.raid_enabled);
+    document.getElementById('raid-joins').value = guild.raid_joins;
+    document.getElementById('raid-seconds').value = guild.raid_seconds;
+    document.getElementById('raid-action').value = guild.raid_action;
+    document.getElementById('raid-duration').value = guild.raid_lockdown_duration;
+    
+    // Paramètres de serveur modifiables seulement une fois un serveur choisi
+    document.querySelectorAll('.guild-setting').forEach(input => {
+        input.disabled = !settings.guild;
+    });
 }
 
 function setupChangeTracking() {
-    const inputs = document.querySelectorAll('input, select');
+    const inputs = document.querySelectorAll('input, textarea, select:not(#settings-guild)');
     inputs.forEach(input => {
         input.addEventListener('change', () => {
             unsavedChanges = true;
@@ -77,7 +144,7 @@ function setupChangeTracking() {
 }
 
 function updateSaveButton() {
-    const saveButton = document.querySelector('.btn-primary');
+    const saveButton = document.querySelector('.header-actions button');
     if (unsavedChanges) {
         saveButton.innerHTML = '<i class=\"fas fa-exclamation-circle\"></i> Modifications non sauvées';
         saveButton.classList.add('btn-warning');
@@ -89,54 +156,89 @@ function updateSaveButton() {
     }
 }
 
+function readSettingsFromUI() {
+    const values = {
+        global: {
+            presence_status: document.getElementById('bot-presence').value,
+            presence_activity: document.getElementById('bot-activity').value.trim()
+        },
+        guild: null
+    };
+    if (settings.guild) {
+        values.guild = {
+            prefix: document.getElementById('bot-prefix').value.trim(),
+            default_reason: document.getElementById('default-reason').value.trim(),
+            mute_mode: document.getElementById('mute-mode').value,
+            mute_role_id: document.getElementById('mute-role').value || null,
+            moderator_role_ids: Array.from(document.getElementById('admin-role').selectedOptions).map(option => option.value),
+            log_retention_days: parseInt(document.getElementById('retention-days').value),
+            automod_enabled: document.getElementById('automod-enabled').value === 'true',
+            automod_terms: document.getElementById('automod-terms').value.split('\n').map(term => term.trim()).filter(Boolean),
+            automod_block_invites: document.getElementById('automod-invites').value === 'true',
+            automod_block_links: document.getElementById('automod-links').value === 'true',
+            automod_max_mentions: parseInt(document.getElementById('automod-mentions').value),
+            automod_action: document.getElementById('automod-action').value,
+            automod_mute_duration: document.getElementById('automod-duration').value.trim(),
+            flood_enabled: document.getElementById('flood-enabled').value === 'true',
+            flood_messages: parseInt(document.getElementById('flood-messages').value),
+            flood_seconds: parseInt(document.getElementById('flood-seconds').value),
+            flood_mute_duration: document.getElementById('flood-duration').value.trim(),
+            raid_enabled: document.getElementById('raid-enabled').value === 'true',
+            raid_joins: parseInt(document.getElementById('raid-joins').value),
+            raid_seconds: parseInt(document.getElementById('raid-seconds').value),
+            raid_action: document.getElementById('raid-action').value,
+            raid_lockdown_duration: document.getElementById('raid-duration').value.trim()
+        };
+    }
+    return values;
+}
+
 async function saveSettings() {
     try {
         // Récupérer les valeurs depuis l'interface
-        const newSettings = {
-            botPrefix: document.getElementById('bot-prefix').value,
-            botStatus: document.getElementById('bot-status').value,
-            botActivity: document.getElementById('bot-activity').value,
-            autoMod: document.getElementById('auto-mod').checked,
-            logActions: document.getElementById('log-actions').checked,
-            muteRole: document.getElementById('mute-role').value,
-            adminRole: document.getElementById('admin-role').value,
-            webEnabled: document.getElementById('web-enabled').checked,
-            webPort: parseInt(document.getElementById('web-port').value),
-            refreshRate: parseInt(document.getElementById('refresh-rate').value),
-            darkTheme: document.getElementById('dark-theme').checked,
-            requirePermissions: document.getElementById('require-permissions').checked,
-            maxWarns: parseInt(document.getElementById('max-warns').value),
-            autoAction: document.getElementById('auto-action').value
-        };
+        const newSettings = readSettingsFromUI();
         
-        // Validation
-        if (!newSettings.botPrefix || newSettings.botPrefix.length > 3) {
-            alert('Le préfixe doit contenir 1 à 3 caractères');
-            return;
+        // Validation (refaite par le serveur)
+        if (newSettings.guild) {
+            if (!newSettings.guild.prefix || newSettings.guild.prefix.length > 3 || /\s/.test(newSettings.guild.prefix)) {
+                alert('Le préfixe doit contenir 1 à 3 caractères, sans espace');
+                return;
+            }
+            if (!newSettings.guild.default_reason) {
+                alert('La raison par défaut ne peut pas être vide');
+                return;
+            }
+            if (isNaN(newSettings.guild.log_retention_days) || newSettings.guild.log_retention_days < 0) {
+                alert('La durée de conservation doit être un nombre positif (0 = illimitée)');
+                return;
+            }
+            const durations = [
+                newSettings.guild.automod_mute_duration,
+                newSettings.guild.flood_mute_duration,
+                newSettings.guild.raid_lockdown_duration
+            ];
+            if (!durations.every(duration => /^[1-9]\d*[smhd]$/.test(duration))) {
+                alert('Durée invalide (ex: 30s, 5m, 2h, 1d)');
+                return;
+            }
         }
         
-        if (newSettings.webPort < 1000 || newSettings.webPort > 65535) {
-            alert('Le port doit être entre 1000 et 65535');
-            return;
-        }
-        
-        if (newSettings.refreshRate < 10 || newSettings.refreshRate > 300) {
-            alert('Le taux de rafraîchissement doit être entre 10 et 300 secondes');
+        const response = await fetch(`${API_BASE}/api/settings`, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ global: newSettings.global, guild_id: currentGuild, guild: newSettings.guild })
+        });
+        const result = await response.json();
+        if (!response.ok || !result.success) {
+            showNotification(result.message || 'Erreur lors de la sauvegarde', 'error');
             return;
         }
         
-        // Dans une implémentation complète, on enverrait cela à l'API
-        // const response = await fetch(`${API_BASE}/api/settings`, {
-        //     method: 'POST',
-        //     headers: { 'Content-Type': 'application/json' },
-        //     body: JSON.stringify(newSettings)
-        // });
-        
         settings = newSettings;
         unsavedChanges = false;
         updateSaveButton();
         
-        showNotification('Paramètres sauvegardés avec succès', 'success');
+        showNotification(result.message, result.applied ? 'success' : 'warning');
         
     } catch (error) {
         console.error('Erreur sauvegarde paramètres:', error);
@@ -188,7 +290,8 @@ function exportSettings() {
         const configData = {
             version: '2.0.0',
             exported: new Date().toISOString(),
-            settings: settings
+            guild_id: currentGuild,
+            settings: readSettingsFromUI()
         };
         
         const blob = new Blob([JSON.stringify(configData, null, 2)], { 
@@ -204,31 +307,19 @@ function exportSettings() {
         
     } catch (error) {
         console.error('Erreur export configuration:', error);
-        showNotification('Erreur lors de l\\'export', 'error');
+        showNotification('Erreur lors de l\'export', 'error');
     }
 }
 
 function resetSettings() {
-    if (!confirm('Êtes-vous sûr de vouloir réinitialiser tous les paramètres ? Cette action est irréversible.')) {
+    if (!confirm('Remettre tous les paramètres à leur valeur par défaut ? Il faudra ensuite enregistrer.')) {
         return;
     }
     
-    // Réinitialiser aux valeurs par défaut
+    // Réinitialiser aux valeurs par défaut (envoyées par le serveur)
     settings = {
-        botPrefix: '+',
-        botStatus: 'online',
-        botActivity: '',
-        autoMod: true,
-        logActions: true,
-        muteRole: 'Muted',
-        adminRole: 'bot',
-        webEnabled: true,
-        webPort: 5000,
-        refreshRate: 30,
-        darkTheme: true,
-        requirePermissions: true,
-        maxWarns: 3,
-        autoAction: 'none'
+        global: { ...defaults.global },
+        guild: settings.guild ? { ...defaults.guild } : null
     };
     
     applySettingsToUI();
@@ -339,8 +430,15 @@ function showNotification(message, type = 'info') {
     }, 5000);
 }
 
-// Auto-actualisation des stats
-setInterval(() => {
-    updateSystemStats();
-    loadBotStatus();
-}, 30000);
\ No newline at end of file
+// Statut poussé par le flux temps réel; polling toutes les 30 secondes seulement si le flux est coupé
+document.addEventListener('DOMContentLoaded', function() {
+    subscribeLive({
+        status: data => {
+            updateBotStatus(data);
+            document.getElementById('guild-count').textContent = data.guilds ? data.guilds.length : '0';
+        }
+    }, () => {
+        updateSystemStats();
+        loadBotStatus();
+    });
+});
\ No newline at end of file
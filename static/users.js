@@ -1,8 +1,12 @@
 // Configuration globale
 const API_BASE = '';
 let currentServer = null;
-let allUsers = [];
-let filteredUsers = [];
+// Membres chargés page par page (recherche et filtres côté serveur)
+let loadedUsers = [];
+let nextCursor = null;
+let usersRequest = 0;
+let searchTimer = null;
+const USERS_PAGE_SIZE = 60;
 
 // Initialisation
 document.addEventListener('DOMContentLoaded', function() {
@@ -44,45 +48,90 @@ async function loadServerUsers() {
     
     if (!serverId) {
         currentServer = null;
+        loadedUsers = [];
+        nextCursor = null;
         displayUsers([]);
+        updateLoadMore(null);
         return;
     }
     
     currentServer = serverId;
+    await Promise.all([
+        loadServerRoles(serverId),
+        fetchUsersPage(true)
+    ]);
+}
+
+function buildMembersQuery(cursor) {
+    const params = new URLSearchParams({ limit: USERS_PAGE_SIZE });
+    const search = document.getElementById('search-users').value.trim();
+    const role = document.getElementById('role-filter').value;
+    const status = document.getElementById('status-filter').value;
+    
+    if (search) {
+        params.set('q', search);
+        params.set('mode', document.getElementById('search-mode').value);
+    }
+    if (role) params.set('role', role);
+    if (status) params.set('status', status);
+    if (cursor) params.set('cursor', cursor);
+    return params.toString();
+}
+
+async function fetchUsersPage(reset) {
+    if (!currentServer) return;
+    // Ignore les réponses d'une recherche dépassée
+    const requestId = ++usersRequest;
     
     try {
-        const response = await fetch(`${API_BASE}/api/guild/${serverId}/members`);
-        allUsers = await response.json();
+        const query = buildMembersQuery(reset ? null : nextCursor);
+        const response = await fetch(`${API_BASE}/api/guild/${currentServer}/members?${query}`);
+        const page = await response.json();
+        if (requestId !== usersRequest) return;
         
-        // Charger aussi les rôles
-        await loadServerRoles(serverId);
+        if (page.loading) {
+            // Membres en cours de chargement ou index en construction côté bot: nouvel essai
+            document.getElementById('users-grid').innerHTML = '<div class=\"loading\">Chargement des membres du serveur...</div>';
+            setTimeout(() => {
+                if (requestId === usersRequest) fetchUsersPage(reset);
+            }, 2000);
+            return;
+        }
         
-        filteredUsers = [...allUsers];
-        displayUsers(filteredUsers);
+        loadedUsers = reset ? page.members : loadedUsers.concat(page.members);
+        nextCursor = page.next_cursor;
+        displayUsers(loadedUsers);
+        updateLoadMore(page);
         
     } catch (error) {
         console.error('Erreur chargement utilisateurs:', error);
-        displayUsers([]);
+        if (reset) displayUsers([]);
     }
 }
 
+function loadMoreUsers() {
+    if (nextCursor) fetchUsersPage(false);
+}
+
+function updateLoadMore(page) {
+    document.getElementById('load-more-users').style.display = page && page.has_more ? 'inline-flex' : 'none';
+    document.getElementById('users-count').textContent = page
+        ? `${loadedUsers.length} affichés • ${formatCount(page.total)} membres`
+        : '';
+}
+
 async function loadServerRoles(serverId) {
     try {
-        // Pour l'instant, on utilise les rôles des utilisateurs
-        const roleSet = new Set();
-        allUsers.forEach(user => {
-            if (user.roles) {
-                user.roles.forEach(role => roleSet.add(role));
-            }
-        });
+        const response = await fetch(`${API_BASE}/api/guild/${serverId}/roles`);
+        const roles = await response.json();
         
         const roleFilter = document.getElementById('role-filter');
         roleFilter.innerHTML = '<option value="">Tous les rôles</option>';
         
-        Array.from(roleSet).forEach(role => {
+        roles.forEach(role => {
             const option = document.createElement('option');
-            option.value = role;
-            option.textContent = role;
+            option.value = role.id;
+            option.textContent = role.name;
             roleFilter.appendChild(option);
         });
         
@@ -129,20 +178,9 @@ function displayUsers(users) {
 }
 
 function filterUsers() {
-    const searchTerm = document.getElementById('search-users').value.toLowerCase();
-    const roleFilter = document.getElementById('role-filter').value;
-    const statusFilter = document.getElementById('status-filter').value;
-    
-    filteredUsers = allUsers.filter(user => {
-        const matchesSearch = user.display_name.toLowerCase().includes(searchTerm) || 
-                            user.name.toLowerCase().includes(searchTerm);
-        const matchesRole = !roleFilter || (user.roles && user.roles.includes(roleFilter));
-        const matchesStatus = !statusFilter || user.status === statusFilter;
-        
-        return matchesSearch && matchesRole && matchesStatus;
-    });
-    
-    displayUsers(filteredUsers);
+    // Recherche côté serveur, déclenchée après une courte pause de saisie
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(() => fetchUsersPage(true), 250);
 }
 
 function openUserModal(userId, userName) {
@@ -152,7 +190,7 @@ function openUserModal(userId, userName) {
     
     title.textContent = `Actions pour ${userName}`;
     
-    const user = allUsers.find(u => u.id === userId);
+    const user = loadedUsers.find(u => u.id === userId);
     if (user) {
         userInfo.innerHTML = `
             <div class=\"user-modal-info\">
@@ -219,14 +257,14 @@ async function openActionModal(action) {
             alert(`Action ${action} exécutée avec succès`);
             closeUserModal();
             // Actualiser la liste des utilisateurs
-            setTimeout(() => loadServerUsers(), 1000);
+            setTimeout(() => fetchUsersPage(true), 1000);
         } else {
             alert(`Erreur: ${result.message}`);
         }
         
     } catch (error) {
         console.error('Erreur exécution action:', error);
-        alert('Erreur lors de l\\'exécution de l\\'action');
+        alert('Erreur lors de l\'exécution de l\'action');
     }
 }
 
@@ -267,6 +305,10 @@ function refreshUsers() {
 }
 
 // Fonctions utilitaires
+function formatCount(num) {
+    return (num || 0).toLocaleString('fr-FR');
+}
+
 function getInitials(name) {
     return name.split(' ').map(word => word[0]).join('').toUpperCase().slice(0, 2);
 }
@@ -0,0 +1,990 @@
+"""
+Stockage des logs de modération
+Connexions SQLite persistantes (mode WAL) partagées par le bot et le serveur web
+"""
+import base64
+import html
+import os
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+DB_PATH = os.getenv('MODERATION_DB', 'moderation_logs.db')
+
+# Nombre maximal de connexions de lecture gardées ouvertes
+READ_POOL_SIZE = int(os.getenv('MODERATION_DB_POOL', '4'))
+
+# Taille de page par défaut et maximale pour /api/logs
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Lignes lues par requête pendant un export
+EXPORT_BATCH_SIZE = 1000
+
+# Logs archivés puis supprimés par transaction (rétention)
+RETENTION_BATCH_SIZE = 500
+# Pages rendues au disque par pas de vacuum incrémental (4 Ko chacune)
+VACUUM_STEP_PAGES = 256
+
+# Nombre de lignes converties par transaction pendant une migration
+MIGRATION_BATCH_SIZE = 5000
+
+# Réglages appliqués à chaque nouvelle connexion
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',       # Lectures du dashboard non bloquées par le bot
+    'PRAGMA synchronous=NORMAL',     # Pas de fsync à chaque commit (sûr en mode WAL)
+    'PRAGMA cache_size=-16000',      # ~16 Mo de cache de pages par connexion
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=134217728',    # 128 Mo mappés en mémoire pour les lectures
+    'PRAGMA busy_timeout=5000',      # Attendre le verrou au lieu d'échouer
+)
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS moderation_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        action TEXT NOT NULL,
+        moderator TEXT NOT NULL,
+        target TEXT NOT NULL,
+        duration TEXT,
+        reason TEXT,
+        guild_id TEXT NOT NULL,
+        channel_id TEXT
+    )
+'''
+
+# Version 2 : colonnes typées pour filtrer et trier via des index
+#   ts           -> horodatage epoch en millisecondes
+#   *_sf         -> identifiants Discord (snowflakes) en INTEGER
+# Les colonnes texte d'origine restent pour l'affichage et la compatibilité de l'API
+SCHEMA_V2 = (
+    'ALTER TABLE moderation_logs ADD COLUMN ts INTEGER',
+    'ALTER TABLE moderation_logs ADD COLUMN guild_sf INTEGER',
+    'ALTER TABLE moderation_logs ADD COLUMN channel_sf INTEGER',
+    'ALTER TABLE moderation_logs ADD COLUMN moderator_sf INTEGER',
+    'ALTER TABLE moderation_logs ADD COLUMN target_sf INTEGER',
+)
+
+INDEXES_V2 = (
+    'CREATE INDEX IF NOT EXISTS idx_logs_ts ON moderation_logs (ts)',
+    'CREATE INDEX IF NOT EXISTS idx_logs_guild_ts ON moderation_logs (guild_sf, ts)',
+    'CREATE INDEX IF NOT EXISTS idx_logs_guild_action_ts '
+    'ON moderation_logs (guild_sf, action, ts)',
+    'CREATE INDEX IF NOT EXISTS idx_logs_target ON moderation_logs (target_sf, ts)',
+)
+
+# Version 3 : index plein texte (FTS5) sur raison, cible et modérateur
+# Table "external content" : le texte n'est pas dupliqué, les triggers gardent l'index
+# à jour
+SCHEMA_V3 = (
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS moderation_logs_fts USING fts5(
+        reason, target, moderator,
+        content='moderation_logs', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS moderation_logs_fts_ai
+    AFTER INSERT ON moderation_logs BEGIN
+        INSERT INTO moderation_logs_fts (rowid, reason, target, moderator)
+        VALUES (new.id, new.reason, new.target, new.moderator);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS moderation_logs_fts_ad
+    AFTER DELETE ON moderation_logs BEGIN
+        INSERT INTO moderation_logs_fts
+            (moderation_logs_fts, rowid, reason, target, moderator)
+        VALUES ('delete', old.id, old.reason, old.target, old.moderator);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS moderation_logs_fts_au
+    AFTER UPDATE OF reason, target, moderator ON moderation_logs BEGIN
+        INSERT INTO moderation_logs_fts
+            (moderation_logs_fts, rowid, reason, target, moderator)
+        VALUES ('delete', old.id, old.reason, old.target, old.moderator);
+        INSERT INTO moderation_logs_fts (rowid, reason, target, moderator)
+        VALUES (new.id, new.reason, new.target, new.moderator);
+    END
+    ''',
+)
+
+# Version 4 : agrégats maintenus à chaque insertion pour /api/stats
+#   moderation_stats_totals -> compteur par (serveur, action) depuis le début
+#   moderation_stats_hourly -> compteur par (heure, serveur, action),
+#                              heure = ts // 3 600 000
+# guild_sf vaut 0 quand le serveur est inconnu (les clés primaires WITHOUT ROWID
+# refusent NULL)
+SCHEMA_V4 = (
+    '''
+    CREATE TABLE IF NOT EXISTS moderation_stats_totals (
+        guild_sf INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (guild_sf, action)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS moderation_stats_hourly (
+        hour INTEGER NOT NULL,
+        guild_sf INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (hour, guild_sf, action)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS moderation_stats_ai
+    AFTER INSERT ON moderation_logs BEGIN
+        INSERT INTO moderation_stats_totals (guild_sf, action, count)
+        VALUES (COALESCE(new.guild_sf, 0), new.action, 1)
+        ON CONFLICT (guild_sf, action) DO UPDATE SET count = count + 1;
+        INSERT INTO moderation_stats_hourly (hour, guild_sf, action, count)
+        VALUES (new.ts / 3600000, COALESCE(new.guild_sf, 0), new.action, 1)
+        ON CONFLICT (hour, guild_sf, action) DO UPDATE SET count = count + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS moderation_stats_ad
+    AFTER DELETE ON moderation_logs BEGIN
+        UPDATE moderation_stats_totals SET count = count - 1
+        WHERE guild_sf = COALESCE(old.guild_sf, 0) AND action = old.action;
+        UPDATE moderation_stats_hourly SET count = count - 1
+        WHERE hour = old.ts / 3600000 AND guild_sf = COALESCE(old.guild_sf, 0)
+          AND action = old.action;
+    END
+    ''',
+)
+
+# Version 5 : expirations programmées (fin de mute / de ban temporaire)
+SCHEMA_V5 = (
+    '''
+    CREATE TABLE IF NOT EXISTS scheduled_actions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        due_ts INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        guild_sf INTEGER NOT NULL,
+        user_sf INTEGER NOT NULL,
+        reason TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        created_ts INTEGER NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_scheduled_due ON scheduled_actions (due_ts)',
+    'CREATE INDEX IF NOT EXISTS idx_scheduled_target '
+    'ON scheduled_actions (guild_sf, user_sf, action)',
+)
+
+# Version 6 : paramètres par serveur (clé / valeur texte)
+SCHEMA_V6 = (
+    '''
+    CREATE TABLE IF NOT EXISTS guild_settings (
+        guild_sf INTEGER NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT,
+        updated_ts INTEGER NOT NULL,
+        PRIMARY KEY (guild_sf, key)
+    ) WITHOUT ROWID
+    ''',
+)
+
+# Fenêtre maximale acceptée par /api/stats
+MAX_STATS_DAYS = 366
+
+# Poids bm25 des colonnes (reason, target, moderator)
+SEARCH_WEIGHTS = (1.0, 2.0, 1.0)
+# Marqueurs de surlignage, remplacés par <mark> après échappement HTML
+_HL_START, _HL_END = '\x02', '\x03'
+
+# Requêtes constantes : sqlite3 garde les statements préparés en cache par connexion
+INSERT_LOG = '''
+    INSERT INTO moderation_logs (timestamp, action, moderator, target, duration, reason,
+                                 guild_id, channel_id, ts, guild_sf, channel_sf,
+                                 moderator_sf, target_sf)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Mentions Discord (<@123>, <@!123>, <#123>) ou identifiant brut
+_SNOWFLAKE_RE = re.compile(r'^(?:<[@#]!?)?(\d{15,20})>?$')
+
+LOG_COLUMNS = ('id, timestamp, action, moderator, target, duration, reason, guild_id, '
+               'channel_id')
+
+_read_pool = queue.LifoQueue(maxsize=READ_POOL_SIZE)
+_write_lock = threading.Lock()
+_write_conn = None
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _connect():
+    """Ouvre une connexion configurée pour un usage long"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@contextmanager
+def read_connection():
+    """Emprunte une connexion de lecture au pool et la rend ensuite"""
+    try:
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        yield conn
+    finally:
+        try:
+            _read_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def _get_write_connection():
+    """Connexion d'écriture unique, partagée et protégée par _write_lock"""
+    global _write_conn
+    if _write_conn is None:
+        _write_conn = _connect()
+    return _write_conn
+
+
+def to_snowflake(value):
+    """Convertit un identifiant Discord (int, texte ou mention) en entier, sinon None"""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    match = _SNOWFLAKE_RE.match(str(value).strip())
+    return int(match.group(1)) if match else None
+
+
+def to_epoch_ms(timestamp):
+    """Convertit un horodatage ISO (heure locale) en epoch millisecondes"""
+    try:
+        return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+    except (TypeError, ValueError):
+        return None
+
+
+def _migrate_v2(conn):
+    """Ajoute les colonnes typées puis les remplit par lots"""
+    # BEGIN IMMEDIATE: le bot et le serveur web peuvent démarrer en même temps
+    conn.execute('BEGIN IMMEDIATE')
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(moderation_logs)')}
+    for statement in SCHEMA_V2:
+        column = statement.split('ADD COLUMN ')[1].split()[0]
+        if column not in columns:
+            conn.execute(statement)
+    conn.commit()
+
+    # Conversion par lots : chaque lot est une transaction courte, le bot peut écrire
+    # entre deux
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, timestamp, guild_id, channel_id, moderator, target
+            FROM moderation_logs
+            WHERE id > ? AND ts IS NULL ORDER BY id LIMIT ?
+        ''', (last_id, MIGRATION_BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+        updates = [
+            (to_epoch_ms(row['timestamp']) or 0, to_snowflake(row['guild_id']),
+             to_snowflake(row['channel_id']), to_snowflake(row['moderator']),
+             to_snowflake(row['target']), row['id'])
+            for row in rows
+        ]
+        with conn:
+            conn.executemany(
+                'UPDATE moderation_logs SET ts = ?, guild_sf = ?, channel_sf = ?, '
+                'moderator_sf = ?, target_sf = ? WHERE id = ?',
+                updates
+            )
+        migrated += len(rows)
+        last_id = rows[-1]['id']
+
+    with conn:
+        for statement in INDEXES_V2:
+            conn.execute(statement)
+    if migrated:
+        print(f"🗃️ Migration v2: {migrated} logs convertis")
+
+
+def _migrate_v3(conn):
+    """Crée l'index plein texte et l'alimente avec l'historique existant"""
+    conn.execute('BEGIN IMMEDIATE')
+    for statement in SCHEMA_V3:
+        conn.execute(statement)
+    conn.execute(
+        "INSERT INTO moderation_logs_fts (moderation_logs_fts) VALUES ('rebuild')"
+    )
+    conn.commit()
+
+
+def _migrate_v4(conn):
+    """Crée les tables d'agrégats et les remplit à partir de l'historique"""
+    conn.execute('BEGIN IMMEDIATE')
+    for statement in SCHEMA_V4:
+        conn.execute(statement)
+    conn.execute('DELETE FROM moderation_stats_totals')
+    conn.execute('DELETE FROM moderation_stats_hourly')
+    conn.execute('''
+        INSERT INTO moderation_stats_totals (guild_sf, action, count)
+        SELECT COALESCE(guild_sf, 0), action, COUNT(*) FROM moderation_logs
+        GROUP BY COALESCE(guild_sf, 0), action
+    ''')
+    conn.execute('''
+        INSERT INTO moderation_stats_hourly (hour, guild_sf, action, count)
+        SELECT ts / 3600000, COALESCE(guild_sf, 0), action, COUNT(*)
+        FROM moderation_logs
+        GROUP BY ts / 3600000, COALESCE(guild_sf, 0), action
+    ''')
+    conn.commit()
+
+
+def _migrate_v5(conn):
+    """Crée la table des expirations programmées"""
+    with conn:
+        for statement in SCHEMA_V5:
+            conn.execute(statement)
+
+
+def _migrate_v6(conn):
+    """Crée la table des paramètres par serveur"""
+    with conn:
+        for statement in SCHEMA_V6:
+            conn.execute(statement)
+
+
+# Migrations dans l'ordre; l'index + 1 correspond à la version atteinte
+MIGRATIONS = (
+    lambda conn: conn.execute(SCHEMA),
+    _migrate_v2,
+    _migrate_v3,
+    _migrate_v4,
+    _migrate_v5,
+    _migrate_v6,
+)
+
+
+def _migrate(conn):
+    """Applique les migrations manquantes selon PRAGMA user_version"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for target_version in range(version + 1, len(MIGRATIONS) + 1):
+        MIGRATIONS[target_version - 1](conn)
+        conn.commit()
+        conn.execute(f'PRAGMA user_version = {target_version}')
+
+
+def init_database():
+    """Crée ou migre le schéma une seule fois par processus"""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        with _write_lock:
+            _migrate(_get_write_connection())
+        _initialized = True
+
+
+def make_log_record(action: str, moderator: str, target: str, guild_id: str,
+                    duration: Optional[str] = None, reason: Optional[str] = None,
+                    channel_id: Optional[str] = None, moderator_id=None,
+                    target_id=None):
+    """Construit la ligne à insérer, horodatée au moment de l'action"""
+    now = datetime.now()
+    target_sf = to_snowflake(target_id if target_id is not None else target)
+    return (now.isoformat(), action, moderator, target, duration, reason, guild_id,
+            channel_id, int(now.timestamp() * 1000), to_snowflake(guild_id),
+            to_snowflake(channel_id), to_snowflake(moderator_id), target_sf)
+
+
+def insert_logs(records):
+    """Insère plusieurs lignes dans une seule transaction (un seul commit)"""
+    init_database()
+    with _write_lock:
+        conn = _get_write_connection()
+        with conn:
+            conn.executemany(INSERT_LOG, records)
+
+
+def log_action(action: str, moderator: str, target: str, guild_id: str,
+               duration: Optional[str] = None, reason: Optional[str] = None,
+               channel_id: Optional[str] = None, moderator_id=None, target_id=None):
+    """Enregistre immédiatement une action de modération et retourne son id"""
+    record = make_log_record(action, moderator, target, guild_id, duration, reason,
+                             channel_id, moderator_id, target_id)
+    init_database()
+    with _write_lock:
+        conn = _get_write_connection()
+        with conn:
+            cursor = conn.execute(INSERT_LOG, record)
+        return cursor.lastrowid
+
+
+def fetch_logs(guild_id=None, action_type=None, limit=50):
+    """Récupère les logs de modération les plus récents avec filtres optionnels"""
+    logs, _ = query_logs(guild_id=guild_id, action_type=action_type, limit=limit)
+    return logs
+
+
+def latest_log_id():
+    """Identifiant du dernier log (0 si la table est vide)"""
+    with read_connection() as conn:
+        return conn.execute(
+            'SELECT COALESCE(MAX(id), 0) FROM moderation_logs'
+        ).fetchone()[0]
+
+
+def log_state():
+    """(premier id, dernier id, ts du dernier) ou (0, 0, None)
+
+    Validateur des réponses HTTP conditionnelles. Le premier id change quand la
+    rétention archive les plus anciens logs.
+    """
+    with read_connection() as conn:
+        first = conn.execute(
+            'SELECT id FROM moderation_logs ORDER BY id LIMIT 1'
+        ).fetchone()
+        last = conn.execute(
+            'SELECT id, ts FROM moderation_logs ORDER BY id DESC LIMIT 1'
+        ).fetchone()
+    return (first[0], last[0], last[1]) if last else (0, 0, None)
+
+
+def fetch_logs_after(last_id, limit=MAX_PAGE_SIZE):
+    """Logs écrits après last_id, du plus ancien au plus récent
+
+    Parcours de la clé primaire.
+    """
+    with read_connection() as conn:
+        rows = conn.execute(
+            f'SELECT {LOG_COLUMNS} FROM moderation_logs '
+            'WHERE id > ? ORDER BY id LIMIT ?',
+            (int(last_id), int(limit))
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def encode_cursor(ts, log_id):
+    """Jeton opaque désignant la position (ts, id) du dernier log renvoyé"""
+    return base64.urlsafe_b64encode(f'{ts}:{log_id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse de encode_cursor; lève ValueError si le jeton est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        ts, log_id = raw.split(':')
+        return int(ts), int(log_id)
+    except Exception as e:
+        raise ValueError(f"Curseur invalide: {cursor}") from e
+
+
+def _date_to_epoch_ms(day, end=False):
+    """'YYYY-MM-DD' (heure locale) -> epoch ms du début du jour (du lendemain si end)"""
+    start = datetime.strptime(day, '%Y-%m-%d')
+    if end:
+        start += timedelta(days=1)
+    return int(start.timestamp() * 1000)
+
+
+def _escape_like(value):
+    """Échappe les jokers de LIKE pour une recherche littérale"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def build_log_filters(guild_id=None, action_type=None, moderator=None, target=None,
+                      date_from=None, date_to=None):
+    """Conditions WHERE communes aux requêtes sur les logs: (conditions, paramètres)"""
+    conditions = []
+    params = []
+    if guild_id:
+        conditions.append('guild_sf = ?')
+        params.append(to_snowflake(guild_id))
+    if action_type:
+        conditions.append('action = ?')
+        params.append(action_type)
+    if moderator:
+        conditions.append("moderator LIKE ? ESCAPE '\\'")
+        params.append(f'%{_escape_like(moderator)}%')
+    if target:
+        conditions.append("target LIKE ? ESCAPE '\\'")
+        params.append(f'%{_escape_like(target)}%')
+    if date_from:
+        conditions.append('ts >= ?')
+        params.append(_date_to_epoch_ms(date_from))
+    if date_to:
+        conditions.append('ts < ?')
+        params.append(_date_to_epoch_ms(date_to, end=True))
+    return conditions, params
+
+
+def _select_logs(conditions, params, descending, limit, after=None):
+    """Lignes (avec ts) suivant la position after=(ts, id) dans l'ordre demandé
+
+    Lecture d'index bornée.
+    """
+    conditions = list(conditions)
+    params = list(params)
+    if after:
+        conditions.append('(ts, id) < (?, ?)' if descending else '(ts, id) > (?, ?)')
+        params.extend(after)
+
+    query = f'SELECT {LOG_COLUMNS}, ts FROM moderation_logs'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    direction = 'DESC' if descending else 'ASC'
+    # Servi par idx_logs_ts / idx_logs_guild_ts / idx_logs_guild_action_ts, sans tri
+    query += f' ORDER BY ts {direction}, id {direction} LIMIT ?'
+    params.append(limit)
+
+    with read_connection() as conn:
+        return conn.execute(query, params).fetchall()
+
+
+def query_logs(guild_id=None, action_type=None, moderator=None, target=None,
+               date_from=None, date_to=None, order='desc', limit=DEFAULT_PAGE_SIZE,
+               cursor=None):
+    """Page de logs paginée par curseur (keyset sur ts, id)
+
+    Retourne (logs, next_cursor); next_cursor vaut None sur la dernière page.
+    Chaque page est une lecture d'index bornée, quelle que soit la taille de
+    l'historique.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    conditions, params = build_log_filters(guild_id, action_type, moderator, target,
+                                           date_from, date_to)
+    after = decode_cursor(cursor) if cursor else None
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    rows = _select_logs(conditions, params, order != 'asc', limit + 1, after)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['ts'], rows[-1]['id'])
+
+    logs = []
+    for row in rows:
+        log = dict(row)
+        del log['ts']
+        logs.append(log)
+    return logs, next_cursor
+
+
+def iter_log_batches(guild_id=None, action_type=None, moderator=None, target=None,
+                     date_from=None, date_to=None, order='desc',
+                     batch_size=EXPORT_BATCH_SIZE):
+    """Parcourt tous les logs filtrés par lots de lignes (export)
+
+    Chaque lot est une lecture courte: aucune connexion ni instantané WAL n'est gardé
+    pendant l'envoi, et la mémoire reste bornée à un lot. Les filtres sont validés
+    dès l'appel (ValueError), avant le premier lot.
+    """
+    conditions, params = build_log_filters(guild_id, action_type, moderator, target,
+                                           date_from, date_to)
+    descending = order != 'asc'
+
+    def batches():
+        after = None
+        while True:
+            rows = _select_logs(conditions, params, descending, batch_size, after)
+            if not rows:
+                return
+            after = (rows[-1]['ts'], rows[-1]['id'])
+            yield rows
+            if len(rows) < batch_size:
+                return
+
+    return batches()
+
+
+def build_match_query(text):
+    """Transforme une saisie libre en requête FTS5 sûre (tous les mots, en préfixe)"""
+    terms = []
+    for word in text.split():
+        word = word.replace('"', '')
+        if word:
+            terms.append(f'"{word}"*')
+    return ' '.join(terms)
+
+
+def _highlight_html(value):
+    """Échappe le texte surligné par FTS5 et transforme les marqueurs en <mark>"""
+    if value is None:
+        return None
+    return html.escape(value).replace(_HL_START, '<mark>').replace(_HL_END, '</mark>')
+
+
+def search_logs(text, guild_id=None, action_type=None, limit=DEFAULT_PAGE_SIZE,
+                offset=0):
+    """Recherche plein texte classée par pertinence (bm25) avec surlignage
+
+    Retourne (logs, next_offset); next_offset vaut None sur la dernière page.
+    """
+    match = build_match_query(text or '')
+    if not match:
+        return [], None
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    offset = max(0, int(offset))
+
+    conditions, params = build_log_filters(guild_id, action_type)
+    conditions = ['moderation_logs_fts MATCH ?'] + [f'l.{c}' for c in conditions]
+    weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+    query = f'''
+        SELECT l.id, l.timestamp, l.action, l.moderator, l.target, l.duration, l.reason,
+               l.guild_id, l.channel_id,
+               highlight(moderation_logs_fts, 0, ?, ?) AS hl_reason,
+               highlight(moderation_logs_fts, 1, ?, ?) AS hl_target,
+               highlight(moderation_logs_fts, 2, ?, ?) AS hl_moderator
+        FROM moderation_logs_fts
+        JOIN moderation_logs l ON l.id = moderation_logs_fts.rowid
+        WHERE {' AND '.join(conditions)}
+        ORDER BY bm25(moderation_logs_fts, {weights}), l.id DESC
+        LIMIT ? OFFSET ?
+    '''
+    markers = [_HL_START, _HL_END] * 3
+    with read_connection() as conn:
+        rows = conn.execute(
+            query, markers + [match] + params + [limit + 1, offset]
+        ).fetchall()
+
+    next_offset = offset + limit if len(rows) > limit else None
+    logs = []
+    for row in rows[:limit]:
+        log = dict(row)
+        log['highlight'] = {
+            'reason': _highlight_html(log.pop('hl_reason')),
+            'target': _highlight_html(log.pop('hl_target')),
+            'moderator': _highlight_html(log.pop('hl_moderator'))
+        }
+        logs.append(log)
+    return logs, next_offset
+
+
+def fetch_stats(guild_id=None, days=7, by_guild=False):
+    """Statistiques lues dans les tables d'agrégats
+
+    Coût constant quelle que soit la taille des logs.
+
+    days   : fenêtre de l'activité récente, arrondie à l'heure
+    by_guild : ajoute la répartition par serveur
+    """
+    days = max(1, min(int(days), MAX_STATS_DAYS))
+    since_hour = int((datetime.now() - timedelta(days=days)).timestamp()) // 3600
+
+    guild_condition = ''
+    guild_params = []
+    if guild_id:
+        guild_condition = ' AND guild_sf = ?'
+        guild_params.append(to_snowflake(guild_id))
+
+    with read_connection() as conn:
+        actions_by_type = {row[0]: row[1] for row in conn.execute(
+            'SELECT action, SUM(count) FROM moderation_stats_totals '
+            f'WHERE count > 0{guild_condition} GROUP BY action',
+            guild_params
+        )}
+        total_actions = sum(actions_by_type.values())
+
+        window_params = [since_hour] + guild_params
+        recent_activity = conn.execute(
+            'SELECT COALESCE(SUM(count), 0) FROM moderation_stats_hourly '
+            f'WHERE hour >= ?{guild_condition}',
+            window_params
+        ).fetchone()[0]
+
+        daily_activity = {row[0]: row[1] for row in conn.execute(f'''
+            SELECT date(hour * 3600, 'unixepoch', 'localtime') as day,
+                   SUM(count) as count
+            FROM moderation_stats_hourly
+            WHERE hour >= ?{guild_condition}
+            GROUP BY day
+            ORDER BY day DESC
+        ''', window_params) if row[1]}
+
+        stats = {
+            'total_actions': total_actions,
+            'actions_by_type': actions_by_type,
+            'recent_activity': recent_activity,
+            'daily_activity': daily_activity,
+            'window_days': days
+        }
+
+        if by_guild:
+            by_guild_stats = {}
+            for guild_sf, total in conn.execute(
+                'SELECT guild_sf, SUM(count) FROM moderation_stats_totals '
+                'GROUP BY guild_sf'
+            ):
+                by_guild_stats[str(guild_sf)] = {
+                    'total_actions': total,
+                    'recent_activity': 0
+                }
+            for guild_sf, recent in conn.execute(
+                'SELECT guild_sf, SUM(count) FROM moderation_stats_hourly '
+                'WHERE hour >= ? GROUP BY guild_sf',
+                (since_hour,)
+            ):
+                guild_stats = by_guild_stats.setdefault(
+                    str(guild_sf), {'total_actions': 0}
+                )
+                guild_stats['recent_activity'] = recent
+            stats['by_guild'] = by_guild_stats
+
+    return stats
+
+
+def add_scheduled_action(action, guild_id, user_id, due_ts, reason=None):
+    """Programme une expiration et retourne son id"""
+    init_database()
+    now_ms = int(datetime.now().timestamp() * 1000)
+    with _write_lock:
+        conn = _get_write_connection()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO scheduled_actions '
+                '(due_ts, action, guild_sf, user_sf, reason, created_ts) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (due_ts, action, to_snowflake(guild_id), to_snowflake(user_id), reason,
+                 now_ms)
+            )
+        return cursor.lastrowid
+
+
+def fetch_scheduled_actions():
+    """Toutes les expirations en attente, triées par échéance"""
+    init_database()
+    with read_connection() as conn:
+        rows = conn.execute(
+            'SELECT id, due_ts, action, guild_sf, user_sf, reason, attempts '
+            'FROM scheduled_actions ORDER BY due_ts'
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def delete_scheduled_actions(ids):
+    """Supprime des expirations traitées ou annulées (une seule transaction)"""
+    if not ids:
+        return
+    with _write_lock:
+        conn = _get_write_connection()
+        with conn:
+            conn.executemany(
+                'DELETE FROM scheduled_actions WHERE id = ?', [(i,) for i in ids]
+            )
+
+
+def reschedule_actions(updates):
+    """Repousse des expirations en échec: liste de (due_ts, id)"""
+    if not updates:
+        return
+    with _write_lock:
+        conn = _get_write_connection()
+        with conn:
+            conn.executemany(
+                'UPDATE scheduled_actions SET due_ts = ?, attempts = attempts + 1 '
+                'WHERE id = ?',
+                updates
+            )
+
+
+def get_guild_setting(guild_id, key, default=None):
+    """Lit un paramètre d'un serveur"""
+    init_database()
+    with read_connection() as conn:
+        row = conn.execute(
+            'SELECT value FROM guild_settings WHERE guild_sf = ? AND key = ?',
+            (to_snowflake(guild_id), key)
+        ).fetchone()
+    return row[0] if row is not None else default
+
+
+def set_guild_setting(guild_id, key, value):
+    """Enregistre un paramètre d'un serveur"""
+    init_database()
+    now_ms = int(datetime.now().timestamp() * 1000)
+    with _write_lock:
+        conn = _get_write_connection()
+        with conn:
+            conn.execute('''
+                INSERT INTO guild_settings (guild_sf, key, value, updated_ts)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (guild_sf, key) DO UPDATE
+                SET value = excluded.value, updated_ts = excluded.updated_ts
+            ''', (to_snowflake(guild_id), key, value, now_ms))
+
+
+def get_guild_settings(guild_id):
+    """Tous les paramètres enregistrés d'un serveur, en une lecture (clé -> texte)"""
+    init_database()
+    with read_connection() as conn:
+        rows = conn.execute(
+            'SELECT key, value FROM guild_settings WHERE guild_sf = ?',
+            (to_snowflake(guild_id),)
+        ).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def set_guild_settings(guild_id, values):
+    """Enregistre plusieurs paramètres d'un serveur en une transaction
+
+    None = retour à la valeur par défaut.
+    """
+    init_database()
+    guild_sf = to_snowflake(guild_id)
+    now_ms = int(datetime.now().timestamp() * 1000)
+    with _write_lock:
+        conn = _get_write_connection()
+        with conn:
+            conn.executemany('''
+                INSERT INTO guild_settings (guild_sf, key, value, updated_ts)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (guild_sf, key) DO UPDATE
+                SET value = excluded.value, updated_ts = excluded.updated_ts
+            ''', [
+                (guild_sf, key, value, now_ms)
+                for key, value in values.items() if value is not None
+            ])
+            conn.executemany(
+                'DELETE FROM guild_settings WHERE guild_sf = ? AND key = ?',
+                [(guild_sf, key) for key, value in values.items() if value is None]
+            )
+
+
+def log_guilds():
+    """Serveurs présents dans les logs, lus dans les agrégats
+
+    None pour les logs sans serveur connu.
+    """
+    with read_connection() as conn:
+        rows = conn.execute(
+            'SELECT DISTINCT guild_sf FROM moderation_stats_totals WHERE count > 0'
+        ).fetchall()
+    return [row[0] or None for row in rows]
+
+
+def fetch_expired_logs(guild_sf, cutoff_ms, limit=RETENTION_BATCH_SIZE):
+    """Plus anciens logs d'un serveur antérieurs à cutoff_ms (idx_logs_guild_ts)"""
+    with read_connection() as conn:
+        return conn.execute(f'''
+            SELECT {LOG_COLUMNS}, ts, guild_sf FROM moderation_logs
+            WHERE guild_sf IS ? AND ts < ? ORDER BY ts, id LIMIT ?
+        ''', (guild_sf, cutoff_ms, limit)).fetchall()
+
+
+def count_expired_logs(guild_sf, cutoff_ms):
+    with read_connection() as conn:
+        return conn.execute(
+            'SELECT COUNT(*) FROM moderation_logs WHERE guild_sf IS ? AND ts < ?',
+            (guild_sf, cutoff_ms)
+        ).fetchone()[0]
+
+
+def delete_archived_logs(rows):
+    """Supprime des logs déjà archivés, en une transaction courte
+
+    Les agrégats de /api/stats sont conservés: le trigger de suppression les décrémente,
+    on leur rend aussitôt les comptes des lignes archivées.
+    """
+    totals = {}
+    hourly = {}
+    for row in rows:
+        guild_sf = row['guild_sf'] or 0
+        totals[(guild_sf, row['action'])] = totals.get((guild_sf, row['action']), 0) + 1
+        key = (row['ts'] // 3600000, guild_sf, row['action'])
+        hourly[key] = hourly.get(key, 0) + 1
+
+    with _write_lock:
+        conn = _get_write_connection()
+        with conn:
+            conn.executemany(
+                'DELETE FROM moderation_logs WHERE id = ?',
+                [(row['id'],) for row in rows]
+            )
+            conn.executemany('''
+                INSERT INTO moderation_stats_totals (guild_sf, action, count)
+                VALUES (?, ?, ?)
+                ON CONFLICT (guild_sf, action)
+                DO UPDATE SET count = count + excluded.count
+            ''', [key + (count,) for key, count in totals.items()])
+            conn.executemany('''
+                INSERT INTO moderation_stats_hourly (hour, guild_sf, action, count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (hour, guild_sf, action)
+                DO UPDATE SET count = count + excluded.count
+            ''', [key + (count,) for key, count in hourly.items()])
+
+
+def free_pages():
+    """Pages libres en attente d'être rendues au disque"""
+    with read_connection() as conn:
+        return conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+
+def incremental_vacuum_enabled():
+    """True si la base est en auto_vacuum incrémental (pages libres rendables)"""
+    with read_connection() as conn:
+        return conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+
+
+def enable_incremental_vacuum():
+    """Passe la base en auto_vacuum incrémental; False si c'était déjà fait
+
+    Le changement ne prend effet qu'après un VACUUM complet, qui réécrit toute la
+    base et bloque les écritures: opération unique, à lancer bot arrêté
+    (python retention.py --enable-incremental-vacuum).
+    """
+    init_database()
+    with _write_lock:
+        conn = _get_write_connection()
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+            return False
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+    return True
+
+
+def vacuum_step(pages=VACUUM_STEP_PAGES):
+    """Rend au plus pages pages libres au disque
+
+    Le verrou d'écriture n'est tenu que le temps d'un petit pas.
+    """
+    with _write_lock:
+        conn = _get_write_connection()
+        # executescript va jusqu'au bout du pragma (execute ne libère qu'une page par
+        # appel)
+        conn.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+        remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return remaining
+
+
+def checkpoint():
+    """Reporte le WAL dans la base sans attendre les lecteurs"""
+    with _write_lock:
+        _get_write_connection().execute('PRAGMA wal_checkpoint(PASSIVE)').fetchall()
+
+
+def close_connections():
+    """Ferme toutes les connexions ouvertes (arrêt du processus)"""
+    global _write_conn
+    with _write_lock:
+        if _write_conn is not None:
+            _write_conn.close()
+            _write_conn = None
+    while True:
+        try:
+            _read_pool.get_nowait().close()
+        except queue.Empty:
+            break
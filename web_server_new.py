@@ -1,143 +1,87 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, make_response
 from flask_cors import CORS
-import sqlite3
 from datetime import datetime
+import argparse
 import os
+import signal
 import threading
 import time
-import asyncio
-import json
-from pathlib import Path
 
-# Import bot functions
-import main
+import storage
+import export
+import retention
+import http_cache
+from http_cache import conditional, make_etag, epoch_ms_to_datetime
+# Le bot tourne dans un autre processus: on passe par son socket IPC
+from ipc import IPCError
+from cluster import ClusterClient, shard_config, merge_status, merge_cache_reports
+from events import EventHub, HubFull
+from snapshot import SnapshotCache, offline_status
+from guild_settings import settings_store, GLOBAL
 
 app = Flask(__name__)
 CORS(app)
 
-# Cache headers to prevent caching in Replit iframe
-@app.after_request
-def after_request(response):
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+# Schéma initialisé une seule fois au démarrage du serveur
+storage.init_database()
+# Un client IPC par cluster de bot, requêtes routées selon le serveur Discord
+bot_ipc = ClusterClient(shard_config)
 
-# Variable globale pour stocker le statut du bot
-bot_status = {'online': False, 'last_check': None, 'guilds': [], 'users_count': 0}
-
-def init_database_web():
-    """Initialise la base de données si elle n'existe pas"""
-    conn = sqlite3.connect('moderation_logs.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS moderation_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            action TEXT NOT NULL,
-            moderator TEXT NOT NULL,
-            target TEXT NOT NULL,
-            duration TEXT,
-            reason TEXT,
-            guild_id TEXT NOT NULL,
-            channel_id TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+# Serveur web: WEB_MODE=production pour waitress, sinon serveur de développement
+WEB_MODE = os.getenv('WEB_MODE', 'dev')
+WEB_HOST = os.getenv('WEB_HOST', '0.0.0.0')
+WEB_PORT = int(os.getenv('WEB_PORT', '5000'))
+WEB_THREADS = int(os.getenv('WEB_THREADS', '16'))
+WEB_CONNECTION_LIMIT = int(os.getenv('WEB_CONNECTION_LIMIT', '200'))
+# Connexion keep-alive inactive (ou client bloqué) fermée après ce délai (secondes)
+WEB_IDLE_TIMEOUT = int(os.getenv('WEB_IDLE_TIMEOUT', '60'))
+# Temps laissé aux requêtes en cours lors de l'arrêt (secondes)
+WEB_SHUTDOWN_GRACE = int(os.getenv('WEB_SHUTDOWN_GRACE', '10'))
+STOP_SIGNALS = tuple(
+    sig for sig in (signal.SIGINT, getattr(signal, 'SIGTERM', None)) if sig
+)
 
-def get_logs(guild_id=None, action_type=None, limit=50):
-    """Récupère les logs de modération avec filtres optionnels"""
-    try:
-        init_database_web()
-        
-        conn = sqlite3.connect('moderation_logs.db')
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT id, timestamp, action, moderator, target, duration, reason, guild_id, channel_id
-            FROM moderation_logs
-        '''
-        params = []
-        
-        conditions = []
-        if guild_id:
-            conditions.append('guild_id = ?')
-            params.append(guild_id)
-        if action_type:
-            conditions.append('action = ?')
-            params.append(action_type)
-            
-        if conditions:
-            query += ' WHERE ' + ' AND '.join(conditions)
-            
-        query += ' ORDER BY timestamp DESC LIMIT ?'
-        params.append(limit)
-        
-        cursor.execute(query, params)
-        logs = cursor.fetchall()
-        conn.close()
-        
-        formatted_logs = []
-        for log in logs:
-            formatted_log = {
-                'id': log[0],
-                'timestamp': log[1],
-                'action': log[2],
-                'moderator': log[3],
-                'target': log[4],
-                'duration': log[5],
-                'reason': log[6],
-                'guild_id': log[7],
-                'channel_id': log[8]
-            }
-            formatted_logs.append(formatted_log)
-        
-        return formatted_logs
-    except Exception as e:
-        print(f"Erreur lors de la récupération des logs: {e}")
-        return []
+# Délais d'exécution des commandes du dashboard (au-delà,
+# le bot annule l'action en attente)
+COMMAND_TIMEOUT = 15
+MASS_COMMAND_TIMEOUT = 120
 
-def get_bot_info():
-    """Récupère les informations du bot Discord"""
-    try:
-        bot = main.get_bot()
-        if bot and bot.is_ready():
-            guilds_info = []
-            total_users = 0
-            
-            for guild in bot.guilds:
-                guild_info = {
-                    'id': str(guild.id),
-                    'name': guild.name,
-                    'member_count': guild.member_count,
-                    'channels': len(guild.channels),
-                    'roles': len(guild.roles)
-                }
-                guilds_info.append(guild_info)
-                total_users += guild.member_count
-            
-            return {
-                'online': True,
-                'user': {
-                    'name': bot.user.name,
-                    'id': str(bot.user.id),
-                    'avatar': str(bot.user.avatar.url) if bot.user.avatar else None
-                },
-                'guilds': guilds_info,
-                'total_users': total_users,
-                'latency': round(bot.latency * 1000, 2)
-            }
-    except Exception as e:
-        print(f"Erreur récupération info bot: {e}")
+# Pages HTML jamais en cache (iframe Replit),
+# fichiers statiques versionnés, API revalidées par ETag
+http_cache.init_app(app)
+
+# Dernier état connu de chaque cluster, rafraîchi au plus toutes les STATUS_TTL secondes
+status_caches = [
+    SnapshotCache(lambda since, client=client: client.request('status', since=since))
+    for client in bot_ipc.clients
+]
+
+def get_bot_info(quiet=False):
+    """Récupère les informations du bot Discord (fusionnées si plusieurs clusters)"""
+    statuses = []
+    for cache in status_caches:
+        try:
+            statuses.append(cache.get())
+        except IPCError as e:
+            if not quiet:
+                print(f"Erreur récupération info bot: {e}")
+            statuses.append(None)
     
-    return {
-        'online': False,
-        'user': None,
-        'guilds': [],
-        'total_users': 0,
-        'latency': 0
-    }
+    if len(statuses) == 1:
+        return statuses[0] or offline_status()
+    return merge_status(statuses) or offline_status(
+        sum(status['version'] for status in statuses if status)
+    )
+
+def snapshot_since():
+    """Version passée en ?since=, ou None"""
+    try:
+        return int(request.args['since'])
+    except (KeyError, ValueError):
+        return None
+
+# Un seul thread surveille logs et statut pour tous les onglets ouverts
+event_hub = EventHub(lambda: get_bot_info(quiet=True))
 
 # Routes principales
 @app.route('/')
@@ -168,62 +112,182 @@ def settings():
 # API Routes
 @app.route('/api/status')
 def api_status():
-    """Statut du bot et informations générales"""
+    """Statut du bot et informations générales (?since=version:
+    seulement la latence si inchangé)
+    """
     bot_info = get_bot_info()
+    if snapshot_since() == bot_info['version']:
+        return jsonify(
+            {
+                'changed': False,
+                'version': bot_info['version'],
+                'latency': bot_info['latency']
+            }
+        )
     return jsonify(bot_info)
 
+@app.route('/api/events')
+def api_events():
+    """Flux SSE: nouveaux logs, variations des stats et changements de statut du bot"""
+    try:
+        subscriber = event_hub.subscribe(
+            guild_id=request.args.get('guild_id'),
+            last_event_id=request.headers.get('Last-Event-ID')
+            or request.args.get('last_id')
+        )
+    except HubFull as e:
+        # La page retombe sur son polling
+        return jsonify({'error': str(e)}), 503
+    response = Response(event_hub.stream(subscriber), mimetype='text/event-stream')
+    # Pas de mise en tampon par un éventuel proxy
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/logs')
 def api_logs():
-    """API pour récupérer les logs"""
-    guild_id = request.args.get('guild_id')
-    action_type = request.args.get('action')
-    limit = int(request.args.get('limit', 50))
-    
-    logs = get_logs(guild_id, action_type, limit)
-    return jsonify(logs)
+    """API pour récupérer les logs (pagination par curseur + filtres côté serveur,
+    ?archived=1 pour les archives)
+    """
+    if request.args.get('archived') == '1':
+        return query_logs_page(retention.query_archive)
+    try:
+        first_id, last_id, last_ts = storage.log_state()
+    except Exception as e:
+        print(f"Erreur lors de la récupération des logs: {e}")
+        return query_logs_page()
+    # Même dernier log + mêmes paramètres = même page
+    etag = make_etag('logs', first_id, last_id, sorted(request.args.items(multi=True)))
+    return conditional(
+        etag, lambda: make_response(query_logs_page()), epoch_ms_to_datetime(last_ts)
+    )
+
+def query_logs_page(query=storage.query_logs):
+    args = request.args
+    try:
+        limit = int(args.get('limit', storage.DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Paramètre limit invalide'}), 400
+
+    try:
+        logs, next_cursor = query(
+            guild_id=args.get('guild_id'),
+            action_type=args.get('action'),
+            moderator=args.get('moderator'),
+            target=args.get('target'),
+            date_from=args.get('date_from'),
+            date_to=args.get('date_to'),
+            order=args.get('order', 'desc'),
+            limit=limit,
+            cursor=args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Erreur lors de la récupération des logs: {e}")
+        logs, next_cursor = [], None
+
+    return jsonify({
+        'logs': logs,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    })
+
+@app.route('/api/logs/export')
+def api_logs_export():
+    """Export complet en flux (?format=csv|ndjson,
+    ?gzip=1), mêmes filtres que /api/logs
+    """
+    args = request.args
+    fmt = args.get('format', 'csv')
+    compress = args.get('gzip') == '1'
+    try:
+        chunks = export.export_logs(
+            fmt, compress,
+            guild_id=args.get('guild_id'),
+            action_type=args.get('action'),
+            moderator=args.get('moderator'),
+            target=args.get('target'),
+            date_from=args.get('date_from'),
+            date_to=args.get('date_to'),
+            order=args.get('order', 'desc')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filename = export.export_filename(fmt, compress, datetime.now().strftime('%Y%m%d'))
+    response = Response(
+        chunks,
+        mimetype='application/gzip' if compress else export.CONTENT_TYPES[fmt]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/logs/search')
+def api_logs_search():
+    """Recherche plein texte dans les raisons, cibles et modérateurs"""
+    args = request.args
+    query = args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Paramètre q manquant'}), 400
+
+    try:
+        limit = int(args.get('limit', storage.DEFAULT_PAGE_SIZE))
+        offset = int(args.get('cursor') or 0)
+    except ValueError:
+        return jsonify({'error': 'Paramètre limit ou cursor invalide'}), 400
+
+    try:
+        logs, next_offset = storage.search_logs(
+            query,
+            guild_id=args.get('guild_id'),
+            action_type=args.get('action'),
+            limit=limit,
+            offset=offset
+        )
+    except Exception as e:
+        print(f"Erreur recherche logs: {e}")
+        logs, next_offset = [], None
+
+    return jsonify({
+        'logs': logs,
+        'next_cursor': str(next_offset) if next_offset is not None else None,
+        'has_more': next_offset is not None
+    })
 
 @app.route('/api/stats')
 def api_stats():
-    """Statistiques générales"""
+    """Statistiques générales (?guild_id=, ?days=, ?breakdown=guild)"""
     try:
-        init_database_web()
-        
-        conn = sqlite3.connect('moderation_logs.db')
-        cursor = conn.cursor()
-        
-        # Total actions
-        cursor.execute('SELECT COUNT(*) FROM moderation_logs')
-        total_actions = cursor.fetchone()[0]
-        
-        # Actions by type
-        cursor.execute('SELECT action, COUNT(*) FROM moderation_logs GROUP BY action')
-        actions_by_type = dict(cursor.fetchall())
-        
-        # Recent activity (last 7 days)
-        cursor.execute('''
-            SELECT COUNT(*) FROM moderation_logs 
-            WHERE datetime(timestamp) > datetime('now', '-7 days')
-        ''')
-        recent_activity = cursor.fetchone()[0]
-        
-        # Activity by day (last 7 days)
-        cursor.execute('''
-            SELECT date(timestamp) as day, COUNT(*) as count
-            FROM moderation_logs 
-            WHERE datetime(timestamp) > datetime('now', '-7 days')
-            GROUP BY date(timestamp)
-            ORDER BY day DESC
-        ''')
-        daily_activity = dict(cursor.fetchall())
-        
-        conn.close()
-        
-        return jsonify({
-            'total_actions': total_actions,
-            'actions_by_type': actions_by_type,
-            'recent_activity': recent_activity,
-            'daily_activity': daily_activity
-        })
+        _, last_id, last_ts = storage.log_state()
+    except Exception as e:
+        print(f"Erreur API stats: {e}")
+        return compute_stats()
+    # La fenêtre d'activité récente glisse d'heure en heure même sans nouveau log
+    hour = int(time.time()) // 3600
+    etag = make_etag('stats', last_id, hour, sorted(request.args.items(multi=True)))
+    return conditional(
+        etag,
+        lambda: make_response(compute_stats()),
+        epoch_ms_to_datetime(max(last_ts or 0, hour * 3600000))
+    )
+
+def compute_stats():
+    try:
+        days = int(request.args.get('days', 7))
+    except ValueError:
+        days = 0
+    if days < 1:
+        return jsonify(
+            {'error': 'Paramètre days invalide (entier positif attendu)'}
+        ), 400
+
+    try:
+        return jsonify(storage.fetch_stats(
+            guild_id=request.args.get('guild_id'),
+            days=days,
+            by_guild=request.args.get('breakdown') == 'guild'
+        ))
     except Exception as e:
         print(f"Erreur API stats: {e}")
         return jsonify({
@@ -242,98 +306,299 @@ def api_execute_command():
         guild_id = data.get('guild_id')
         user_id = data.get('user_id')
         channel_id = data.get('channel_id')
-        reason = data.get('reason', 'Exécuté depuis le dashboard web')
+        # Sans raison: raison par défaut du serveur
+        reason = data.get('reason') or None
         duration = data.get('duration')
         
         if not command or not guild_id:
             return jsonify({'success': False, 'message': 'Paramètres manquants'}), 400
         
-        # Exécuter la commande de façon asynchrone
+        # Exécutée par le processus du bot, sur son event loop
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            success, message = loop.run_until_complete(
-                main.execute_bot_command(guild_id, command, user_id, reason, duration, channel_id)
+            result = bot_ipc.request(
+                'execute',
+                timeout=COMMAND_TIMEOUT,
+                guild_id=guild_id,
+                command=command,
+                user_id=user_id,
+                reason=reason,
+                duration=duration,
+                channel_id=channel_id
             )
-            loop.close()
-        except Exception as e:
-            return jsonify({'success': False, 'message': f'Erreur d\'exécution: {str(e)}'}), 500
+        except IPCError as e:
+            return jsonify(
+                {'success': False, 'message': f'Erreur d\'exécution: {str(e)}'}
+            ), 503
+        success, message = result['success'], result['message']
+        event_hub.wake()
         
         return jsonify({'success': success, 'message': message})
         
     except Exception as e:
         return jsonify({'success': False, 'message': f'Erreur: {str(e)}'}), 500
 
+@app.route('/api/command/mass', methods=['POST'])
+def api_execute_mass_command():
+    """Exécute une action de masse (ban/kick/mute) depuis l'interface"""
+    try:
+        data = request.json
+        command = data.get('command')
+        guild_id = data.get('guild_id')
+        user_ids = data.get('user_ids') or []
+        reason = data.get('reason') or None
+        duration = data.get('duration')
+        
+        if not command or not guild_id or not user_ids:
+            return jsonify({'success': False, 'message': 'Paramètres manquants'}), 400
+        
+        try:
+            result = bot_ipc.request(
+                'mass',
+                timeout=MASS_COMMAND_TIMEOUT,
+                guild_id=guild_id,
+                command=command,
+                user_ids=user_ids,
+                reason=reason,
+                duration=duration
+            )
+        except IPCError as e:
+            return jsonify(
+                {'success': False, 'message': f'Erreur d\'exécution: {str(e)}'}
+            ), 503
+        success, message, summary = (
+            result['success'],
+            result['message'],
+            result['summary']
+        )
+        event_hub.wake()
+        
+        return jsonify({'success': success, 'message': message, 'summary': summary})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Erreur: {str(e)}'}), 500
+
 @app.route('/api/guilds')
 def api_guilds():
-    """Liste des serveurs Discord"""
+    """Liste des serveurs Discord (204 si ?since=version est toujours à jour)"""
     bot_info = get_bot_info()
-    return jsonify(bot_info.get('guilds', []))
+    if snapshot_since() == bot_info['version']:
+        response = Response(status=204)
+    else:
+        response = conditional(
+            make_etag('guilds', bot_info['version']),
+            lambda: jsonify(bot_info['guilds']),
+            epoch_ms_to_datetime(bot_info.get('updated'))
+        )
+    response.headers['X-Snapshot-Version'] = str(bot_info['version'])
+    return response
 
 @app.route('/api/guild/<guild_id>/members')
 def api_guild_members(guild_id):
-    """Membres d'un serveur spécifique"""
+    """Membres d'un serveur: recherche (?q=, ?mode=prefix|substring),
+    filtres (?role=, ?status=) et curseur
+    """
+    args = request.args
     try:
-        bot = main.get_bot()
-        if not bot or not bot.is_ready():
-            return jsonify([])
-        
-        guild = bot.get_guild(int(guild_id))
-        if not guild:
-            return jsonify([])
-        
-        members = []
-        for member in guild.members[:100]:  # Limiter à 100 membres
-            if not member.bot:  # Exclure les bots
-                member_info = {
-                    'id': str(member.id),
-                    'name': member.name,
-                    'display_name': member.display_name,
-                    'avatar': str(member.avatar.url) if member.avatar else None,
-                    'status': str(member.status),
-                    'roles': [role.name for role in member.roles[1:]]  # Exclure @everyone
-                }
-                members.append(member_info)
-        
-        return jsonify(members)
-        
-    except Exception as e:
+        limit = int(args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': 'Paramètre limit invalide'}), 400
+    
+    try:
+        page = bot_ipc.request(
+            'members',
+            guild_id=guild_id,
+            q=args.get('q'),
+            mode=args.get('mode', 'prefix'),
+            role_id=args.get('role'),
+            status=args.get('status'),
+            include_bots=args.get('bots') == '1',
+            cursor=args.get('cursor'),
+            limit=limit,
+        )
+    except IPCError as e:
         print(f"Erreur récupération membres: {e}")
+        page = {'members': [], 'next_cursor': None, 'total': 0}
+    
+    page['has_more'] = page['next_cursor'] is not None
+    return jsonify(page)
+
+@app.route('/api/guild/<guild_id>/roles')
+def api_guild_roles(guild_id):
+    """Rôles d'un serveur (filtre de l'annuaire)"""
+    try:
+        return jsonify(bot_ipc.request('roles', guild_id=guild_id))
+    except IPCError as e:
+        print(f"Erreur récupération rôles: {e}")
         return jsonify([])
 
 @app.route('/api/guild/<guild_id>/channels')
 def api_guild_channels(guild_id):
     """Canaux d'un serveur spécifique"""
     try:
-        bot = main.get_bot()
-        if not bot or not bot.is_ready():
-            return jsonify([])
-        
-        guild = bot.get_guild(int(guild_id))
-        if not guild:
-            return jsonify([])
-        
-        channels = []
-        for channel in guild.channels:
-            if hasattr(channel, 'send'):  # Canaux texte seulement
-                channel_info = {
-                    'id': str(channel.id),
-                    'name': channel.name,
-                    'type': str(channel.type),
-                    'category': channel.category.name if channel.category else None
-                }
-                channels.append(channel_info)
-        
-        return jsonify(channels)
-        
-    except Exception as e:
+        return jsonify(bot_ipc.request('channels', guild_id=guild_id))
+    except IPCError as e:
         print(f"Erreur récupération canaux: {e}")
         return jsonify([])
 
+@app.route('/api/cache')
+def api_cache():
+    """Mémoire estimée du cache de membres du bot, par serveur"""
+    report = merge_cache_reports(bot_ipc.broadcast('cache'))
+    if report is None:
+        return jsonify({'error': 'Bot injoignable'}), 503
+    return jsonify(report)
+
+@app.route('/api/settings')
+def api_settings():
+    """Paramètres globaux du bot, et ceux d'un serveur avec ?guild_id="""
+    guild_id = storage.to_snowflake(request.args.get('guild_id'))
+    try:
+        # Relus en base: le bot a pu les modifier (+mutemode, +prefix...)
+        return jsonify(
+            {
+                'global': settings_store.get_all(GLOBAL, fresh=True),
+                'guild': settings_store.get_all(guild_id, fresh=True)
+                if guild_id
+                else None,
+                'defaults': {
+                    'global': settings_store.defaults(GLOBAL),
+                    'guild': settings_store.defaults(None)
+                }
+            }
+        )
+    except Exception as e:
+        print(f"Erreur lecture paramètres: {e}")
+        return jsonify({'error': 'Paramètres indisponibles'}), 500
+
+@app.route('/api/settings', methods=['PUT'])
+def api_update_settings():
+    """Enregistre les paramètres ({global: {...},
+    guild_id, guild: {...}}) et prévient le bot
+    """
+    data = request.get_json(silent=True) or {}
+    guild_id = storage.to_snowflake(data.get('guild_id'))
+    updates = [(GLOBAL, data.get('global') or {})]
+    if data.get('guild'):
+        if not guild_id:
+            return jsonify({'success': False, 'message': 'Serveur manquant'}), 400
+        updates.append((guild_id, data['guild']))
+
+    # Tout est validé avant la moindre écriture
+    try:
+        for scope, values in updates:
+            settings_store.validate(scope, values)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    applied = True
+    for scope, values in updates:
+        changed = settings_store.update(scope, values)
+        if not changed:
+            continue
+        try:
+            if scope == GLOBAL:
+                # Paramètres globaux: chaque cluster applique la présence sur ses shards
+                if None in bot_ipc.broadcast(
+                    'settings_changed', guild_id=scope, keys=changed
+                ):
+                    raise IPCError("cluster injoignable")
+            else:
+                bot_ipc.request('settings_changed', guild_id=scope, keys=changed)
+        except IPCError as e:
+            # Enregistré quand même: le bot relira la base à son démarrage
+            print(f"Bot non prévenu du changement de paramètres: {e}")
+            applied = False
+
+    return jsonify(
+        {
+            'success': True,
+            'applied': applied,
+            'message': 'Paramètres enregistrés'
+            if applied
+            else 'Paramètres enregistrés (appliqués au prochain démarrage du bot)'
+        }
+    )
+
+def run_dev(host=WEB_HOST, port=WEB_PORT):
+    """Serveur de développement Werkzeug (rechargement auto + débogueur)"""
+    # threaded: chaque flux SSE occupe un thread
+    app.run(host=host, port=port, debug=True, threaded=True)
+
+def run_production(host=WEB_HOST, port=WEB_PORT, threads=WEB_THREADS):
+    """Serveur de production waitress: pool de threads,
+    keep-alive, arrêt propre sur SIGINT/SIGTERM
+    """
+    try:
+        from waitress.server import create_server
+    except ImportError:
+        print(
+            "⚠️  waitress non installé (pip install waitress): serveur Werkzeug sans "
+            "débogueur"
+        )
+        app.run(host=host, port=port, debug=False, threaded=True)
+        return
+
+    # Chaque flux SSE occupe un thread: l'autre moitié reste pour les requêtes
+    # ordinaires
+    event_hub.max_subscribers = max(1, threads // 2)
+    server = create_server(
+        app, host=host, port=port, threads=threads,
+        connection_limit=WEB_CONNECTION_LIMIT,
+        channel_timeout=WEB_IDLE_TIMEOUT,
+        cleanup_interval=max(1, WEB_IDLE_TIMEOUT // 4),
+        ident='dashboard'
+    )
+
+    def drain():
+        # Attend la fin des requêtes en cours, puis interrompt la boucle de waitress
+        deadline = time.monotonic() + WEB_SHUTDOWN_GRACE
+        tasks = server.task_dispatcher
+        while (tasks.active_count or tasks.queue) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        signal.raise_signal(signal.SIGINT)
+
+    def stop(_signum, _frame):
+        print(
+            "🛑 Arrêt du serveur web: plus de nouvelles connexions, fin des requêtes "
+            "en cours..."
+        )
+        for sig in STOP_SIGNALS:
+            signal.signal(sig, signal.default_int_handler)
+        server.accepting = False
+        event_hub.close()
+        threading.Thread(target=drain, name='web-drain', daemon=True).start()
+
+    for sig in STOP_SIGNALS:
+        signal.signal(sig, stop)
+
+    print(f"🌐 Serveur de production sur http://{host}:{port} ({threads} threads)")
+    try:
+        server.run()
+    finally:
+        bot_ipc.close()
+        storage.close_connections()
+        print("✅ Serveur web arrêté")
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Dashboard web du bot de modération")
+    parser.add_argument(
+        '--production',
+        action='store_true',
+        default=WEB_MODE == 'production',
+        help="serveur waitress au lieu du serveur de développement (ou "
+             "WEB_MODE=production)"
+    )
+    parser.add_argument('--host', default=WEB_HOST)
+    parser.add_argument('--port', type=int, default=WEB_PORT)
+    parser.add_argument('--threads', type=int, default=WEB_THREADS)
+    options = parser.parse_args()
+
     # Créer les dossiers nécessaires
     for folder in ['templates', 'static']:
         if not os.path.exists(folder):
             os.makedirs(folder)
     
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    if options.production:
+        run_production(options.host, options.port, options.threads)
+    else:
+        run_dev(options.host, options.port)